@@ -1,7 +1,7 @@
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useState } from 'react';
 import { Star } from 'lucide-react';
 import { TopHeader } from '../components/layout/TopHeader';
-import { Card, CardBody, EmptyState, Spinner, Table } from '../components';
+import { Button, Card, CardBody, EmptyState, Spinner, Table } from '../components';
 import { ratingsApi } from '../services/api';
 import { useToast } from '../context/ToastContext';
 import type { FlightRating } from '../types';
@@ -10,28 +10,38 @@ export function RatingsPage() {
   const { addToast } = useToast();
   const [ratings, setRatings] = useState<FlightRating[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
-  useEffect(() => {
-    const loadRatings = async () => {
+  // Ocene stižu stranu po stranu (od najnovije); sledeća strana po kursoru
+  const loadRatings = useCallback(async (cursor?: number) => {
+    if (cursor) {
+      setIsLoadingMore(true);
+    } else {
       setIsLoading(true);
-      try {
-        const response = await ratingsApi.getAll();
-        if (response.success) {
-          setRatings(response.data || []);
-        }
-      } catch {
-        addToast({
-          type: 'error',
-          title: 'Greška',
-          message: 'Nije moguće učitati ocene.',
-        });
-      } finally {
-        setIsLoading(false);
+    }
+    try {
+      const response = await ratingsApi.getAll(cursor);
+      if (response.success) {
+        const page = response.data || [];
+        setRatings((prev) => (cursor ? [...prev, ...page] : page));
+        setNextCursor(response.next_cursor ?? null);
       }
-    };
+    } catch {
+      addToast({
+        type: 'error',
+        title: 'Greška',
+        message: 'Nije moguće učitati ocene.',
+      });
+    } finally {
+      setIsLoading(false);
+      setIsLoadingMore(false);
+    }
+  }, [addToast]);
 
+  useEffect(() => {
     loadRatings();
-  }, [addToast]);
+  }, [loadRatings]);
 
   const columns = [
     {
@@ -92,6 +102,14 @@ export function RatingsPage() {
             )}
           </CardBody>
         </Card>
+
+        {nextCursor && !isLoading && (
+          <div style={{ display: 'flex', justifyContent: 'center', marginTop: 'var(--spacing-lg)' }}>
+            <Button variant="secondary" onClick={() => loadRatings(nextCursor)} isLoading={isLoadingMore}>
+              Učitaj još
+            </Button>
+          </div>
+        )}
       </div>
     </>
   );
@@ -27,21 +27,36 @@ export function UsersPage() {
   const [users, setUsers] = useState<User[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const [roleFilter, setRoleFilter] = useState('');
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [roleModal, setRoleModal] = useState<User | null>(null);
   const [deleteModal, setDeleteModal] = useState<User | null>(null);
   const [selectedRole, setSelectedRole] = useState('');
   const [isSubmitting, setIsSubmitting] = useState(false);
 
+  // Pretraga i filtriranje su na serveru; unos se šalje sa kratkim zakašnjenjem
   useEffect(() => {
-    loadUsers();
-  }, []);
+    const timeout = setTimeout(() => loadUsers(), 300);
+    return () => clearTimeout(timeout);
+  }, [searchTerm, roleFilter]);
 
-  const loadUsers = async () => {
-    setIsLoading(true);
+  const loadUsers = async (cursor?: number) => {
+    if (cursor) {
+      setIsLoadingMore(true);
+    } else {
+      setIsLoading(true);
+    }
     try {
-      const response = await usersApi.getAll();
+      const response = await usersApi.getAll({
+        q: searchTerm.trim() || undefined,
+        uloga: roleFilter || undefined,
+        cursor,
+      });
       if (response.success) {
-        setUsers(response.data || []);
+        const page = response.data || [];
+        setUsers((prev) => (cursor ? [...prev, ...page] : page));
+        setNextCursor(response.next_cursor ?? null);
       }
     } catch (error) {
       console.error('Error loading users:', error);
@@ -52,6 +67,7 @@ export function UsersPage() {
       });
     } finally {
       setIsLoading(false);
+      setIsLoadingMore(false);
     }
   };
 
@@ -122,12 +138,6 @@ export function UsersPage() {
     }
   };
 
-  const filteredUsers = users.filter((user) =>
-    `${user.ime} ${user.prezime} ${user.email}`
-      .toLowerCase()
-      .includes(searchTerm.toLowerCase())
-  );
-
   const columns = [
     {
       key: 'user',
@@ -211,6 +221,17 @@ export function UsersPage() {
             value={searchTerm}
             onSearch={setSearchTerm}
           />
+          <Select
+            value={roleFilter}
+            onChange={(e) => setRoleFilter(e.target.value)}
+            options={[
+              { value: '', label: 'Sve uloge' },
+              { value: UserRole.KORISNIK, label: 'Korisnik' },
+              { value: UserRole.MENADZER, label: 'Menadžer' },
+              { value: UserRole.ADMINISTRATOR, label: 'Administrator' },
+            ]}
+            style={{ minWidth: '200px' }}
+          />
         </div>
 
         <Card>
@@ -219,22 +240,30 @@ export function UsersPage() {
               <div style={{ display: 'flex', justifyContent: 'center', padding: 'var(--spacing-3xl)' }}>
                 <Spinner size="lg" />
               </div>
-            ) : filteredUsers.length > 0 ? (
+            ) : users.length > 0 ? (
               <Table
                 columns={columns}
-                data={filteredUsers}
+                data={users}
                 keyExtractor={(user) => user.id}
               />
             ) : (
               <EmptyState
                 icon={<Users />}
                 title="Nema korisnika"
-                description={searchTerm ? 'Nema korisnika koji odgovaraju pretrazi.' : 'Nema registrovanih korisnika.'}
+                description={searchTerm || roleFilter ? 'Nema korisnika koji odgovaraju pretrazi.' : 'Nema registrovanih korisnika.'}
               />
             )}
           </CardBody>
         </Card>
 
+        {nextCursor && !isLoading && (
+          <div style={{ display: 'flex', justifyContent: 'center', marginTop: 'var(--spacing-lg)' }}>
+            <Button variant="secondary" onClick={() => loadUsers(nextCursor)} isLoading={isLoadingMore}>
+              Učitaj još
+            </Button>
+          </div>
+        )}
+
         {/* Change Role Modal */}
         <Modal
           isOpen={!!roleModal}
@@ -99,8 +99,17 @@ export const authApi = {
 
 // Users API
 export const usersApi = {
-  getAll: async (): Promise<ApiResponse<User[]>> => {
-    const response = await serverApi.get<ApiResponse<User[]>>('/users/');
+  getAll: async (params?: {
+    q?: string;
+    uloga?: string;
+    aktivan?: boolean;
+    cursor?: number;
+    limit?: number;
+  }): Promise<ApiResponse<User[]> & { next_cursor?: number | null }> => {
+    const response = await serverApi.get<ApiResponse<User[]> & { next_cursor?: number | null }>(
+      '/users/',
+      { params }
+    );
     return response.data;
   },
 
@@ -262,9 +271,16 @@ export const ticketsApi = {
 
 // Ratings API
 export const ratingsApi = {
-  getAll: async (): Promise<ApiResponse<FlightRating[]>> => {
-    const response = await flightApi.get<ApiResponse<FlightRating[]>>('/ratings/');
-    return response.data;
+  getAll: async (cursor?: number): Promise<ApiResponse<FlightRating[]> & { next_cursor?: number | null }> => {
+    const response = await flightApi.get<
+      ApiResponse<FlightRating[]> & { letovi?: Record<string, Flight>; next_cursor?: number | null }
+    >('/ratings/', { params: cursor ? { cursor } : undefined });
+    // Letovi dolaze jednom u mapi; spajamo ih sa ocenama po flight_id
+    const { letovi = {}, ...rest } = response.data;
+    return {
+      ...rest,
+      data: (rest.data || []).map((rating) => ({ ...rating, let: letovi[String(rating.flight_id)] })),
+    };
   },
 
   rateFlight: async (flightId: number, ocena: number, komentar?: string): Promise<ApiResponse<FlightRating>> => {
@@ -65,11 +65,15 @@ def create_app():
     from app.routes.airline_routes import airline_bp
     from app.routes.ticket_routes import ticket_bp
     from app.routes.rating_routes import rating_bp
+    from app.routes.export_routes import export_bp
+    from app.routes.stats_routes import stats_bp
     
     app.register_blueprint(flight_bp, url_prefix='/api/flights')
     app.register_blueprint(airline_bp, url_prefix='/api/airlines')
     app.register_blueprint(ticket_bp, url_prefix='/api/tickets')
     app.register_blueprint(rating_bp, url_prefix='/api/ratings')
+    app.register_blueprint(export_bp, url_prefix='/api/exports')
+    app.register_blueprint(stats_bp, url_prefix='/api/stats')
     
     # Registracija WebSocket handlera
     from app.routes import websocket_handlers
@@ -97,5 +101,11 @@ def create_app():
         
         db.session.commit()
         print('[FLIGHT-SERVICE] Demo avio kompanije kreirane')
+
+        # Migracija starih base64 logoa u airline_logos (jednom po kompaniji)
+        from app.services.airline_service import AirlineService
+        migrated = AirlineService().migrate_inline_logos()
+        if migrated:
+            print(f'[FLIGHT-SERVICE] Migrirano {migrated} logoa u airline_logos')
     
     return app
\ No newline at end of file
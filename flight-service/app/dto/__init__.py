@@ -9,7 +9,8 @@ from app.dto.flight_dto import (
     BuyTicketDTO,
     RateFlightDTO,
     CreateAirlineDTO,
-    FlightSearchDTO
+    FlightSearchDTO,
+    ExportFilterDTO
 )
 
 __all__ = [
@@ -21,5 +22,6 @@ __all__ = [
     'BuyTicketDTO',
     'RateFlightDTO',
     'CreateAirlineDTO',
-    'FlightSearchDTO'
+    'FlightSearchDTO',
+    'ExportFilterDTO'
 ]
\ No newline at end of file
@@ -307,4 +307,69 @@ class FlightSearchDTO:
             status=data.get('status'),
             datum_od=datum_od,
             datum_do=datum_do
-        )
\ No newline at end of file
+        )
+
+def parse_local_datetime(value: str) -> datetime:
+    """
+    Parsira ISO datum za filter. Vrednost sa zonom (npr. sufiks Z) se
+    prevodi u lokalno vreme bez zone, kao i kolone u bazi (datetime.now),
+    pa se vrednosti sa i bez zone mogu porediti.
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+@dataclass
+class ExportFilterDTO:
+    """DTO za filtere izvoza (CSV/NDJSON)."""
+    format: str = 'csv'
+    status: Optional[str] = None
+    airline_id: Optional[int] = None
+    datum_od: Optional[datetime] = None
+    datum_do: Optional[datetime] = None
+    otkazana: Optional[bool] = None
+
+    FORMATS = ('csv', 'ndjson')
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ExportFilterDTO':
+        """Kreira DTO iz rečnika (query parametri)."""
+        datum_od = data.get('datum_od')
+        datum_do = data.get('datum_do')
+
+        if isinstance(datum_od, str) and datum_od:
+            datum_od = parse_local_datetime(datum_od)
+        if isinstance(datum_do, str) and datum_do:
+            datum_do = parse_local_datetime(datum_do)
+
+        otkazana = data.get('otkazana')
+        if isinstance(otkazana, str):
+            otkazana = otkazana.lower() in ('1', 'true', 'da') if otkazana else None
+
+        return cls(
+            format=(data.get('format') or 'csv').lower(),
+            status=data.get('status') or None,
+            airline_id=int(data['airline_id']) if data.get('airline_id') else None,
+            datum_od=datum_od or None,
+            datum_do=datum_do or None,
+            otkazana=otkazana
+        )
+
+    def validate(self) -> list:
+        """Validira DTO i vraća listu grešaka."""
+        from app.models import FlightStatus
+
+        errors = []
+
+        if self.format not in self.FORMATS:
+            errors.append('Format mora biti csv ili ndjson')
+
+        if self.status and self.status not in FlightStatus.__members__:
+            errors.append('Nepoznat status leta')
+
+        if self.datum_od and self.datum_do and self.datum_od > self.datum_do:
+            errors.append('Datum od mora biti pre datuma do')
+
+        return errors
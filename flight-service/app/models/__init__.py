@@ -1,5 +1,13 @@
 # flight-service/app/models/__init__.py
 
-from app.models.flight import Airline, Flight, FlightStatus, Ticket, FlightRating
+from app.models.flight import Airline, AirlineLogo, Flight, FlightStatus, Ticket, FlightRating
+from app.models.cancellation import CancellationJob, CancellationJobStatus
+from app.models.outbox import OutboxEvent, OutboxEventType, OutboxStatus
+from app.models.report_job import ReportJob, ReportJobStatus, ReportRecipient
+from app.models.stats import FlightStats, FlightSalesHourly
 
-__all__ = ['Airline', 'Flight', 'FlightStatus', 'Ticket', 'FlightRating']
\ No newline at end of file
+__all__ = ['Airline', 'AirlineLogo', 'Flight', 'FlightStatus', 'Ticket', 'FlightRating',
+           'CancellationJob', 'CancellationJobStatus',
+           'OutboxEvent', 'OutboxEventType', 'OutboxStatus',
+           'ReportJob', 'ReportJobStatus', 'ReportRecipient',
+           'FlightStats', 'FlightSalesHourly']
\ No newline at end of file
@@ -0,0 +1,49 @@
+# flight-service/app/models/cancellation.py
+
+from datetime import datetime
+from enum import Enum
+
+from app import db
+
+
+class CancellationJobStatus(str, Enum):
+    """Statusi posla otkazivanja leta."""
+    U_TOKU = "U_TOKU"
+    ZAVRSEN = "ZAVRSEN"
+    ZAVRSEN_SA_GRESKAMA = "ZAVRSEN_SA_GRESKAMA"
+
+
+class CancellationJob(db.Model):
+    """
+    Posao otkazivanja leta.
+    Karte se otkazuju odmah (jedan UPDATE), a refundi se izvršavaju
+    u pozadini preko outbox-a; posao prati koliko ih je obrađeno.
+    """
+    __tablename__ = 'cancellation_jobs'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    flight_id = db.Column(db.Integer, db.ForeignKey('flights.id'), nullable=False, index=True)
+    admin_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.Enum(CancellationJobStatus), default=CancellationJobStatus.U_TOKU, nullable=False)
+    ukupno = db.Column(db.Integer, default=0, nullable=False)
+    refundirano = db.Column(db.Integer, default=0, nullable=False)
+    neuspesno = db.Column(db.Integer, default=0, nullable=False)
+    kreiran = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    zavrsen = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        obradjeno = self.refundirano + self.neuspesno
+        return {
+            'id': self.id,
+            'flight_id': self.flight_id,
+            'status': self.status.value,
+            'ukupno': self.ukupno,
+            'refundirano': self.refundirano,
+            'neuspesno': self.neuspesno,
+            'progres': round(100 * obradjeno / self.ukupno, 1) if self.ukupno else 100.0,
+            'kreiran': self.kreiran.isoformat() if self.kreiran else None,
+            'zavrsen': self.zavrsen.isoformat() if self.zavrsen else None,
+        }
+
+    def __repr__(self):
+        return f'<CancellationJob {self.id} flight={self.flight_id} {self.status.value}>'
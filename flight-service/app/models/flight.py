@@ -2,8 +2,14 @@
 
 from datetime import datetime
 from enum import Enum
+from flask import has_request_context, request
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 from app import db
 
+# Prefiks kojim Airline.logo referencira sadržajno adresiran blob
+LOGO_HASH_PREFIX = 'sha256:'
+
 
 class FlightStatus(str, Enum):
     """Enum za status leta."""
@@ -15,6 +21,23 @@ class FlightStatus(str, Enum):
     OTKAZAN = "OTKAZAN"                  # Let je otkazan
 
 
+def airline_logo_url(airline_id: int, logo: str):
+    """
+    URL logoa za klijente. Blob logoi se serviraju preko
+    /api/airlines/<id>/logo sa hash-om u URL-u (keš se nikad ne zastareva).
+    """
+    if not logo:
+        return None
+    if logo.startswith(('http://', 'https://')):
+        return logo
+    logo_hash = logo[len(LOGO_HASH_PREFIX):] if logo.startswith(LOGO_HASH_PREFIX) else None
+    version = logo_hash[:16] if logo_hash else 'inline'
+    path = f'/api/airlines/{airline_id}/logo?v={version}'
+    if has_request_context():
+        return request.host_url.rstrip('/') + path
+    return path
+
+
 class Airline(db.Model):
     """
     Model avio kompanije za DB2.
@@ -25,7 +48,7 @@ class Airline(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     naziv = db.Column(db.String(200), unique=True, nullable=False)
     kod = db.Column(db.String(10), unique=True, nullable=False)  # IATA kod (npr. "JU", "AF")
-    logo = db.Column(db.Text, nullable=True)  # URL ili base64 logoa
+    logo = db.Column(db.Text, nullable=True)  # Eksterni URL ili 'sha256:<hash>' referenca na AirlineLogo
     drzava = db.Column(db.String(100), nullable=True)
     aktivna = db.Column(db.Boolean, default=True, nullable=False)
     kreirana = db.Column(db.DateTime, default=datetime.now, nullable=False)
@@ -36,18 +59,47 @@ class Airline(db.Model):
     def __repr__(self):
         return f'<Airline {self.naziv} ({self.kod})>'
 
+    @property
+    def logo_hash(self):
+        """Vraća hash logoa ako je logo sačuvan kao blob, inače None."""
+        if self.logo and self.logo.startswith(LOGO_HASH_PREFIX):
+            return self.logo[len(LOGO_HASH_PREFIX):]
+        return None
+
+    @property
+    def logo_url(self):
+        """URL logoa za klijente (vidi airline_logo_url)."""
+        return airline_logo_url(self.id, self.logo)
+
     def to_dict(self):
         """Konvertuje avio kompaniju u rečnik za JSON odgovor."""
         return {
             'id': self.id,
             'naziv': self.naziv,
             'kod': self.kod,
-            'logo': self.logo,
+            'logo': self.logo_url,
             'drzava': self.drzava,
             'aktivna': self.aktivna
         }
 
 
+class AirlineLogo(db.Model):
+    """
+    Sadržajno adresiran blob logoa avio kompanije.
+    Isti logo se čuva samo jednom, bez obzira na broj kompanija koje ga koriste.
+    """
+    __tablename__ = 'airline_logos'
+
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 sadržaja
+    content_type = db.Column(db.String(100), nullable=False)
+    sadrzaj = db.Column(db.LargeBinary(length=16 * 1024 * 1024), nullable=False)
+    velicina = db.Column(db.Integer, nullable=False)
+    kreiran = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f'<AirlineLogo {self.hash[:12]} ({self.velicina} B)>'
+
+
 class Flight(db.Model):
     """
     Model leta za DB2.
@@ -67,7 +119,7 @@ class Flight(db.Model):
     aerodrom_dolaska = db.Column(db.String(200), nullable=False)
     
     # Vremenski podaci
-    vreme_polaska = db.Column(db.DateTime, nullable=False)
+    vreme_polaska = db.Column(db.DateTime, nullable=False, index=True)
     trajanje_minuta = db.Column(db.Integer, nullable=False)  # Trajanje leta u minutima
     
     # Cena
@@ -111,38 +163,100 @@ class Flight(db.Model):
 
     @property
     def prosecna_ocena(self):
-        """Vraća prosečnu ocenu leta."""
-        ocene = [r.ocena for r in self.ocene.all()]
-        if not ocene:
-            return None
-        return sum(ocene) / len(ocene)
-
-    def to_dict(self, include_airline=True):
-        """Konvertuje let u rečnik za JSON odgovor."""
+        """Vraća prosečnu ocenu leta (AVG u bazi, bez učitavanja ocena)."""
+        prosek = db.session.query(func.avg(FlightRating.ocena)).filter(
+            FlightRating.flight_id == self.id
+        ).scalar()
+        return float(prosek) if prosek is not None else None
+
+    # Kolone koje su potrebne za svako polje iz to_dict (za load_only projekciju)
+    FIELD_COLUMNS = {
+        'id': ('id',),
+        'naziv': ('naziv',),
+        'airline_id': ('airline_id',),
+        'duzina_km': ('duzina_km',),
+        'aerodrom_polaska': ('aerodrom_polaska',),
+        'aerodrom_dolaska': ('aerodrom_dolaska',),
+        'vreme_polaska': ('vreme_polaska',),
+        'vreme_dolaska': ('vreme_polaska', 'trajanje_minuta'),
+        'trajanje_minuta': ('trajanje_minuta',),
+        'cena_karte': ('cena_karte',),
+        'kreirao_id': ('kreirao_id',),
+        'status': ('status',),
+        'razlog_odbijanja': ('razlog_odbijanja',),
+        'ukupno_mesta': ('ukupno_mesta',),
+        'slobodna_mesta': ('ukupno_mesta',),
+        'prosecna_ocena': (),
+        'kreiran': ('kreiran',),
+        'avio_kompanija': ('airline_id',),
+    }
+
+    @classmethod
+    def load_only_for(cls, fields, extra=()):
+        """
+        Vraća load_only opciju koja učitava samo kolone potrebne za data polja.
+
+        Args:
+            fields: Skup traženih polja (iz ?fields=)
+            extra: Dodatne kolone potrebne servisu (npr. za filtriranje u Python-u)
+        """
+        columns = {'id', *extra}
+        for field in fields:
+            columns.update(cls.FIELD_COLUMNS.get(field, ()))
+        return load_only(*[getattr(cls, c) for c in sorted(columns)])
+
+    def to_dict(self, include_airline=True, fields=None):
+        """
+        Konvertuje let u rečnik za JSON odgovor.
+
+        Args:
+            include_airline: Da li se ugnježđuje avio kompanija
+            fields: Opcioni skup polja - računaju se samo tražena polja
+        """
         data = {
-            'id': self.id,
-            'naziv': self.naziv,
-            'airline_id': self.airline_id,
-            'duzina_km': float(self.duzina_km),
-            'aerodrom_polaska': self.aerodrom_polaska,
-            'aerodrom_dolaska': self.aerodrom_dolaska,
-            'vreme_polaska': self.vreme_polaska.isoformat() if self.vreme_polaska else None,
-            'vreme_dolaska': self.vreme_dolaska.isoformat() if self.vreme_polaska else None,
-            'trajanje_minuta': self.trajanje_minuta,
-            'cena_karte': float(self.cena_karte),
-            'kreirao_id': self.kreirao_id,
-            'status': self.status.value,
-            'razlog_odbijanja': self.razlog_odbijanja,
-            'ukupno_mesta': self.ukupno_mesta,
-            'slobodna_mesta': self.slobodna_mesta,
-            'prosecna_ocena': self.prosecna_ocena,
-            'kreiran': self.kreiran.isoformat() if self.kreiran else None
+            name: getter(self)
+            for name, getter in _FLIGHT_FIELDS.items()
+            if fields is None or name in fields
         }
-        if include_airline and self.avio_kompanija:
-            data['avio_kompanija'] = self.avio_kompanija.to_dict()
+        if include_airline and (fields is None or 'avio_kompanija' in fields):
+            # Kompanija iz kataloga u memoriji; relacija samo ako je nema u katalogu
+            from app.utils.airline_catalog import airline_catalog
+            airline = airline_catalog.get(self.airline_id) or self.avio_kompanija
+            if airline:
+                data['avio_kompanija'] = airline.to_dict()
         return data
 
 
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# Serijalizatori polja leta; skupa polja (slobodna_mesta, prosecna_ocena)
+# se pozivaju samo ako su tražena
+_FLIGHT_FIELDS = {
+    'id': lambda f: f.id,
+    'naziv': lambda f: f.naziv,
+    'airline_id': lambda f: f.airline_id,
+    'duzina_km': lambda f: float(f.duzina_km),
+    'aerodrom_polaska': lambda f: f.aerodrom_polaska,
+    'aerodrom_dolaska': lambda f: f.aerodrom_dolaska,
+    'vreme_polaska': lambda f: _isoformat(f.vreme_polaska),
+    'vreme_dolaska': lambda f: f.vreme_dolaska.isoformat() if f.vreme_polaska else None,
+    'trajanje_minuta': lambda f: f.trajanje_minuta,
+    'cena_karte': lambda f: float(f.cena_karte),
+    'kreirao_id': lambda f: f.kreirao_id,
+    'status': lambda f: f.status.value,
+    'razlog_odbijanja': lambda f: f.razlog_odbijanja,
+    'ukupno_mesta': lambda f: f.ukupno_mesta,
+    'slobodna_mesta': lambda f: f.slobodna_mesta,
+    'prosecna_ocena': lambda f: f.prosecna_ocena,
+    'kreiran': lambda f: _isoformat(f.kreiran),
+}
+
+# Sva polja leta (podrazumevani skup kada fields nije zadat)
+FLIGHT_FIELD_NAMES = tuple(_FLIGHT_FIELDS)
+
+
 class Ticket(db.Model):
     """
     Model karte/rezervacije za DB2.
@@ -165,26 +279,49 @@ class Ticket(db.Model):
     otkazana = db.Column(db.Boolean, default=False, nullable=False)
     
     # Vremenski podaci
-    kupljena = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    kupljena = db.Column(db.DateTime, default=datetime.now, nullable=False, index=True)
 
     def __repr__(self):
         return f'<Ticket {self.id} for Flight {self.flight_id}>'
 
-    def to_dict(self, include_flight=True):
-        """Konvertuje kartu u rečnik za JSON odgovor."""
+    @classmethod
+    def load_only_for(cls, fields):
+        """Vraća load_only opciju za tražena polja karte."""
+        columns = {'id', 'flight_id'} | {f for f in fields if f in _TICKET_FIELDS}
+        return load_only(*[getattr(cls, c) for c in sorted(columns)])
+
+    def to_dict(self, include_flight=True, fields=None):
+        """
+        Konvertuje kartu u rečnik za JSON odgovor.
+
+        Args:
+            include_flight: Da li se ugnježđuje let
+            fields: Opcioni skup polja; 'let.<polje>' bira polja ugnježđenog leta
+        """
         data = {
-            'id': self.id,
-            'flight_id': self.flight_id,
-            'user_id': self.user_id,
-            'cena': float(self.cena),
-            'otkazana': self.otkazana,
-            'kupljena': self.kupljena.isoformat() if self.kupljena else None
+            name: getter(self)
+            for name, getter in _TICKET_FIELDS.items()
+            if fields is None or name in fields
         }
+        flight_fields = None
+        if fields is not None:
+            flight_fields = {f[4:] for f in fields if f.startswith('let.')} or None
+            include_flight = include_flight and ('let' in fields or flight_fields is not None)
         if include_flight and self.let:
-            data['let'] = self.let.to_dict(include_airline=True)
+            data['let'] = self.let.to_dict(include_airline=True, fields=flight_fields)
         return data
 
 
+_TICKET_FIELDS = {
+    'id': lambda t: t.id,
+    'flight_id': lambda t: t.flight_id,
+    'user_id': lambda t: t.user_id,
+    'cena': lambda t: float(t.cena),
+    'otkazana': lambda t: t.otkazana,
+    'kupljena': lambda t: _isoformat(t.kupljena),
+}
+
+
 class FlightRating(db.Model):
     """
     Model ocene leta za DB2.
@@ -212,6 +349,8 @@ class FlightRating(db.Model):
     # Jedinstven par (flight_id, user_id) - korisnik može oceniti let samo jednom
     __table_args__ = (
         db.UniqueConstraint('flight_id', 'user_id', name='unique_user_flight_rating'),
+        # Filter po oceni u admin listingu (InnoDB indeks sadrži i id za kursor)
+        db.Index('ix_flight_ratings_ocena', 'ocena'),
     )
 
     def __repr__(self):
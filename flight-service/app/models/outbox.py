@@ -0,0 +1,52 @@
+# flight-service/app/models/outbox.py
+
+import json
+from datetime import datetime
+from enum import Enum
+
+from app import db
+
+
+class OutboxEventType(str, Enum):
+    """Vrste sporednih efekata koje dispečer izvršava."""
+    REFUND = "REFUND"
+    EMAIL = "EMAIL"
+    SOCKET = "SOCKET"
+
+
+class OutboxStatus(str, Enum):
+    """Statusi događaja u outbox-u."""
+    PENDING = "PENDING"
+    IN_PROGRESS = "IN_PROGRESS"  # preuzet; sledeci_pokusaj je rok zakupa
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class OutboxEvent(db.Model):
+    """
+    Sporedni efekat (refund, email, socket događaj) upisan u istoj
+    transakciji kao i promena stanja. Dispečer ih kasnije izvršava.
+    """
+    __tablename__ = 'outbox_events'
+    __table_args__ = (
+        db.Index('ix_outbox_events_status_sledeci', 'status', 'sledeci_pokusaj'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    tip = db.Column(db.Enum(OutboxEventType), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    # Sprečava dupli upis istog efekta (npr. dva otkazivanja iste karte)
+    dedup_key = db.Column(db.String(191), nullable=True, unique=True)
+    status = db.Column(db.Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    pokusaja = db.Column(db.Integer, default=0, nullable=False)
+    sledeci_pokusaj = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    poslednja_greska = db.Column(db.Text, nullable=True)
+    kreiran = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    obradjen = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def data(self) -> dict:
+        return json.loads(self.payload)
+
+    def __repr__(self):
+        return f'<OutboxEvent {self.id} {self.tip.value} {self.status.value}>'
@@ -0,0 +1,98 @@
+# flight-service/app/models/report_job.py
+
+from datetime import datetime
+from enum import Enum
+
+from app import db
+
+
+class ReportJobStatus(str, Enum):
+    """Statusi posla generisanja izvještaja."""
+    NA_CEKANJU = "NA_CEKANJU"
+    U_TOKU = "U_TOKU"
+    ZAVRSEN = "ZAVRSEN"
+    NEUSPESAN = "NEUSPESAN"
+
+
+class ReportJob(db.Model):
+    """
+    Posao generisanja PDF izvještaja.
+    Izvještaj renderuje pozadinski radnik u lokalno skladište fajlova;
+    gotov fajl se preuzima preko API-ja i (opciono) šalje na email.
+    """
+    __tablename__ = 'report_jobs'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    report_type = db.Column(db.String(20), nullable=False)
+    admin_id = db.Column(db.Integer, nullable=True)
+    admin_email = db.Column(db.String(255), nullable=True)
+    admin_name = db.Column(db.String(200), nullable=True)
+    posalji_email = db.Column(db.Boolean, default=True, nullable=False)
+    status = db.Column(db.Enum(ReportJobStatus), default=ReportJobStatus.NA_CEKANJU, nullable=False)
+    pokusaja = db.Column(db.Integer, default=0, nullable=False)
+    putanja = db.Column(db.String(500), nullable=True)
+    velicina = db.Column(db.Integer, nullable=True)
+    broj_letova = db.Column(db.Integer, nullable=True)
+    greska = db.Column(db.Text, nullable=True)
+    kreiran = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    zapocet = db.Column(db.DateTime, nullable=True)
+    zavrsen = db.Column(db.DateTime, nullable=True)
+
+    # Deduplikacija (isti tip u vremenskom prozoru) i preuzimanje posla
+    __table_args__ = (
+        db.Index('ix_report_jobs_type_kreiran', 'report_type', 'kreiran'),
+        db.Index('ix_report_jobs_status_id', 'status', 'id'),
+    )
+
+    @property
+    def download_name(self) -> str:
+        vreme = (self.zavrsen or self.kreiran or datetime.now()).strftime('%Y%m%d_%H%M')
+        return f"izvjestaj_{self.report_type}_{vreme}.pdf"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_type': self.report_type,
+            'status': self.status.value,
+            'pokusaja': self.pokusaja,
+            'velicina': self.velicina,
+            'broj_letova': self.broj_letova,
+            'greska': self.greska,
+            'download_url': f'/api/flights/report/{self.id}/download'
+            if self.status == ReportJobStatus.ZAVRSEN else None,
+            'kreiran': self.kreiran.isoformat() if self.kreiran else None,
+            'zapocet': self.zapocet.isoformat() if self.zapocet else None,
+            'zavrsen': self.zavrsen.isoformat() if self.zavrsen else None,
+        }
+
+    def __repr__(self):
+        return f'<ReportJob {self.id} {self.report_type} {self.status.value}>'
+
+
+class ReportRecipient(db.Model):
+    """
+    Administrator koji je zatražio izvještaj i čeka ga na email.
+    Više zahteva za isti izvještaj (deduplikacija) deli jedan fajl, ali
+    svaki podnosilac dobija svoj email.
+    """
+    __tablename__ = 'report_job_recipients'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('report_jobs.id', ondelete='CASCADE'), nullable=False)
+    admin_id = db.Column(db.Integer, nullable=True)
+    email = db.Column(db.String(255), nullable=False)
+    ime = db.Column(db.String(200), nullable=True)
+    pokusaja = db.Column(db.Integer, default=0, nullable=False)
+    # Rok zakupa tokom slanja, odnosno vreme sledećeg pokušaja posle greške
+    sledeci_pokusaj = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    poslat = db.Column(db.DateTime, nullable=True)
+    greska = db.Column(db.Text, nullable=True)
+    kreiran = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('job_id', 'email', name='uq_report_job_recipients_job_email'),
+        db.Index('ix_report_job_recipients_poslat_sledeci', 'poslat', 'sledeci_pokusaj'),
+    )
+
+    def __repr__(self):
+        return f'<ReportRecipient job={self.job_id} {self.email}>'
@@ -0,0 +1,69 @@
+# flight-service/app/models/stats.py
+
+from datetime import datetime
+
+from app import db
+
+
+class FlightStats(db.Model):
+    """
+    Sažeta statistika po letu (prodaja i ocene).
+    Ažurira se inkrementalno u istoj transakciji kao kupovina, otkazivanje
+    i ocenjivanje, pa dashboard ne mora da čita celu istoriju karata i ocena.
+    Bez FK na flights - brisanje leta ne zavisi od ove tabele.
+    """
+    __tablename__ = 'flight_stats'
+
+    flight_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    prodato = db.Column(db.Integer, default=0, nullable=False)   # Aktivne (neotkazane) karte
+    otkazano = db.Column(db.Integer, default=0, nullable=False)
+    prihod = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+    broj_ocena = db.Column(db.Integer, default=0, nullable=False)
+    zbir_ocena = db.Column(db.Integer, default=0, nullable=False)
+    ocena_1 = db.Column(db.Integer, default=0, nullable=False)
+    ocena_2 = db.Column(db.Integer, default=0, nullable=False)
+    ocena_3 = db.Column(db.Integer, default=0, nullable=False)
+    ocena_4 = db.Column(db.Integer, default=0, nullable=False)
+    ocena_5 = db.Column(db.Integer, default=0, nullable=False)
+    azurirano = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+    @property
+    def prosecna_ocena(self):
+        return self.zbir_ocena / self.broj_ocena if self.broj_ocena else None
+
+    def to_dict(self):
+        return {
+            'flight_id': self.flight_id,
+            'prodato': self.prodato,
+            'otkazano': self.otkazano,
+            'prihod': float(self.prihod or 0),
+            'broj_ocena': self.broj_ocena,
+            'prosecna_ocena': self.prosecna_ocena,
+            'raspodela_ocena': {str(k): getattr(self, f'ocena_{k}') for k in range(1, 6)},
+        }
+
+    def __repr__(self):
+        return f'<FlightStats flight={self.flight_id} prodato={self.prodato}>'
+
+
+class FlightSalesHourly(db.Model):
+    """
+    Prodaja karata po letu i satu (vremenska serija za grafike).
+    Red se ažurira inkrementalno pri kupovini i otkazivanju; otkazivanja
+    se beleže u satu u kom su se desila.
+    """
+    __tablename__ = 'flight_sales_hourly'
+
+    flight_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    sat = db.Column(db.DateTime, primary_key=True)  # Početak sata (minute i sekunde = 0)
+    airline_id = db.Column(db.Integer, nullable=False)
+    prodato = db.Column(db.Integer, default=0, nullable=False)
+    otkazano = db.Column(db.Integer, default=0, nullable=False)
+    prihod = db.Column(db.Numeric(14, 2), default=0, nullable=False)  # Neto (prodaja - otkazivanja)
+
+    __table_args__ = (
+        db.Index('ix_flight_sales_hourly_airline_sat', 'airline_id', 'sat'),
+    )
+
+    def __repr__(self):
+        return f'<FlightSalesHourly flight={self.flight_id} {self.sat}>'
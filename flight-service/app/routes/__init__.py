@@ -4,6 +4,9 @@ from app.routes.flight_routes import flight_bp
 from app.routes.airline_routes import airline_bp
 from app.routes.ticket_routes import ticket_bp
 from app.routes.rating_routes import rating_bp
+from app.routes.export_routes import export_bp
+from app.routes.stats_routes import stats_bp
 from app.routes import websocket_handlers
 
-__all__ = ['flight_bp', 'airline_bp', 'ticket_bp', 'rating_bp', 'websocket_handlers']
\ No newline at end of file
+__all__ = ['flight_bp', 'airline_bp', 'ticket_bp', 'rating_bp', 'export_bp', 'stats_bp',
+           'websocket_handlers']
\ No newline at end of file
@@ -1,10 +1,11 @@
 # flight-service/app/routes/airline_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, redirect, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from app.services import AirlineService
 from app.dto import CreateAirlineDTO
+from app.utils.etag import conditional_get, AIRLINES_SCOPE
 
 airline_bp = Blueprint("airlines", __name__)
 
@@ -14,7 +15,15 @@ def _role_check(*allowed_roles) -> bool:
     return identity.get("uloga") in allowed_roles
 
 
+def _airline_exists(airline_id: int):
+    """Precheck za conditional_get: 404 se vraća pre provere ETag-a."""
+    if AirlineService().get_airline_by_id(airline_id) is None:
+        return jsonify({"success": False, "message": "Avio kompanija nije pronadjena"}), 404
+    return None
+
+
 @airline_bp.route("/", methods=["GET"])
+@conditional_get([AIRLINES_SCOPE])
 def list_airlines():
     try:
         service = AirlineService()
@@ -25,6 +34,7 @@ def list_airlines():
 
 
 @airline_bp.route("/<int:airline_id>", methods=["GET"])
+@conditional_get([AIRLINES_SCOPE], precheck=_airline_exists)
 def get_airline(airline_id: int):
     try:
         service = AirlineService()
@@ -36,6 +46,29 @@ def get_airline(airline_id: int):
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
 
+@airline_bp.route("/<int:airline_id>/logo", methods=["GET"])
+def get_airline_logo(airline_id: int):
+    try:
+        service = AirlineService()
+        logo, external_url = service.get_logo(airline_id)
+        if external_url:
+            return redirect(external_url, code=302)
+        if not logo:
+            return jsonify({"success": False, "message": "Logo nije pronadjen"}), 404
+
+        # Sadržaj je adresiran hash-om, pa je keš trajan i ETag je sam hash
+        etag = f'"{logo.hash}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=31536000, immutable",
+        }
+        if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+            return current_app.response_class(status=304, headers=headers)
+        return current_app.response_class(logo.sadrzaj, mimetype=logo.content_type, headers=headers)
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
+
+
 @airline_bp.route("/", methods=["POST"])
 @jwt_required()
 def create_airline():
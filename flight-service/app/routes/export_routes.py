@@ -0,0 +1,87 @@
+# flight-service/app/routes/export_routes.py
+
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.services import ExportService
+from app.dto import ExportFilterDTO
+from app.utils.export import stream_csv, stream_ndjson
+
+export_bp = Blueprint('exports', __name__)
+
+_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def role_check(*allowed_roles):
+    """Helper za proveru uloge."""
+    identity = get_jwt_identity() or {}
+    return identity.get('uloga') in allowed_roles
+
+
+def _export(name: str, export_method):
+    """
+    Zajednički tok izvoza: validacija filtera, pa strimovan (chunked)
+    odgovor. Generator radi u kontekstu zahteva (stream_with_context),
+    pa server-side kursor ostaje otvoren dok se odgovor šalje.
+    """
+    if not role_check('ADMINISTRATOR'):
+        return jsonify({'success': False, 'message': 'Pristup odbijen'}), 403
+
+    try:
+        dto = ExportFilterDTO.from_dict(request.args.to_dict())
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Nevalidan filter: {str(e)}'}), 400
+
+    errors = dto.validate()
+    if errors:
+        return jsonify({'success': False, 'message': ', '.join(errors)}), 400
+
+    columns, rows = export_method(dto)
+    stream = stream_csv if dto.format == 'csv' else stream_ndjson
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M')}.{dto.format}"
+
+    return Response(
+        stream_with_context(stream(columns, rows)),
+        content_type=_CONTENT_TYPES[dto.format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            # Reverse proxy ne sme da baferuje ceo odgovor
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+
+@export_bp.route('/flights', methods=['GET'])
+@jwt_required()
+def export_flights():
+    """
+    Izvoz letova (samo admin).
+    Query: format=csv|ndjson, status, airline_id, datum_od, datum_do (vreme polaska)
+    """
+    return _export('letovi', ExportService().export_flights)
+
+
+@export_bp.route('/tickets', methods=['GET'])
+@jwt_required()
+def export_tickets():
+    """
+    Izvoz karata (samo admin).
+    Query: format, status i airline_id (leta), otkazana, datum_od, datum_do (vreme kupovine)
+    """
+    return _export('karte', ExportService().export_tickets)
+
+
+@export_bp.route('/ratings', methods=['GET'])
+@jwt_required()
+def export_ratings():
+    """
+    Izvoz ocena (samo admin).
+    Query: format, status i airline_id (leta), datum_od, datum_do (vreme ocenjivanja)
+    """
+    return _export('ocene', ExportService().export_ratings)
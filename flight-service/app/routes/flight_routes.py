@@ -1,14 +1,14 @@
 # flight-service/app/routes/flight_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import os
 import requests
 
 from app import socketio
-from app.services import FlightService
-from app.utils.report_generator import generate_flights_report_async
-from app.utils.email_sender import send_flight_cancelled_emails
+from app.services import FlightService, ReportService
+from app.utils.fields import parse_fields
+from app.utils.etag import conditional_get, FLIGHTS_SCOPE, AIRLINES_SCOPE, flight_scope
 from app.dto import (
     CreateFlightDTO,
     UpdateFlightDTO,
@@ -26,17 +26,20 @@ def _role_check(*allowed_roles) -> bool:
     return identity.get("uloga") in allowed_roles
 
 
-def _refund_balance(user_id: int, amount: float) -> bool:
-    server_url = os.getenv("SERVER_URL", "http://server:5001")
-    try:
-        response = requests.post(
-            f"{server_url}/api/internal/refund-balance",
-            json={"user_id": user_id, "amount": amount},
-            headers={"X-Internal-Key": os.getenv("INTERNAL_API_KEY", "internal-secret")},
-        )
-        return response.status_code == 200
-    except Exception:
-        return False
+def _require_roles(*allowed_roles):
+    """Precheck za conditional_get: 403 se vraća pre provere ETag-a."""
+    def check(**_kwargs):
+        if not _role_check(*allowed_roles):
+            return jsonify({"success": False, "message": "Pristup odbijen"}), 403
+        return None
+    return check
+
+
+def _flight_exists(flight_id: int):
+    """Precheck za conditional_get: 404 se vraća pre provere ETag-a."""
+    if FlightService().get_flight_by_id(flight_id) is None:
+        return jsonify({"success": False, "message": "Let nije pronadjen"}), 404
+    return None
 
 
 def _fetch_user_data(user_id: int):
@@ -44,6 +47,7 @@ def _fetch_user_data(user_id: int):
     try:
         response = requests.get(
             f"{server_url}/api/internal/user/{user_id}",
+            params={"fields": "id,ime,prezime,email"},
             headers={"X-Internal-Key": os.getenv("INTERNAL_API_KEY", "internal-secret")},
         )
         if response.status_code == 200:
@@ -58,13 +62,14 @@ def list_flights():
     try:
         service = FlightService()
         params = request.args.to_dict()
+        fields = parse_fields(params.pop("fields", None))
         if params:
             dto = FlightSearchDTO.from_dict(params)
-            flights = service.search_flights(dto)
+            flights = service.search_flights(dto, fields)
         else:
-            flights = service.get_upcoming_flights()
+            flights = service.get_upcoming_flights(fields)
 
-        return jsonify({"success": True, "data": [f.to_dict() for f in flights]}), 200
+        return jsonify({"success": True, "data": [f.to_dict(fields=fields) for f in flights]}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
@@ -73,25 +78,29 @@ def list_flights():
 def upcoming_flights():
     try:
         service = FlightService()
-        flights = service.get_upcoming_flights()
-        return jsonify({"success": True, "data": [f.to_dict() for f in flights]}), 200
+        fields = parse_fields(request.args.get("fields"))
+        flights = service.get_upcoming_flights(fields)
+        return jsonify({"success": True, "data": [f.to_dict(fields=fields) for f in flights]}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
 
 @flight_bp.route("/search", methods=["GET"])
+@conditional_get([FLIGHTS_SCOPE])
 def search_flights():
     try:
         service = FlightService()
         params = request.args.to_dict()
+        fields = parse_fields(params.pop("fields", None))
         dto = FlightSearchDTO.from_dict(params)
-        flights = service.search_flights(dto)
-        return jsonify({"success": True, "data": [f.to_dict() for f in flights]}), 200
+        flights = service.search_flights(dto, fields)
+        return jsonify({"success": True, "data": [f.to_dict(fields=fields) for f in flights]}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
 
 @flight_bp.route("/<int:flight_id>", methods=["GET"])
+@conditional_get(lambda flight_id: [flight_scope(flight_id), AIRLINES_SCOPE], precheck=_flight_exists)
 def get_flight(flight_id: int):
     try:
         service = FlightService()
@@ -105,20 +114,23 @@ def get_flight(flight_id: int):
 
 @flight_bp.route("/pending", methods=["GET"])
 @jwt_required()
+@conditional_get([FLIGHTS_SCOPE], private=True, precheck=_require_roles("ADMINISTRATOR"))
 def pending_flights():
     if not _role_check("ADMINISTRATOR"):
         return jsonify({"success": False, "message": "Pristup odbijen"}), 403
 
     try:
         service = FlightService()
-        flights = service.get_pending_flights()
-        return jsonify({"success": True, "data": [f.to_dict() for f in flights]}), 200
+        fields = parse_fields(request.args.get("fields"))
+        flights = service.get_pending_flights(fields)
+        return jsonify({"success": True, "data": [f.to_dict(fields=fields) for f in flights]}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
 
 @flight_bp.route("/my", methods=["GET"])
 @jwt_required()
+@conditional_get([FLIGHTS_SCOPE], private=True, precheck=_require_roles("MENADZER", "ADMINISTRATOR"))
 def my_flights():
     if not _role_check("MENADZER", "ADMINISTRATOR"):
         return jsonify({"success": False, "message": "Pristup odbijen"}), 403
@@ -130,8 +142,9 @@ def my_flights():
 
     try:
         service = FlightService()
-        flights = service.get_flights_by_creator(manager_id)
-        return jsonify({"success": True, "data": [f.to_dict() for f in flights]}), 200
+        fields = parse_fields(request.args.get("fields"))
+        flights = service.get_flights_by_creator(manager_id, fields)
+        return jsonify({"success": True, "data": [f.to_dict(fields=fields) for f in flights]}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
@@ -140,8 +153,9 @@ def my_flights():
 def in_progress_flights():
     try:
         service = FlightService()
-        flights = service.get_in_progress_flights()
-        return jsonify({"success": True, "data": [f.to_dict() for f in flights]}), 200
+        fields = parse_fields(request.args.get("fields"))
+        flights = service.get_in_progress_flights(fields)
+        return jsonify({"success": True, "data": [f.to_dict(fields=fields) for f in flights]}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
@@ -150,8 +164,9 @@ def in_progress_flights():
 def finished_flights():
     try:
         service = FlightService()
-        flights = service.get_finished_flights()
-        return jsonify({"success": True, "data": [f.to_dict() for f in flights]}), 200
+        fields = parse_fields(request.args.get("fields"))
+        flights = service.get_finished_flights(fields)
+        return jsonify({"success": True, "data": [f.to_dict(fields=fields) for f in flights]}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Greska: {str(e)}"}), 500
 
@@ -268,26 +283,15 @@ def cancel_flight():
     dto = CancelFlightDTO.from_dict(data)
 
     service = FlightService(socketio=socketio)
-    success, message, flight_data, refunds = service.cancel_flight(dto)
+    identity = get_jwt_identity() or {}
+    success, message, flight_data, job = service.cancel_flight(dto, identity.get("id"))
 
     if not success:
         return jsonify({"success": False, "message": message}), 400
 
-    refund_failures = []
-    for user_id, amount in refunds:
-        if not _refund_balance(user_id, amount):
-            refund_failures.append(user_id)
-
-    # Slanje email obavjestenja korisnicima o otkazanom letu
-    if refunds and flight_data:
-        send_flight_cancelled_emails(refunds, flight_data)
-
-    response = {"success": True, "message": message, "data": flight_data}
-    if refund_failures:
-        response["refund_failures"] = refund_failures
-        response["message"] = f"{message}. Neki refundi nisu uspeli."
-
-    return jsonify(response), 200
+    # Refundi i email obavjestenja su upisani u outbox u istoj transakciji
+    # i izvrsava ih dispecer u pozadini; progres se prati preko job id-a
+    return jsonify({"success": True, "message": message, "data": flight_data, "job": job}), 200
 
 
 @flight_bp.route("/<int:flight_id>/cancel", methods=["POST"])
@@ -298,26 +302,27 @@ def cancel_flight_by_id(flight_id: int):
 
     dto = CancelFlightDTO.from_dict({"flight_id": flight_id})
     service = FlightService(socketio=socketio)
-    success, message, flight_data, refunds = service.cancel_flight(dto)
+    identity = get_jwt_identity() or {}
+    success, message, flight_data, job = service.cancel_flight(dto, identity.get("id"))
 
     if not success:
         return jsonify({"success": False, "message": message}), 400
 
-    refund_failures = []
-    for user_id, amount in refunds:
-        if not _refund_balance(user_id, amount):
-            refund_failures.append(user_id)
+    # Refundi i email obavjestenja su upisani u outbox u istoj transakciji
+    # i izvrsava ih dispecer u pozadini; progres se prati preko job id-a
+    return jsonify({"success": True, "message": message, "data": flight_data, "job": job}), 200
 
-    # Slanje email obavjestenja korisnicima o otkazanom letu
-    if refunds and flight_data:
-        send_flight_cancelled_emails(refunds, flight_data)
 
-    response = {"success": True, "message": message, "data": flight_data}
-    if refund_failures:
-        response["refund_failures"] = refund_failures
-        response["message"] = f"{message}. Neki refundi nisu uspeli."
+@flight_bp.route("/cancellations/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_cancellation_job(job_id: int):
+    if not _role_check("ADMINISTRATOR"):
+        return jsonify({"success": False, "message": "Pristup odbijen"}), 403
 
-    return jsonify(response), 200
+    job = FlightService().get_cancellation_job(job_id)
+    if not job:
+        return jsonify({"success": False, "message": "Posao otkazivanja nije pronadjen"}), 404
+    return jsonify({"success": True, "data": job.to_dict()}), 200
 
 
 @flight_bp.route("/<int:flight_id>", methods=["DELETE"])
@@ -355,20 +360,54 @@ def generate_report():
     if not admin_data:
         return jsonify({"success": False, "message": "Ne mogu da dohvatim admina"}), 502
 
-    service = FlightService()
-    if normalized_type == "upcoming":
-        flights = service.get_upcoming_flights()
-    elif normalized_type == "in_progress":
-        flights = service.get_in_progress_flights()
-    else:
-        flights = service.get_finished_flights()
-
+    # Izvestaj generise pozadinski radnik; admin dobija id posla za pracenje
     admin_name = f"{admin_data.get('ime', '')} {admin_data.get('prezime', '')}".strip() or "Administrator"
-    generate_flights_report_async(
-        [f.to_dict() for f in flights],
+    # "email" moze stici i kao string ("false", "0")
+    send_email = data.get("email", True)
+    if isinstance(send_email, str):
+        send_email = send_email.strip().lower() in ("1", "true", "da")
+    success, message, job = ReportService().request_report(
         normalized_type,
+        admin_id,
         admin_data.get("email", ""),
         admin_name,
+        send_email=bool(send_email),
     )
+    if not success:
+        return jsonify({"success": False, "message": message}), 400
+
+    return jsonify({"success": True, "message": message, "data": job}), 202
+
+
+@flight_bp.route("/report/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_report_job(job_id: int):
+    if not _role_check("ADMINISTRATOR"):
+        return jsonify({"success": False, "message": "Pristup odbijen"}), 403
 
-    return jsonify({"success": True, "message": "Izvestaj je poslat na email"}), 200
+    job = ReportService().get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "message": "Izvestaj nije pronadjen"}), 404
+    return jsonify({"success": True, "data": job.to_dict()}), 200
+
+
+@flight_bp.route("/report/<int:job_id>/download", methods=["GET"])
+@jwt_required()
+def download_report(job_id: int):
+    if not _role_check("ADMINISTRATOR"):
+        return jsonify({"success": False, "message": "Pristup odbijen"}), 403
+
+    success, message, job = ReportService().get_artifact(job_id)
+    if not success:
+        status_code = 404 if job is None or job.putanja else 409
+        return jsonify({"success": False, "message": message}), status_code
+
+    # conditional=True: podrska za Range, If-Modified-Since i ETag
+    return send_file(
+        job.putanja,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=job.download_name,
+        conditional=True,
+        max_age=0,
+    )
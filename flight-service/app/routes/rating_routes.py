@@ -3,8 +3,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from app.services import FlightService
+from app.services import FlightService, RatingService
 from app.dto import RateFlightDTO
+from app.utils.etag import conditional_get, RATINGS_SCOPE, FLIGHTS_SCOPE
 
 rating_bp = Blueprint('ratings', __name__)
 
@@ -15,14 +16,30 @@ def role_check(*allowed_roles):
     return identity.get('uloga') in allowed_roles
 
 
+def _admin_only(**_kwargs):
+    """Precheck za conditional_get: 403 se vraća pre provere ETag-a."""
+    if not role_check('ADMINISTRATOR'):
+        return jsonify({
+            'success': False,
+            'message': 'Pristup odbijen'
+        }), 403
+    return None
+
+
 @rating_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get([RATINGS_SCOPE, FLIGHTS_SCOPE], private=True, precheck=_admin_only)
 def get_all_ratings():
     """
-    Vraća sve ocene (samo admin).
+    Vraća ocene (samo admin), stranu po stranu.
+    
+    Query:
+        - flight_id, airline_id, ocena: filteri (opciono)
+        - cursor: next_cursor iz prethodne strane
+        - limit: veličina strane (podrazumevano 50, najviše 200)
     
     Returns:
-        JSON lista ocena
+        JSON lista ocena, mapa letova (flight_id -> let) i next_cursor
     """
     try:
         if not role_check('ADMINISTRATOR'):
@@ -31,12 +48,20 @@ def get_all_ratings():
                 'message': 'Pristup odbijen'
             }), 403
         
-        flight_service = FlightService()
-        ratings = flight_service.get_all_ratings()
+        rating_service = RatingService()
+        ratings, flights, next_cursor = rating_service.list_ratings(
+            flight_id=request.args.get('flight_id', type=int),
+            airline_id=request.args.get('airline_id', type=int),
+            ocena=request.args.get('ocena', type=int),
+            cursor=request.args.get('cursor', type=int),
+            limit=request.args.get('limit', type=int)
+        )
         
         return jsonify({
             'success': True,
-            'data': [r.to_dict(include_flight=True) for r in ratings]
+            'data': ratings,
+            'letovi': {str(fid): flight for fid, flight in flights.items()},
+            'next_cursor': next_cursor
         }), 200
     
     except Exception as e:
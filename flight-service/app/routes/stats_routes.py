@@ -0,0 +1,138 @@
+# flight-service/app/routes/stats_routes.py
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.services import StatsService
+from app.dto.flight_dto import parse_local_datetime
+
+stats_bp = Blueprint('stats', __name__)
+
+MAX_LIMIT = 1000
+
+
+def _scope():
+    """
+    Vraća (dozvoljeno, manager_id). Administrator vidi sve letove,
+    menadžer samo svoje.
+    """
+    identity = get_jwt_identity() or {}
+    uloga = identity.get('uloga')
+    if uloga == 'ADMINISTRATOR':
+        return True, None
+    if uloga == 'MENADZER':
+        return True, identity.get('id')
+    return False, None
+
+
+def _limit() -> int:
+    return max(1, min(request.args.get('limit', 100, type=int), MAX_LIMIT))
+
+
+@stats_bp.route('/flights/status', methods=['GET'])
+@jwt_required()
+def flight_status_counts():
+    """Broj letova po statusu."""
+    allowed, manager_id = _scope()
+    if not allowed:
+        return jsonify({'success': False, 'message': 'Pristup odbijen'}), 403
+    return jsonify({'success': True, 'data': StatsService().status_counts(manager_id)}), 200
+
+
+@stats_bp.route('/revenue', methods=['GET'])
+@jwt_required()
+def revenue():
+    """
+    Prihod grupisan po letu, avio kompaniji ili menadžeru.
+    Query: group=flight|airline|manager, limit
+    """
+    allowed, manager_id = _scope()
+    if not allowed:
+        return jsonify({'success': False, 'message': 'Pristup odbijen'}), 403
+
+    group_by = request.args.get('group', 'flight')
+    if group_by not in ('flight', 'airline', 'manager'):
+        return jsonify({'success': False, 'message': 'Grupisanje mora biti flight, airline ili manager'}), 400
+
+    data = StatsService().revenue(group_by, manager_id, _limit())
+    return jsonify({'success': True, 'data': data}), 200
+
+
+@stats_bp.route('/load-factor', methods=['GET'])
+@jwt_required()
+def load_factor():
+    """Popunjenost letova (ukupno i po letu). Query: limit"""
+    allowed, manager_id = _scope()
+    if not allowed:
+        return jsonify({'success': False, 'message': 'Pristup odbijen'}), 403
+    return jsonify({'success': True, 'data': StatsService().load_factor(manager_id, _limit())}), 200
+
+
+@stats_bp.route('/ratings', methods=['GET'])
+@jwt_required()
+def rating_distribution():
+    """Raspodela ocena. Query: flight_id, airline_id"""
+    allowed, manager_id = _scope()
+    if not allowed:
+        return jsonify({'success': False, 'message': 'Pristup odbijen'}), 403
+
+    data = StatsService().rating_distribution(
+        flight_id=request.args.get('flight_id', type=int),
+        airline_id=request.args.get('airline_id', type=int),
+        manager_id=manager_id
+    )
+    return jsonify({'success': True, 'data': data}), 200
+
+
+def _parse_datetime(name: str):
+    value = request.args.get(name)
+    if not value:
+        return None
+    # Granica sa zonom se prevodi u lokalno vreme, kao filteri izvoza
+    return parse_local_datetime(value)
+
+
+def _sales_response(**target):
+    allowed, manager_id = _scope()
+    if not allowed:
+        return jsonify({'success': False, 'message': 'Pristup odbijen'}), 403
+
+    try:
+        od, do = _parse_datetime('od'), _parse_datetime('do')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Nevalidan datum'}), 400
+
+    success, message, data = StatsService().sales_series(od=od, do=do, manager_id=manager_id, **target)
+    if not success:
+        status_code = {'Pristup odbijen': 403, 'Let nije pronađen': 404}.get(message, 400)
+        return jsonify({'success': False, 'message': message}), status_code
+    return jsonify({'success': True, 'data': data}), 200
+
+
+@stats_bp.route('/sales/flights/<int:flight_id>', methods=['GET'])
+@jwt_required()
+def flight_sales(flight_id: int):
+    """Satna prodaja leta. Query: od, do (podrazumevano poslednjih 7 dana)"""
+    return _sales_response(flight_id=flight_id)
+
+
+@stats_bp.route('/sales/airlines/<int:airline_id>', methods=['GET'])
+@jwt_required()
+def airline_sales(airline_id: int):
+    """Satna prodaja avio kompanije (menadžer vidi samo svoje letove). Query: od, do"""
+    return _sales_response(airline_id=airline_id)
+
+
+@stats_bp.route('/rebuild', methods=['POST'])
+@jwt_required()
+def rebuild_stats():
+    """Ponovo računa sažetu statistiku iz karata i ocena (samo admin)."""
+    allowed, manager_id = _scope()
+    if not allowed or manager_id is not None:
+        return jsonify({'success': False, 'message': 'Pristup odbijen'}), 403
+
+    try:
+        count = StatsService().rebuild()
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Greska: {str(e)}'}), 500
+    return jsonify({'success': True, 'message': f'Statistika osvezena za {count} letova'}), 200
@@ -8,6 +8,8 @@ import requests
 from app import socketio
 from app.services import TicketService
 from app.dto import BuyTicketDTO
+from app.utils.fields import parse_fields
+from app.utils.etag import conditional_get, FLIGHTS_SCOPE, user_tickets_scope
 
 ticket_bp = Blueprint("tickets", __name__)
 
@@ -17,11 +19,17 @@ def _role_check(*allowed_roles) -> bool:
     return identity.get("uloga") in allowed_roles
 
 
+def _my_tickets_scopes(**_kwargs):
+    identity = get_jwt_identity() or {}
+    return [user_tickets_scope(identity.get("id")), FLIGHTS_SCOPE]
+
+
 def _fetch_user_data(user_id: int):
     server_url = os.getenv("SERVER_URL", "http://server:5001")
     try:
         response = requests.get(
             f"{server_url}/api/internal/user/{user_id}",
+            params={"fields": "id,stanje_racuna"},
             headers={"X-Internal-Key": os.getenv("INTERNAL_API_KEY", "internal-secret")},
         )
         if response.status_code == 200:
@@ -57,20 +65,22 @@ def buy_ticket():
 
 @ticket_bp.route("/", methods=["GET"])
 @jwt_required()
+@conditional_get(_my_tickets_scopes, private=True)
 def get_user_tickets():
     identity = get_jwt_identity() or {}
     service = TicketService()
-    tickets = service.get_user_tickets(identity.get("id"))
-    return jsonify({"success": True, "data": [t.to_dict() for t in tickets]}), 200
+    fields = parse_fields(request.args.get("fields"))
+    return jsonify({"success": True, "data": service.get_wallet(identity.get("id"), fields)}), 200
 
 
 @ticket_bp.route("/my", methods=["GET"])
 @jwt_required()
+@conditional_get(_my_tickets_scopes, private=True)
 def get_my_tickets():
     identity = get_jwt_identity() or {}
     service = TicketService()
-    tickets = service.get_user_tickets(identity.get("id"))
-    return jsonify({"success": True, "data": [t.to_dict() for t in tickets]}), 200
+    fields = parse_fields(request.args.get("fields"))
+    return jsonify({"success": True, "data": service.get_wallet(identity.get("id"), fields)}), 200
 
 
 @ticket_bp.route("/<int:ticket_id>", methods=["GET"])
@@ -5,8 +5,12 @@ from app.services.ticket_service import TicketService
 from app.services.airline_service import AirlineService
 from app.services.booking_service import BookingService
 from app.services.rating_service import RatingService
+from app.services.report_service import ReportService
+from app.services.export_service import ExportService
+from app.services.stats_service import StatsService
 
-__all__ = ['FlightService', 'TicketService', 'AirlineService', 'BookingService', 'RatingService']
+__all__ = ['FlightService', 'TicketService', 'AirlineService', 'BookingService', 'RatingService', 'ReportService',
+           'ExportService', 'StatsService']
 
 
 
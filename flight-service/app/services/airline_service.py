@@ -1,14 +1,136 @@
 # flight-service/app/services/airline_service.py
 
+import base64
+import binascii
+import hashlib
 from typing import Tuple, Optional, List
 
+from sqlalchemy.orm import load_only
+
 from app import db
-from app.models import Airline
+from app.models import Airline, AirlineLogo
+from app.models.flight import LOGO_HASH_PREFIX
 from app.dto import CreateAirlineDTO
+from app.utils.etag import bump_versions, AIRLINES_SCOPE, FLIGHTS_SCOPE
+from app.utils.airline_catalog import airline_catalog, CatalogAirline
+
+
+# Magični bajtovi za prepoznavanje formata kada base64 nema data: prefiks
+_IMAGE_SIGNATURES = [
+    (b'\x89PNG', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+    (b'RIFF', 'image/webp'),
+    (b'<svg', 'image/svg+xml'),
+    (b'<?xml', 'image/svg+xml'),
+]
+
+
+def _decode_inline_logo(value: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Dekodira base64 logo (sa ili bez data: prefiksa).
+
+    Returns:
+        Tuple (sadrzaj, content_type) ili None ako vrednost nije validan base64
+    """
+    content_type = None
+    payload = value.strip()
+    if payload.startswith('data:'):
+        header, _, payload = payload.partition(',')
+        content_type = header[5:].split(';')[0] or None
+    # Strogo dekodiranje: putanja ili oštećen data URI nisu slika
+    payload = ''.join(payload.split())
+    try:
+        content = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if not content:
+        return None
+    if not content_type:
+        content_type = next(
+            (ct for sig, ct in _IMAGE_SIGNATURES if content.lstrip().startswith(sig)),
+            'application/octet-stream'
+        )
+    return content, content_type
 
 
 class AirlineService:
     """Servis za rad sa avio kompanijama."""
+
+    def _resolve_logo(self, value: Optional[str], airline: Optional[Airline] = None) -> Optional[str]:
+        """
+        Pretvara ulazni logo u vrednost za Airline.logo.
+
+        Eksterni URL se čuva kakav jeste, a base64 slika se upisuje jednom
+        u airline_logos i kompanija dobija samo 'sha256:<hash>' referencu.
+        Ako klijent vrati URL koji je sam dobio od nas, logo ostaje isti.
+
+        Raises:
+            ValueError: ako vrednost nije ni URL ni validna base64 slika
+        """
+        if not value:
+            return None
+        value = value.strip()
+        if airline is not None and airline.logo and '/logo?v=' in value \
+                and f'/api/airlines/{airline.id}/logo' in value:
+            return airline.logo
+        if value.startswith(('http://', 'https://')):
+            return value
+
+        decoded = _decode_inline_logo(value)
+        if decoded is None:
+            raise ValueError('Logo mora biti URL ili base64 slika')
+        content, content_type = decoded
+        digest = hashlib.sha256(content).hexdigest()
+        if not AirlineLogo.query.get(digest):
+            db.session.add(AirlineLogo(
+                hash=digest,
+                content_type=content_type,
+                sadrzaj=content,
+                velicina=len(content)
+            ))
+        return f'{LOGO_HASH_PREFIX}{digest}'
+
+    def get_logo(self, airline_id: int) -> Tuple[Optional[AirlineLogo], Optional[str]]:
+        """
+        Vraća blob logoa za kompaniju.
+
+        Returns:
+            Tuple (AirlineLogo ili None, eksterni URL ili None)
+        """
+        airline = Airline.query.options(load_only(Airline.id, Airline.logo)).get(airline_id)
+        if not airline or not airline.logo:
+            return None, None
+        if airline.logo_hash:
+            return AirlineLogo.query.get(airline.logo_hash), None
+        if airline.logo.startswith(('http://', 'https://')):
+            return None, airline.logo
+        return None, None
+
+    def migrate_inline_logos(self) -> int:
+        """
+        Prebacuje stare base64 logoe iz airlines.logo u airline_logos.
+        Poziva se pri pokretanju servisa. Vrednosti koje nisu base64
+        slika (npr. relativna putanja) ostaju netaknute.
+
+        Returns:
+            Broj migriranih kompanija
+        """
+        legacy = Airline.query.filter(
+            Airline.logo.isnot(None),
+            ~Airline.logo.like(f'{LOGO_HASH_PREFIX}%'),
+            ~Airline.logo.like('http%')
+        ).all()
+        migrated = 0
+        for airline in legacy:
+            try:
+                airline.logo = self._resolve_logo(airline.logo)
+                migrated += 1
+            except ValueError:
+                print(f'[AIRLINE LOGO] Logo kompanije {airline.id} nije base64 slika, ostaje nepromenjen.')
+        if migrated:
+            db.session.commit()
+        return migrated
     
     def create_airline(self, dto: CreateAirlineDTO) -> Tuple[bool, str, Optional[dict]]:
         """
@@ -29,28 +151,49 @@ class AirlineService:
         if existing:
             return False, f'Avio kompanija sa kodom {dto.kod} već postoji', None
         
+        try:
+            logo = self._resolve_logo(dto.logo)
+        except ValueError as e:
+            return False, str(e), None
+        
         airline = Airline(
             naziv=dto.naziv,
             kod=dto.kod,
             drzava=dto.drzava,
-            logo=dto.logo
+            logo=logo
         )
         
         try:
             db.session.add(airline)
             db.session.commit()
+            bump_versions(AIRLINES_SCOPE, FLIGHTS_SCOPE)
+            airline_catalog.invalidate()
             return True, 'Avio kompanija uspešno kreirana', airline.to_dict()
         except Exception as e:
             db.session.rollback()
             return False, f'Greška pri kreiranju: {str(e)}', None
     
-    def get_all_airlines(self) -> List[Airline]:
-        """Vraća sve aktivne avio kompanije."""
-        return Airline.query.filter_by(aktivna=True).all()
+    def get_all_airlines(self) -> List[CatalogAirline]:
+        """
+        Vraća sve aktivne avio kompanije (iz kataloga u memoriji).
+        Katalog se prvo usklađuje sa verzijom u Redis-u, pa lista sadrži i
+        kompaniju upravo kreiranu u drugom procesu ili replici.
+        """
+        airline_catalog.ensure_current()
+        return airline_catalog.all_active()
     
-    def get_airline_by_id(self, airline_id: int) -> Optional[Airline]:
-        """Vraća avio kompaniju po ID-u."""
-        return Airline.query.get(airline_id)
+    def get_airline_by_id(self, airline_id: int) -> Optional[CatalogAirline]:
+        """
+        Vraća avio kompaniju po ID-u (iz kataloga u memoriji).
+        Ako je nema u katalogu, čita se iz baze (katalog ovog procesa
+        možda još nije osvežen posle izmene u drugom procesu).
+        """
+        airline = airline_catalog.get(airline_id)
+        if airline is None:
+            db_airline = Airline.query.get(airline_id)
+            if db_airline is not None:
+                airline = CatalogAirline(db_airline)
+        return airline
     
     def update_airline(self, airline_id: int, data: dict) -> Tuple[bool, str, Optional[dict]]:
         """
@@ -81,10 +224,16 @@ class AirlineService:
         if 'drzava' in data:
             airline.drzava = data['drzava']
         if 'logo' in data:
-            airline.logo = data['logo']
+            try:
+                airline.logo = self._resolve_logo(data['logo'], airline)
+            except ValueError as e:
+                db.session.rollback()
+                return False, str(e), None
         
         try:
             db.session.commit()
+            bump_versions(AIRLINES_SCOPE, FLIGHTS_SCOPE)
+            airline_catalog.invalidate()
             return True, 'Avio kompanija uspešno ažurirana', airline.to_dict()
         except Exception as e:
             db.session.rollback()
@@ -109,6 +258,8 @@ class AirlineService:
         
         try:
             db.session.commit()
+            bump_versions(AIRLINES_SCOPE, FLIGHTS_SCOPE)
+            airline_catalog.invalidate()
             return True, 'Avio kompanija uspešno deaktivirana'
         except Exception as e:
             db.session.rollback()
@@ -5,6 +5,8 @@ from datetime import datetime
 
 from app import db
 from app.models import Ticket, Flight, FlightStatus
+from app.utils.etag import bump_flight, bump_versions, user_tickets_scope
+from app.utils.stats import record_tickets_cancelled
 
 
 
@@ -35,9 +37,12 @@ class BookingService:
             return False, 'Ne možete otkazati rezervaciju za let koji je već počeo'
         
         ticket.otkazana = True
+        record_tickets_cancelled(flight, 1, ticket.cena)
         
         try:
             db.session.commit()
+            bump_versions(user_tickets_scope(user_id))
+            bump_flight(ticket.flight_id)
             return True, 'Rezervacija uspešno otkazana'
         except Exception as e:
             db.session.rollback()
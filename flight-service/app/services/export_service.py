@@ -0,0 +1,85 @@
+# flight-service/app/services/export_service.py
+
+from typing import Tuple, Iterator
+
+from app import db
+from app.models import Flight, FlightStatus, Ticket, FlightRating
+from app.dto import ExportFilterDTO
+
+# Broj redova koje baza šalje odjednom (server-side kursor)
+STREAM_BATCH = 1000
+
+
+class ExportService:
+    """
+    Servis za izvoz sirovih podataka.
+    Upiti biraju samo kolone koje se izvoze, filtri se primenjuju u SQL-u,
+    a redovi se čitaju server-side kursorom (stream_results + yield_per),
+    pa memorija ne zavisi od broja redova.
+    """
+
+    FLIGHT_COLUMNS = ('id', 'naziv', 'airline_id', 'aerodrom_polaska', 'aerodrom_dolaska',
+                      'vreme_polaska', 'trajanje_minuta', 'duzina_km', 'cena_karte',
+                      'ukupno_mesta', 'status', 'kreirao_id', 'kreiran')
+    TICKET_COLUMNS = ('id', 'flight_id', 'user_id', 'cena', 'otkazana', 'kupljena')
+    RATING_COLUMNS = ('id', 'flight_id', 'user_id', 'ocena', 'komentar', 'kreirana')
+
+    @staticmethod
+    def _stream(query) -> Iterator[tuple]:
+        return iter(query.execution_options(stream_results=True).yield_per(STREAM_BATCH))
+
+    @staticmethod
+    def _flight_filters(query, dto: ExportFilterDTO, flight_id_column=None):
+        """
+        Filtri po letu (status, avio kompanija). Za karte i ocene se
+        JOIN sa letovima radi samo ako je neki od ovih filtera zadat.
+        """
+        if dto.status or dto.airline_id:
+            if flight_id_column is not None:
+                query = query.join(Flight, Flight.id == flight_id_column)
+            if dto.status:
+                query = query.filter(Flight.status == FlightStatus[dto.status])
+            if dto.airline_id:
+                query = query.filter(Flight.airline_id == dto.airline_id)
+        return query
+
+    def export_flights(self, dto: ExportFilterDTO) -> Tuple[tuple, Iterator[tuple]]:
+        """
+        Returns:
+            Tuple (kolone, iterator redova)
+        """
+        query = db.session.query(*[getattr(Flight, c) for c in self.FLIGHT_COLUMNS])
+        query = self._flight_filters(query, dto)
+        if dto.datum_od:
+            query = query.filter(Flight.vreme_polaska >= dto.datum_od)
+        if dto.datum_do:
+            query = query.filter(Flight.vreme_polaska <= dto.datum_do)
+        return self.FLIGHT_COLUMNS, self._stream(query.order_by(Flight.id))
+
+    def export_tickets(self, dto: ExportFilterDTO) -> Tuple[tuple, Iterator[tuple]]:
+        """
+        Returns:
+            Tuple (kolone, iterator redova)
+        """
+        query = db.session.query(*[getattr(Ticket, c) for c in self.TICKET_COLUMNS])
+        query = self._flight_filters(query, dto, Ticket.flight_id)
+        if dto.otkazana is not None:
+            query = query.filter(Ticket.otkazana.is_(dto.otkazana))
+        if dto.datum_od:
+            query = query.filter(Ticket.kupljena >= dto.datum_od)
+        if dto.datum_do:
+            query = query.filter(Ticket.kupljena <= dto.datum_do)
+        return self.TICKET_COLUMNS, self._stream(query.order_by(Ticket.id))
+
+    def export_ratings(self, dto: ExportFilterDTO) -> Tuple[tuple, Iterator[tuple]]:
+        """
+        Returns:
+            Tuple (kolone, iterator redova)
+        """
+        query = db.session.query(*[getattr(FlightRating, c) for c in self.RATING_COLUMNS])
+        query = self._flight_filters(query, dto, FlightRating.flight_id)
+        if dto.datum_od:
+            query = query.filter(FlightRating.kreirana >= dto.datum_od)
+        if dto.datum_do:
+            query = query.filter(FlightRating.kreirana <= dto.datum_do)
+        return self.RATING_COLUMNS, self._stream(query.order_by(FlightRating.id))
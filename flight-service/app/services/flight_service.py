@@ -6,7 +6,14 @@ from multiprocessing import Process
 import time
 
 from app import db
-from app.models import Flight, FlightStatus, Airline, Ticket, FlightRating
+from app.models import (
+    Flight, FlightStatus, Airline, Ticket, FlightRating,
+    OutboxEventType, CancellationJob, CancellationJobStatus
+)
+from app.utils.airline_catalog import airline_catalog
+from app.utils.outbox import enqueue_many, enqueue_socket, refund_payload
+from app.utils.etag import bump_flight, bump_versions, flight_scope, RATINGS_SCOPE
+from app.utils.stats import record_tickets_cancelled, record_rating, delete_flight_stats
 from app.dto import (
     CreateFlightDTO, UpdateFlightDTO, ApproveFlightDTO, 
     RejectFlightDTO, CancelFlightDTO, RateFlightDTO, FlightSearchDTO
@@ -41,7 +48,7 @@ class FlightService:
         if errors:
             return False, ', '.join(errors), None
         
-        airline = Airline.query.get(dto.airline_id)
+        airline = airline_catalog.get(dto.airline_id) or Airline.query.get(dto.airline_id)
         if not airline:
             return False, 'Avio kompanija nije pronađena', None
         
@@ -66,6 +73,7 @@ class FlightService:
         try:
             db.session.add(flight)
             db.session.commit()
+            bump_flight(flight.id)
             
             if self.socketio:
                 self.socketio.emit('new_flight_pending', {
@@ -129,6 +137,7 @@ class FlightService:
         
         try:
             db.session.commit()
+            bump_flight(flight.id)
             if self.socketio:
                 self.socketio.emit('flight_updated', {
                     'flight': flight.to_dict()
@@ -158,6 +167,7 @@ class FlightService:
         flight.status = FlightStatus.ODOBREN
         try:
             db.session.commit()
+            bump_flight(flight.id)
             
             # Emituj obavestenje ka menadžeru o odobrenju
             if self.socketio:
@@ -176,29 +186,77 @@ class FlightService:
             return False, str(e), None
 
 
-    def cancel_flight(self, dto: CancelFlightDTO) -> Tuple[bool, str, Optional[dict], List[tuple]]:
-        """Otkazuje let."""
+    def cancel_flight(self, dto: CancelFlightDTO, admin_id: Optional[int] = None) -> Tuple[bool, str, Optional[dict], Optional[dict]]:
+        """
+        Otkazuje let.
+
+        Karte se otkazuju jednim UPDATE-om, iznosi za refund se čitaju
+        projektovanim SELECT-om (bez učitavanja Ticket objekata), a refundi
+        i emailovi se bulk upisuju u outbox. Admin odmah dobija posao
+        otkazivanja čiji se progres prati preko get_cancellation_job.
+
+        Returns:
+            Tuple (success, message, flight_data, job_data)
+        """
         flight = Flight.query.get(dto.flight_id)
         if not flight or flight.status != FlightStatus.ODOBREN:
-            return False, 'Samo odobreni letovi se mogu otkazati', None, []
+            return False, 'Samo odobreni letovi se mogu otkazati', None, None
         
         # PROMENA: Lokalno vreme
         if flight.vreme_polaska < datetime.now():
-            return False, 'Let koji je već počeo se ne može otkazati', None, []
-        
-        flight.status = FlightStatus.OTKAZAN
-        tickets = Ticket.query.filter_by(flight_id=dto.flight_id, otkazana=False).all()
-        refunds = [(t.user_id, float(t.cena)) for t in tickets]
-        for t in tickets: t.otkazana = True
+            return False, 'Let koji je već počeo se ne može otkazati', None, None
         
         try:
+            flight.status = FlightStatus.OTKAZAN
+
+            # FOR UPDATE zaključava karte leta do commit-a, pa UPDATE ispod
+            # pogađa tačno iste redove koje je SELECT vratio
+            active = Ticket.query.filter(
+                Ticket.flight_id == flight.id,
+                Ticket.otkazana.is_(False)
+            )
+            refunds = active.with_entities(Ticket.id, Ticket.user_id, Ticket.cena).with_for_update().all()
+            active.update({Ticket.otkazana: True}, synchronize_session=False)
+            record_tickets_cancelled(flight, len(refunds), sum(cena for _, _, cena in refunds))
+
+            job = CancellationJob(flight_id=flight.id, admin_id=admin_id, ukupno=len(refunds))
+            if not refunds:
+                job.status = CancellationJobStatus.ZAVRSEN
+                job.zavrsen = datetime.now()
+            db.session.add(job)
+            db.session.flush()
+
+            # Sporedni efekti idu u outbox u istoj transakciji kao i otkazivanje.
+            # Ključ refunda je po karti - isti kao kod pojedinačnog otkazivanja,
+            # pa ista karta nikada ne može biti refundirana dvaput.
+            flight_data = flight.to_dict()
+            events = []
+            for ticket_id, user_id, cena in refunds:
+                amount = float(cena)
+                events.append((
+                    OutboxEventType.REFUND,
+                    refund_payload(user_id, amount, f'refund:ticket:{ticket_id}', job.id),
+                    f'refund:ticket:{ticket_id}'
+                ))
+                events.append((OutboxEventType.EMAIL, {
+                    'kind': 'flight_cancelled',
+                    'user_id': user_id,
+                    'amount': amount,
+                    'flight': flight_data,
+                }, f'email:flight_cancelled:ticket:{ticket_id}'))
+            enqueue_many(events)
+            enqueue_socket('flight_cancelled', {'flight': flight_data}, '/flights')
+
             db.session.commit()
-            if self.socketio:
-                self.socketio.emit('flight_cancelled', {'flight': flight.to_dict()}, namespace='/flights')
-            return True, 'Let otkazan', flight.to_dict(), refunds
+            bump_flight(flight.id)
+            return True, 'Let otkazan', flight_data, job.to_dict()
         except Exception as e:
             db.session.rollback()
-            return False, str(e), None, []
+            return False, str(e), None, None
+
+    def get_cancellation_job(self, job_id: int) -> Optional[CancellationJob]:
+        """Vraća posao otkazivanja leta (za praćenje progresa refundiranja)."""
+        return CancellationJob.query.get(job_id)
     
     def reject_flight(self, dto: RejectFlightDTO) -> Tuple[bool, str, Optional[dict]]:
         """
@@ -226,6 +284,7 @@ class FlightService:
         
         try:
             db.session.commit()
+            bump_flight(flight.id)
             
             if self.socketio:
                 self.socketio.emit('flight_rejected', {
@@ -259,7 +318,9 @@ class FlightService:
         
         try:
             db.session.delete(flight)
+            delete_flight_stats(flight_id)
             db.session.commit()
+            bump_flight(flight_id)
             return True, 'Let uspešno obrisan'
         except Exception as e:
             db.session.rollback()
@@ -282,22 +343,30 @@ class FlightService:
         
         return query.order_by(Flight.vreme_polaska).all()
     
-    def get_upcoming_flights(self) -> List[Flight]:
+    def get_upcoming_flights(self, fields: Optional[set] = None) -> List[Flight]:
         """Vraća letove koji još nisu počeli."""
         # PROMENA: Lokalno vreme
         now = datetime.now()
-        return Flight.query.filter(
+        query = Flight.query.filter(
             Flight.status == FlightStatus.ODOBREN,
             Flight.vreme_polaska > now
-        ).order_by(Flight.vreme_polaska).all()
+        )
+        if fields:
+            query = query.options(Flight.load_only_for(fields))
+        return query.order_by(Flight.vreme_polaska).all()
     
-    def get_in_progress_flights(self) -> List[Flight]:
+    def get_in_progress_flights(self, fields: Optional[set] = None) -> List[Flight]:
         """Vraća letove koji su u toku."""
         # PROMENA: Lokalno vreme
         now = datetime.now()
-        flights = Flight.query.filter(
+        query = Flight.query.filter(
             Flight.status.in_([FlightStatus.ODOBREN, FlightStatus.U_TOKU])
-        ).all()
+        )
+        if fields:
+            query = query.options(Flight.load_only_for(
+                fields, extra=('status', 'vreme_polaska', 'trajanje_minuta')
+            ))
+        flights = query.all()
         
         in_progress = []
         for flight in flights:
@@ -305,10 +374,11 @@ class FlightService:
                 if flight.status != FlightStatus.U_TOKU:
                     flight.status = FlightStatus.U_TOKU
                     db.session.commit()
+                    bump_flight(flight.id)
                 in_progress.append(flight)
         return in_progress
     
-    def get_finished_flights(self) -> List[Flight]:
+    def get_finished_flights(self, fields: Optional[set] = None) -> List[Flight]:
         """Vraća završene i ažurira status onih koji su prošli."""
         # PROMENA: Lokalno vreme
         now = datetime.now()
@@ -316,21 +386,30 @@ class FlightService:
             Flight.status.in_([FlightStatus.ODOBREN, FlightStatus.U_TOKU])
         ).all()
         
+        finished_ids = []
         for flight in potential_finished:
             if flight.vreme_dolaska <= now:
                 flight.status = FlightStatus.ZAVRSEN
+                finished_ids.append(flight.id)
         
         db.session.commit()
-        return Flight.query.filter(
+        if finished_ids:
+            bump_versions(*[flight_scope(fid) for fid in finished_ids])
+            bump_flight()
+        query = Flight.query.filter(
             Flight.status.in_([FlightStatus.ZAVRSEN, FlightStatus.OTKAZAN])
-        ).order_by(Flight.vreme_polaska.desc()).all()
+        )
+        if fields:
+            query = query.options(Flight.load_only_for(fields))
+        return query.order_by(Flight.vreme_polaska.desc()).all()
     
-    def search_flights(self, dto: FlightSearchDTO) -> List[Flight]:
+    def search_flights(self, dto: FlightSearchDTO, fields: Optional[set] = None) -> List[Flight]:
         """
         Pretražuje letove.
         
         Args:
             dto: FlightSearchDTO sa kriterijumima pretrage
+            fields: Opcioni skup polja za projekciju kolona
             
         Returns:
             Lista letova
@@ -349,19 +428,23 @@ class FlightService:
         if dto.datum_do:
             query = query.filter(Flight.vreme_polaska <= dto.datum_do)
         
+        if fields:
+            query = query.options(Flight.load_only_for(fields))
         return query.order_by(Flight.vreme_polaska).all()
     
-    def get_pending_flights(self) -> List[Flight]:
+    def get_pending_flights(self, fields: Optional[set] = None) -> List[Flight]:
         """Vraća letove koji čekaju odobrenje."""
-        return Flight.query.filter_by(status=FlightStatus.CEKA_ODOBRENJE).all()
+        query = Flight.query.filter_by(status=FlightStatus.CEKA_ODOBRENJE)
+        if fields:
+            query = query.options(Flight.load_only_for(fields))
+        return query.all()
 
-    def get_flights_by_creator(self, creator_id: int) -> List[Flight]:
+    def get_flights_by_creator(self, creator_id: int, fields: Optional[set] = None) -> List[Flight]:
         """Vraća letove koje je kreirao dati menadžer."""
-        return (
-            Flight.query.filter_by(kreirao_id=creator_id)
-            .order_by(Flight.vreme_polaska.desc())
-            .all()
-        )
+        query = Flight.query.filter_by(kreirao_id=creator_id)
+        if fields:
+            query = query.options(Flight.load_only_for(fields))
+        return query.order_by(Flight.vreme_polaska.desc()).all()
     
     def rate_flight(self, dto: RateFlightDTO, user_id: int) -> Tuple[bool, str, Optional[dict]]:
         """
@@ -413,7 +496,10 @@ class FlightService:
         
         try:
             db.session.add(rating)
+            record_rating(dto.flight_id, dto.ocena)
             db.session.commit()
+            bump_versions(RATINGS_SCOPE)
+            bump_flight(dto.flight_id)
             return True, 'Ocena uspešno sačuvana', rating.to_dict()
         except Exception as e:
             db.session.rollback()
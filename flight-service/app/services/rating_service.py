@@ -3,7 +3,14 @@
 from typing import Tuple, Optional, List
 
 from app import db
-from app.models import FlightRating, Flight, Ticket, FlightStatus
+from app.models import FlightRating, Flight, Ticket, FlightStatus, FlightStats
+from app.utils.etag import bump_flight, bump_versions, RATINGS_SCOPE
+from app.utils.stats import record_rating
+from app.utils.flight_batch import serialize_flights
+
+# Veličina strane listinga ocena
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 
@@ -46,7 +53,10 @@ class RatingService:
         
         try:
             db.session.add(rating)
+            record_rating(flight_id, ocena)
             db.session.commit()
+            bump_versions(RATINGS_SCOPE)
+            bump_flight(flight_id)
             return True, 'Ocena uspešno sačuvana', rating.to_dict()
         except Exception as e:
             db.session.rollback()
@@ -60,9 +70,49 @@ class RatingService:
     
     def get_all_ratings(self) -> List[FlightRating]:
         return FlightRating.query.all()
+
+    def list_ratings(self, flight_id: Optional[int] = None, airline_id: Optional[int] = None,
+                     ocena: Optional[int] = None, cursor: Optional[int] = None,
+                     limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[dict], dict, Optional[int]]:
+        """
+        Strana ocena za admin listing (od najnovije).
+
+        Ocene sadrže samo flight_id; letovi sa strane se vraćaju jednom,
+        u posebnoj mapi, serijalizovani zajedno (serialize_flights).
+        Paginacija je po kursoru (id < cursor), pa je svaka strana jedan
+        opseg po primarnom ključu bez OFFSET-a. Filtri po letu, avio
+        kompaniji i oceni koriste indekse.
+
+        Returns:
+            Tuple (ocene, {flight_id: let}, sledeci_kursor)
+        """
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        query = FlightRating.query
+        if flight_id is not None:
+            query = query.filter(FlightRating.flight_id == flight_id)
+        if airline_id is not None:
+            query = query.join(Flight, Flight.id == FlightRating.flight_id) \
+                .filter(Flight.airline_id == airline_id)
+        if ocena is not None:
+            query = query.filter(FlightRating.ocena == ocena)
+        if cursor is not None:
+            query = query.filter(FlightRating.id < cursor)
+
+        # Jedan red više od limita govori da postoji sledeća strana
+        ratings = query.order_by(FlightRating.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(ratings) > limit:
+            ratings = ratings[:limit]
+            next_cursor = ratings[-1].id
+
+        flight_ids = {r.flight_id for r in ratings}
+        flights = []
+        if flight_ids:
+            flights = Flight.query.filter(Flight.id.in_(flight_ids)).all()
+
+        return [r.to_dict() for r in ratings], serialize_flights(flights), next_cursor
     
     def get_average_rating(self, flight_id: int) -> Optional[float]:
-        ratings = FlightRating.query.filter_by(flight_id=flight_id).all()
-        if not ratings:
-            return None
-        return sum(r.ocena for r in ratings) / len(ratings)
\ No newline at end of file
+        # Iz sažete statistike leta - bez učitavanja ocena
+        stats = FlightStats.query.get(flight_id)
+        return stats.prosecna_ocena if stats else None
\ No newline at end of file
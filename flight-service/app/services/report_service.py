@@ -0,0 +1,93 @@
+# flight-service/app/services/report_service.py
+
+import os
+from datetime import datetime, timedelta
+from typing import Tuple, Optional
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app import db
+from app.models import ReportJob, ReportJobStatus, ReportRecipient
+
+REPORT_TYPES = {'upcoming', 'in_progress', 'finished'}
+# Isti tip izvještaja zatražen u ovom prozoru vraća postojeći posao
+DEDUP_WINDOW_SECONDS = int(os.getenv('REPORT_DEDUP_SECONDS', '300'))
+
+
+class ReportService:
+    """Servis za poslove generisanja PDF izvještaja."""
+
+    def request_report(self, report_type: str, admin_id: int, admin_email: str,
+                       admin_name: str, send_email: bool = True) -> Tuple[bool, str, Optional[dict]]:
+        """
+        Kreira posao generisanja izvještaja ili vraća postojeći.
+
+        Ako je isti tip izvještaja već zatražen u poslednjih
+        DEDUP_WINDOW_SECONDS (i nije neuspešan), vraća se taj posao,
+        pa više zahteva deli isti fajl. Svaki podnosilac se beleži kao
+        primalac posla i dobija svoj email (i kada je fajl već gotov).
+
+        Returns:
+            Tuple (success, message, job_data)
+        """
+        if report_type not in REPORT_TYPES:
+            return False, 'Nepoznat tip izvestaja', None
+
+        since = datetime.now() - timedelta(seconds=DEDUP_WINDOW_SECONDS)
+        existing = ReportJob.query.filter(
+            ReportJob.report_type == report_type,
+            ReportJob.status != ReportJobStatus.NEUSPESAN,
+            ReportJob.kreiran >= since
+        ).order_by(ReportJob.id.desc()).first()
+        send_email = send_email and bool(admin_email)
+        if existing:
+            if send_email:
+                self._add_recipient(existing.id, admin_id, admin_email, admin_name)
+                db.session.commit()
+            return True, 'Izvestaj je vec zatrazen', existing.to_dict()
+
+        job = ReportJob(
+            report_type=report_type,
+            admin_id=admin_id,
+            admin_email=admin_email,
+            admin_name=admin_name,
+            posalji_email=send_email,
+        )
+        db.session.add(job)
+        db.session.flush()
+        if send_email:
+            self._add_recipient(job.id, admin_id, admin_email, admin_name)
+        db.session.commit()
+        return True, 'Izvestaj se generise', job.to_dict()
+
+    @staticmethod
+    def _add_recipient(job_id: int, admin_id: int, email: str, name: str) -> None:
+        """
+        Dodaje primaoca posla (bez commit-a). Isti admin koji ponovi zahtev
+        ostaje jedan primalac (INSERT ... ON DUPLICATE KEY UPDATE).
+        """
+        stmt = mysql_insert(ReportRecipient.__table__).values(
+            job_id=job_id, admin_id=admin_id, email=email, ime=name,
+            pokusaja=0, sledeci_pokusaj=datetime.now(), kreiran=datetime.now()
+        )
+        db.session.execute(stmt.on_duplicate_key_update(ime=stmt.inserted.ime))
+
+    def get_job(self, job_id: int) -> Optional[ReportJob]:
+        """Vraća posao generisanja izvještaja."""
+        return ReportJob.query.get(job_id)
+
+    def get_artifact(self, job_id: int) -> Tuple[bool, str, Optional[ReportJob]]:
+        """
+        Vraća završen posao čiji fajl postoji u skladištu.
+
+        Returns:
+            Tuple (success, message, job)
+        """
+        job = ReportJob.query.get(job_id)
+        if not job:
+            return False, 'Izvestaj nije pronadjen', None
+        if job.status != ReportJobStatus.ZAVRSEN:
+            return False, 'Izvestaj jos nije spreman', job
+        if not job.putanja or not os.path.isfile(job.putanja):
+            return False, 'Fajl izvestaja vise nije dostupan', job
+        return True, 'OK', job
@@ -0,0 +1,308 @@
+# flight-service/app/services/stats_service.py
+
+from datetime import datetime, timedelta
+from typing import Optional, List, Tuple
+
+from sqlalchemy import func, case, text
+
+from app import db
+from app.models import Flight, FlightStatus, Airline, Ticket, FlightRating, FlightStats, FlightSalesHourly
+
+# Statusi letova koji ulaze u popunjenost (let je bio u prodaji)
+_SOLD_STATUSES = (FlightStatus.ODOBREN, FlightStatus.U_TOKU, FlightStatus.ZAVRSEN)
+_RATING_COLUMNS = [getattr(FlightStats, f'ocena_{k}') for k in range(1, 6)]
+# Najduži period vremenske serije prodaje (broj satnih bucket-a)
+MAX_SERIES_HOURS = 24 * 92
+# Tabele koje rebuild čita i piše. Dok traje rebuild, kupovine, otkazivanja
+# i ocene čekaju na zaključane tabele, pa nijedna izmena ne može da se
+# upiše između čitanja agregata i zamene flight_stats.
+_REBUILD_LOCKS = ('LOCK TABLES flight_stats WRITE, flight_sales_hourly WRITE, '
+                  'tickets READ, flight_ratings READ, flights READ')
+
+
+class StatsService:
+    """
+    Statistika za dashboard administratora i menadžera.
+    Sve se računa GROUP BY upitima nad letovima i sažetom tabelom
+    flight_stats (jedan red po letu), nikad nad istorijom karata i ocena.
+
+    manager_id ograničava rezultate na letove tog menadžera.
+    """
+
+    @staticmethod
+    def _scoped(query, manager_id: Optional[int]):
+        if manager_id is not None:
+            query = query.filter(Flight.kreirao_id == manager_id)
+        return query
+
+    def status_counts(self, manager_id: Optional[int] = None) -> dict:
+        """Broj letova po statusu."""
+        query = self._scoped(
+            db.session.query(Flight.status, func.count(Flight.id)), manager_id
+        ).group_by(Flight.status)
+        counts = {status.value: 0 for status in FlightStatus}
+        counts.update({status.value: count for status, count in query})
+        return counts
+
+    def revenue(self, group_by: str = 'flight', manager_id: Optional[int] = None,
+                limit: int = 100) -> List[dict]:
+        """
+        Prihod i broj prodatih karata grupisano po letu, avio kompaniji
+        ili menadžeru (kreirao_id), od najvećeg prihoda.
+        """
+        prihod = func.coalesce(func.sum(FlightStats.prihod), 0)
+        prodato = func.coalesce(func.sum(FlightStats.prodato), 0)
+
+        if group_by == 'airline':
+            keys = (Airline.id, Airline.naziv)
+        elif group_by == 'manager':
+            keys = (Flight.kreirao_id,)
+        else:
+            keys = (Flight.id, Flight.naziv)
+
+        query = db.session.query(*keys, prihod.label('prihod'), prodato.label('prodato')) \
+            .select_from(FlightStats).join(Flight, Flight.id == FlightStats.flight_id)
+        if group_by == 'airline':
+            query = query.join(Airline, Airline.id == Flight.airline_id)
+        query = self._scoped(query, manager_id).group_by(*keys).order_by(prihod.desc()).limit(limit)
+
+        result = []
+        for row in query:
+            if group_by == 'airline':
+                item = {'airline_id': row[0], 'naziv': row[1]}
+            elif group_by == 'manager':
+                item = {'manager_id': row[0]}
+            else:
+                item = {'flight_id': row[0], 'naziv': row[1]}
+            item.update({'prihod': float(row.prihod), 'prodato': int(row.prodato)})
+            result.append(item)
+        return result
+
+    def load_factor(self, manager_id: Optional[int] = None, limit: int = 100) -> dict:
+        """
+        Popunjenost: ukupna (prodato / ukupno mesta) i po letu.
+        Letovi bez prodatih karata nemaju red u flight_stats i ulaze sa 0.
+        """
+        prodato = func.coalesce(FlightStats.prodato, 0)
+        base = self._scoped(
+            db.session.query(Flight).outerjoin(FlightStats, FlightStats.flight_id == Flight.id)
+            .filter(Flight.status.in_(_SOLD_STATUSES)), manager_id
+        )
+
+        total_sold, total_seats = base.with_entities(
+            func.coalesce(func.sum(prodato), 0), func.coalesce(func.sum(Flight.ukupno_mesta), 0)
+        ).one()
+
+        factor = (prodato * 1.0 / Flight.ukupno_mesta)
+        rows = base.with_entities(
+            Flight.id, Flight.naziv, prodato.label('prodato'), Flight.ukupno_mesta,
+            case((Flight.ukupno_mesta > 0, factor), else_=0).label('popunjenost')
+        ).order_by(Flight.vreme_polaska.desc()).limit(limit)
+
+        return {
+            'ukupno_prodato': int(total_sold),
+            'ukupno_mesta': int(total_seats),
+            'popunjenost': round(float(total_sold) / float(total_seats), 4) if total_seats else 0.0,
+            'letovi': [{
+                'flight_id': r.id,
+                'naziv': r.naziv,
+                'prodato': int(r.prodato),
+                'ukupno_mesta': r.ukupno_mesta,
+                'popunjenost': round(float(r.popunjenost or 0), 4),
+            } for r in rows],
+        }
+
+    def rating_distribution(self, flight_id: Optional[int] = None, airline_id: Optional[int] = None,
+                            manager_id: Optional[int] = None) -> dict:
+        """Raspodela ocena 1-5 i prosečna ocena (iz flight_stats)."""
+        query = db.session.query(
+            func.coalesce(func.sum(FlightStats.broj_ocena), 0),
+            func.coalesce(func.sum(FlightStats.zbir_ocena), 0),
+            *[func.coalesce(func.sum(c), 0) for c in _RATING_COLUMNS]
+        )
+        if flight_id is not None or airline_id is not None or manager_id is not None:
+            query = query.join(Flight, Flight.id == FlightStats.flight_id)
+        if flight_id is not None:
+            query = query.filter(FlightStats.flight_id == flight_id)
+        if airline_id is not None:
+            query = query.filter(Flight.airline_id == airline_id)
+        query = self._scoped(query, manager_id)
+
+        broj, zbir, *raspodela = query.one()
+        return {
+            'broj_ocena': int(broj),
+            'prosecna_ocena': round(float(zbir) / float(broj), 2) if broj else None,
+            'raspodela': {str(k): int(v) for k, v in zip(range(1, 6), raspodela)},
+        }
+
+    def sales_series(self, flight_id: Optional[int] = None, airline_id: Optional[int] = None,
+                     od: Optional[datetime] = None, do: Optional[datetime] = None,
+                     manager_id: Optional[int] = None) -> Tuple[bool, str, Optional[dict]]:
+        """
+        Satna vremenska serija prodaje za let ili avio kompaniju.
+        Čita se samo opseg bucket-a iz flight_sales_hourly (indeks po
+        letu/kompaniji i satu), bez skeniranja karata. Sati bez prodaje
+        se vraćaju sa nulama, pa je serija spremna za grafik.
+
+        Returns:
+            Tuple (success, message, data)
+        """
+        do = (do or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        od = (od or do - timedelta(days=7)).replace(minute=0, second=0, microsecond=0)
+        if od > do:
+            return False, 'Datum od mora biti pre datuma do', None
+        if (do - od) > timedelta(hours=MAX_SERIES_HOURS):
+            return False, f'Period moze biti najvise {MAX_SERIES_HOURS // 24} dana', None
+
+        query = db.session.query(
+            FlightSalesHourly.sat,
+            func.sum(FlightSalesHourly.prodato),
+            func.sum(FlightSalesHourly.otkazano),
+            func.sum(FlightSalesHourly.prihod),
+        ).filter(FlightSalesHourly.sat >= od, FlightSalesHourly.sat <= do)
+
+        if flight_id is not None:
+            flight = Flight.query.get(flight_id)
+            if not flight:
+                return False, 'Let nije pronađen', None
+            if manager_id is not None and flight.kreirao_id != manager_id:
+                return False, 'Pristup odbijen', None
+            query = query.filter(FlightSalesHourly.flight_id == flight_id)
+        else:
+            query = query.filter(FlightSalesHourly.airline_id == airline_id)
+            if manager_id is not None:
+                query = query.join(Flight, Flight.id == FlightSalesHourly.flight_id) \
+                    .filter(Flight.kreirao_id == manager_id)
+
+        buckets = {sat: (prodato, otkazano, prihod) for sat, prodato, otkazano, prihod
+                   in query.group_by(FlightSalesHourly.sat)}
+
+        series = []
+        sat = od
+        while sat <= do:
+            prodato, otkazano, prihod = buckets.get(sat, (0, 0, 0))
+            series.append({
+                'sat': sat.isoformat(),
+                'prodato': int(prodato or 0),
+                'otkazano': int(otkazano or 0),
+                'prihod': float(prihod or 0),
+            })
+            sat += timedelta(hours=1)
+
+        return True, 'OK', {
+            'flight_id': flight_id,
+            'airline_id': airline_id,
+            'od': od.isoformat(),
+            'do': do.isoformat(),
+            'serija': series,
+        }
+
+    def rebuild(self) -> int:
+        """
+        Ponovo računa flight_stats (i flight_sales_hourly) iz karata i ocena.
+        Koristi se za inicijalno punjenje i posle ručnih izmena u bazi;
+        normalno se tabela ažurira inkrementalno.
+
+        Ceo rebuild radi pod LOCK TABLES na jednoj konekciji: izmene koje
+        su commit-ovane pre zaključavanja ulaze u agregate, a kasnije čekaju
+        kraj rebuild-a i primenjuju se inkrementalno na nove redove.
+
+        Returns:
+            Broj letova sa statistikom
+        """
+        # LOCK TABLES implicitno commit-uje, pa sesija mora da bude čista
+        db.session.commit()
+        db.session.execute(text(_REBUILD_LOCKS))
+        try:
+            count = self._rebuild_locked()
+            db.session.execute(text('COMMIT'))
+        except Exception:
+            db.session.execute(text('ROLLBACK'))
+            raise
+        finally:
+            # Otključavanje pre nego što sesija vrati konekciju u pool
+            db.session.execute(text('UNLOCK TABLES'))
+            db.session.commit()
+        return count
+
+    def backfill_if_empty(self) -> int:
+        """
+        Inicijalno punjenje statistike ako je flight_stats prazna, a karte
+        ili ocene postoje. Jednokratni korak pri pokretanju web procesa.
+
+        Returns:
+            Broj letova sa statistikom (0 ako punjenje nije bilo potrebno)
+        """
+        if FlightStats.query.first() is not None:
+            return 0
+        if not (Ticket.query.first() or FlightRating.query.first()):
+            return 0
+        return self.rebuild()
+
+    def _rebuild_locked(self) -> int:
+        """Računa agregate i zamenjuje statistiku (tabele su zaključane)."""
+        rows = {}
+
+        def row(flight_id):
+            return rows.setdefault(flight_id, {
+                'flight_id': flight_id, 'prodato': 0, 'otkazano': 0, 'prihod': 0,
+                'broj_ocena': 0, 'zbir_ocena': 0,
+                **{f'ocena_{k}': 0 for k in range(1, 6)},
+            })
+
+        tickets = db.session.query(
+            Ticket.flight_id,
+            func.sum(case((Ticket.otkazana.is_(False), 1), else_=0)),
+            func.sum(case((Ticket.otkazana.is_(True), 1), else_=0)),
+            func.coalesce(func.sum(case((Ticket.otkazana.is_(False), Ticket.cena), else_=0)), 0),
+        ).group_by(Ticket.flight_id)
+        for flight_id, prodato, otkazano, prihod in tickets:
+            r = row(flight_id)
+            r.update(prodato=int(prodato or 0), otkazano=int(otkazano or 0), prihod=prihod)
+
+        ratings = db.session.query(
+            FlightRating.flight_id,
+            func.count(FlightRating.id),
+            func.sum(FlightRating.ocena),
+            *[func.sum(case((FlightRating.ocena == k, 1), else_=0)) for k in range(1, 6)]
+        ).group_by(FlightRating.flight_id)
+        for flight_id, broj, zbir, *raspodela in ratings:
+            r = row(flight_id)
+            r.update(broj_ocena=int(broj), zbir_ocena=int(zbir or 0))
+            r.update({f'ocena_{k}': int(v or 0) for k, v in zip(range(1, 6), raspodela)})
+
+        FlightStats.query.delete(synchronize_session=False)
+        if rows:
+            db.session.execute(FlightStats.__table__.insert(), list(rows.values()))
+        self._rebuild_hourly()
+        return len(rows)
+
+    def _rebuild_hourly(self) -> None:
+        """
+        Ponovo puni flight_sales_hourly iz aktivnih karata po satu kupovine.
+        Vreme otkazivanja se ne čuva uz kartu, pa otkazane karte ne ulaze
+        u rekonstruisanu seriju (neto kriva je tačna).
+        """
+        sat = func.date_format(Ticket.kupljena, '%Y-%m-%d %H:00:00')
+        hourly = db.session.query(
+            Ticket.flight_id, Flight.airline_id, sat, func.count(Ticket.id), func.sum(Ticket.cena)
+        ).join(Flight, Flight.id == Ticket.flight_id).filter(
+            Ticket.otkazana.is_(False)
+        ).group_by(Ticket.flight_id, Flight.airline_id, sat)
+
+        FlightSalesHourly.query.delete(synchronize_session=False)
+        batch = []
+        for flight_id, airline_id, bucket, prodato, prihod in hourly:
+            batch.append({
+                'flight_id': flight_id,
+                'airline_id': airline_id,
+                'sat': datetime.strptime(bucket, '%Y-%m-%d %H:%M:%S'),
+                'prodato': int(prodato),
+                'otkazano': 0,
+                'prihod': prihod or 0,
+            })
+            if len(batch) >= 1000:
+                db.session.execute(FlightSalesHourly.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(FlightSalesHourly.__table__.insert(), batch)
@@ -4,13 +4,25 @@ from datetime import datetime
 from typing import Tuple, Optional, List
 from multiprocessing import Process
 import time
+import uuid
 import requests
 import os
+import json
 
+from flask import request, has_request_context
+from sqlalchemy.orm import joinedload
 
 from app import db
 from app.models import Flight, FlightStatus, Ticket
 from app.dto import BuyTicketDTO
+from app.utils.etag import bump_flight, bump_versions, user_tickets_scope, versioned_key, FLIGHTS_SCOPE
+from app.utils.redis_client import get_redis
+from app.utils.flight_batch import serialize_flights
+from app.utils.outbox import enqueue_refund
+from app.utils.stats import record_ticket_sold, record_tickets_cancelled
+
+# Koliko dugo se čuva keširan novčanik (verzija ključa se menja pri izmeni)
+WALLET_CACHE_SECONDS = int(os.getenv('WALLET_CACHE_SECONDS', '300'))
 
 
 class TicketService:
@@ -71,13 +83,14 @@ class TicketService:
         # Pokreni asinhronu obradu kupovine
         process = Process(
             target=self._process_purchase,
-            args=(dto.flight_id, user_id, float(flight.cena_karte))
+            args=(dto.flight_id, user_id, float(flight.cena_karte), f'purchase:{uuid.uuid4().hex}')
         )
         process.start()
         
         return True, 'Kupovina karte je u toku. Dobićete obaveštenje kada bude završena.'
     
-    def _process_purchase(self, flight_id: int, user_id: int, price: float):
+    def _process_purchase(self, flight_id: int, user_id: int, price: float,
+                          idempotency_key: Optional[str] = None):
         """
         Interna funkcija za obradu kupovine u zasebnom procesu.
         Simulira duže vreme obrade sa sleep.
@@ -86,6 +99,7 @@ class TicketService:
             flight_id: ID leta
             user_id: ID korisnika
             price: Cena karte
+            idempotency_key: Ključ kupovine za skidanje sredstava
         """
         from app import create_app, db, socketio as app_socketio
 
@@ -112,7 +126,7 @@ class TicketService:
                     return
 
                 # Skidanje novca sa računa korisnika (poziv Server API)
-                deduct_success = self._deduct_user_balance(user_id, price)
+                deduct_success = self._deduct_user_balance(user_id, price, idempotency_key)
                 if not deduct_success:
                     app_socketio.emit('purchase_failed', {
                         'user_id': user_id,
@@ -127,7 +141,10 @@ class TicketService:
                     cena=price
                 )
                 db.session.add(ticket)
+                record_ticket_sold(flight, price)
                 db.session.commit()
+                bump_versions(user_tickets_scope(user_id))
+                bump_flight(flight_id)
 
                 # Notifikacija o uspešnoj kupovini
                 app_socketio.emit('purchase_success', {
@@ -150,43 +167,112 @@ class TicketService:
                 except Exception:
                     pass
     
-    def _deduct_user_balance(self, user_id: int, amount: float) -> bool:
+    def _deduct_user_balance(self, user_id: int, amount: float,
+                             idempotency_key: Optional[str] = None) -> bool:
         """
         Poziva Server API za skidanje sredstava sa računa.
+        Server primenjuje isti idempotency_key samo jednom, pa se poziv
+        bezbedno ponavlja ako konekcija pukne.
         
         Args:
             user_id: ID korisnika
             amount: Iznos
+            idempotency_key: Ključ kupovine
             
         Returns:
             True ako je uspešno, False inače
         """
-        try:
-            # Interno korišćenje - može se koristiti direktan API poziv ili interni mehanizam
-            # Za jednostavnost, ovo simulira uspešnu transakciju
-            # U produkciji bi se koristio HTTP poziv ka Server servisu
-            response = requests.post(
-                f'{self.server_url}/api/internal/deduct-balance',
-                json={'user_id': user_id, 'amount': amount},
-                headers={'X-Internal-Key': os.getenv('INTERNAL_API_KEY', 'internal-secret')}
-            )
-            return response.status_code == 200
-        except Exception as e:
-            print(f"[TICKET] Greška pri skidanju sredstava: {str(e)}")
-            return False
+        for attempt in range(2):
+            try:
+                response = requests.post(
+                    f'{self.server_url}/api/internal/deduct-balance',
+                    json={'user_id': user_id, 'amount': amount, 'idempotency_key': idempotency_key},
+                    headers={'X-Internal-Key': os.getenv('INTERNAL_API_KEY', 'internal-secret')}
+                )
+                return response.status_code == 200
+            except Exception as e:
+                print(f"[TICKET] Greška pri skidanju sredstava (pokušaj {attempt + 1}): {str(e)}")
+        return False
     
-    def get_user_tickets(self, user_id: int) -> List[Ticket]:
+    def get_user_tickets(self, user_id: int, fields: Optional[set] = None) -> List[Ticket]:
         """
         Vraća sve karte korisnika.
         
         Args:
             user_id: ID korisnika
+            fields: Opcioni skup polja za projekciju kolona
             
         Returns:
             Lista karata
         """
-        return Ticket.query.filter_by(user_id=user_id).all()
+        query = Ticket.query.filter_by(user_id=user_id)
+        if fields:
+            query = query.options(Ticket.load_only_for(fields))
+        return query.all()
     
+    def get_wallet(self, user_id: int, fields: Optional[set] = None) -> List[dict]:
+        """
+        Karte korisnika sa ugnježđenim letom i avio kompanijom (read model
+        za /api/tickets/my).
+
+        Karte i letovi se čitaju jednim JOIN upitom (kompanije iz kataloga), a slobodna
+        mesta i prosečne ocene jednim upitom nad flight_stats za sve letove
+        odjednom - broj upita ne zavisi od broja karata. Gotov rezultat se
+        kešira u Redis-u pod ključem koji sadrži verzije opsega karata
+        korisnika i letova, pa kupovina/otkazivanje (bump_versions)
+        automatski invalidira keš.
+
+        Args:
+            user_id: ID korisnika
+            fields: Opcioni skup polja (kao kod Ticket.to_dict)
+
+        Returns:
+            Lista rečnika karata
+        """
+        fields_key = ','.join(sorted(fields)) if fields else '*'
+        host = request.host if has_request_context() else ''
+        cache_key = versioned_key(f'wallet:{user_id}', [user_tickets_scope(user_id), FLIGHTS_SCOPE],
+                                  fields_key, host)
+        if cache_key:
+            try:
+                cached = get_redis().get(cache_key)
+                if cached is not None:
+                    return json.loads(cached)
+            except Exception as e:
+                print(f'[TICKET] Keš novčanika nije dostupan: {str(e)}')
+
+        wallet = self._load_wallet(user_id, fields)
+
+        if cache_key:
+            try:
+                get_redis().set(cache_key, json.dumps(wallet), ex=WALLET_CACHE_SECONDS)
+            except Exception as e:
+                print(f'[TICKET] Greška pri upisu keša novčanika: {str(e)}')
+        return wallet
+
+    def _load_wallet(self, user_id: int, fields: Optional[set]) -> List[dict]:
+        flight_fields = None
+        include_flight = True
+        if fields is not None:
+            flight_fields = {f[4:] for f in fields if f.startswith('let.')} or None
+            include_flight = 'let' in fields or flight_fields is not None
+
+        query = Ticket.query.filter_by(user_id=user_id).order_by(Ticket.kupljena.desc())
+        if include_flight:
+            query = query.options(joinedload(Ticket.let))
+        tickets = query.all()
+        if not include_flight:
+            return [t.to_dict(include_flight=False, fields=fields) for t in tickets]
+
+        flights = serialize_flights((t.let for t in tickets), flight_fields)
+        result = []
+        for ticket in tickets:
+            data = ticket.to_dict(include_flight=False, fields=fields)
+            if ticket.flight_id in flights:
+                data['let'] = flights[ticket.flight_id]
+            result.append(data)
+        return result
+
     def get_ticket_by_id(self, ticket_id: int) -> Optional[Ticket]:
         """
         Vraća kartu po ID-u.
@@ -225,20 +311,15 @@ class TicketService:
             return False, 'Ne možete otkazati kartu za let koji je već počeo'
         
         ticket.otkazana = True
+        # Refund ide u outbox u istoj transakciji; dispečer ga izvršava posle commit-a
+        enqueue_refund(user_id, float(ticket.cena), f'refund:ticket:{ticket.id}')
+        record_tickets_cancelled(flight, 1, ticket.cena)
         
-        # Vraćanje novca
         try:
-            response = requests.post(
-                f'{self.server_url}/api/internal/refund-balance',
-                json={'user_id': user_id, 'amount': float(ticket.cena)},
-                headers={'X-Internal-Key': os.getenv('INTERNAL_API_KEY', 'internal-secret')}
-            )
-            if response.status_code != 200:
-                db.session.rollback()
-                return False, 'Greška pri vraćanju sredstava'
+            db.session.commit()
         except Exception as e:
             db.session.rollback()
-            return False, f'Greška pri vraćanju sredstava: {str(e)}'
-        
-        db.session.commit()
-        return True, 'Karta uspešno otkazana, sredstva su vraćena na račun'
+            return False, f'Greška pri otkazivanju karte: {str(e)}'
+        bump_versions(user_tickets_scope(user_id))
+        bump_flight(ticket.flight_id)
+        return True, 'Karta uspešno otkazana, sredstva će biti vraćena na račun'
@@ -4,12 +4,15 @@ import time
 from multiprocessing import Process
 import requests
 import os
+import uuid
 
 from app import create_app, db
 from app.models import Ticket, Flight, FlightStatus
+from app.utils.stats import record_ticket_sold
 
 
-def process_booking_async(flight_id: int, user_id: int, price: float, server_url: str):
+def process_booking_async(flight_id: int, user_id: int, price: float, server_url: str,
+                          idempotency_key: str = None):
     app = create_app()
     with app.app_context():
         try:
@@ -25,7 +28,7 @@ def process_booking_async(flight_id: int, user_id: int, price: float, server_url
                 _notify_booking_failed(user_id, 'Nema više slobodnih mesta', server_url)
                 return
             
-            deduct_success = _deduct_user_balance(user_id, price, server_url)
+            deduct_success = _deduct_user_balance(user_id, price, server_url, idempotency_key)
             if not deduct_success:
                 _notify_booking_failed(user_id, 'Greška pri transakciji', server_url)
                 return
@@ -37,6 +40,7 @@ def process_booking_async(flight_id: int, user_id: int, price: float, server_url
                 cena=price
             )
             db.session.add(ticket)
+            record_ticket_sold(flight, price)
             db.session.commit()
             
             #notifikacija o uspjesnoj kupovini
@@ -48,11 +52,11 @@ def process_booking_async(flight_id: int, user_id: int, price: float, server_url
             _notify_booking_failed(user_id, f'Greška: {str(e)}', server_url)
 
 
-def _deduct_user_balance(user_id: int, amount: float, server_url: str) -> bool:
+def _deduct_user_balance(user_id: int, amount: float, server_url: str, idempotency_key: str = None) -> bool:
     try:
         response = requests.post(
             f'{server_url}/api/internal/deduct-balance',
-            json={'user_id': user_id, 'amount': amount},
+            json={'user_id': user_id, 'amount': amount, 'idempotency_key': idempotency_key},
             headers={'X-Internal-Key': os.getenv('INTERNAL_API_KEY', 'internal-secret')}
         )
         return response.status_code == 200
@@ -96,7 +100,7 @@ def _notify_booking_failed(user_id: int, reason: str, server_url: str):
 def start_booking_process(flight_id: int, user_id: int, price: float, server_url: str) -> Process:
     process = Process(
         target=process_booking_async,
-        args=(flight_id, user_id, price, server_url)
+        args=(flight_id, user_id, price, server_url, f'purchase:{uuid.uuid4().hex}')
     )
     process.start()
     return process
\ No newline at end of file
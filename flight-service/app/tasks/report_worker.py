@@ -0,0 +1,222 @@
+# flight-service/app/tasks/report_worker.py
+
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Process
+
+# Lokalno skladište gotovih izvještaja
+STORAGE_DIR = os.getenv('REPORT_STORAGE_DIR', os.path.join(tempfile.gettempdir(), 'flight_reports'))
+WORKERS = int(os.getenv('REPORT_WORKERS', '2'))
+POLL_INTERVAL = float(os.getenv('REPORT_POLL_SECONDS', '2'))
+MAX_ATTEMPTS = int(os.getenv('REPORT_MAX_ATTEMPTS', '3'))
+# Posao koji je U_TOKU duže od ovoga smatra se napuštenim (radnik je pao)
+STALE_SECONDS = int(os.getenv('REPORT_STALE_SECONDS', '900'))
+# Veći fajlovi se ne šalju kao prilog, samo obaveštenje za preuzimanje
+EMAIL_MAX_BYTES = int(os.getenv('REPORT_EMAIL_MAX_BYTES', str(10 * 1024 * 1024)))
+RETENTION_HOURS = int(os.getenv('REPORT_RETENTION_HOURS', '24'))
+# Slanje emailova primaocima gotovih izvještaja
+EMAIL_BATCH_SIZE = 10
+EMAIL_LEASE_SECONDS = 300
+EMAIL_RETRY_SECONDS = 60
+
+
+def start_report_workers(count: int = WORKERS) -> list:
+    """
+    Pokreće ograničen pool procesa koji generišu izvještaje.
+    Renderovanje PDF-a je CPU posao, pa se radi van web procesa; broj
+    istovremenih izvještaja je najviše count, bez obzira na broj zahteva.
+    """
+    os.makedirs(STORAGE_DIR, exist_ok=True)
+    workers = []
+    for index in range(count):
+        process = Process(target=_worker_loop, args=(index,), daemon=True)
+        process.start()
+        workers.append(process)
+    print(f'[REPORT] Pokrenuto {count} radnika za izvještaje - skladište {STORAGE_DIR}')
+    return workers
+
+
+def _worker_loop(index: int):
+    from app import create_app, db
+
+    app = create_app()
+    last_cleanup = 0.0
+    while True:
+        job_id = None
+        sent = 0
+        with app.app_context():
+            try:
+                if time.time() - last_cleanup > 3600:
+                    last_cleanup = time.time()
+                    _recover_stale_jobs()
+                    _purge_old_reports()
+                job_id = _claim_job()
+                if job_id:
+                    _process_job(job_id)
+                sent = _deliver_emails()
+            except Exception as e:
+                db.session.rollback()
+                print(f'[REPORT] Greška u radniku {index}: {str(e)}')
+            finally:
+                db.session.remove()
+        if not job_id and not sent:
+            time.sleep(POLL_INTERVAL)
+
+
+def _claim_job():
+    """Preuzima najstariji posao na čekanju (FOR UPDATE SKIP LOCKED)."""
+    from app import db
+    from app.models import ReportJob, ReportJobStatus
+
+    job = ReportJob.query.filter(
+        ReportJob.status == ReportJobStatus.NA_CEKANJU
+    ).order_by(ReportJob.id).limit(1).with_for_update(skip_locked=True).first()
+    if not job:
+        db.session.commit()
+        return None
+
+    job.status = ReportJobStatus.U_TOKU
+    job.zapocet = datetime.now()
+    job.pokusaja += 1
+    db.session.commit()
+    return job.id
+
+
+def _process_job(job_id: int) -> None:
+    from app import db
+    from app.models import ReportJob, ReportJobStatus
+    from app.utils.report_generator import build_report_file
+
+    job = ReportJob.query.get(job_id)
+    path = os.path.join(STORAGE_DIR, f'report_{job.id}.pdf')
+    try:
+        count, _ = build_report_file(job.report_type, path)
+    except Exception as e:
+        db.session.rollback()
+        job = ReportJob.query.get(job_id)
+        job.greska = str(e)
+        job.status = ReportJobStatus.NEUSPESAN if job.pokusaja >= MAX_ATTEMPTS \
+            else ReportJobStatus.NA_CEKANJU
+        db.session.commit()
+        print(f'[REPORT] Izvještaj {job_id} neuspešan (pokušaj {job.pokusaja}/{MAX_ATTEMPTS}): {str(e)}')
+        return
+
+    job.putanja = path
+    job.velicina = os.path.getsize(path)
+    job.broj_letova = count
+    job.greska = None
+    job.status = ReportJobStatus.ZAVRSEN
+    job.zavrsen = datetime.now()
+    db.session.commit()
+    print(f'[REPORT] Izvještaj {job.id} ({job.report_type}) generisan: {job.velicina} B')
+
+
+def _deliver_emails() -> int:
+    """
+    Šalje gotov izvještaj svakom primaocu koji ga još nije dobio.
+
+    Primaoci se preuzimaju sa zakupom koji se commit-uje pre slanja, a
+    ishod svakog emaila se commit-uje zasebno. Primalac dodat posle
+    završetka posla (deduplikovan zahtev) dobija email u sledećem prolazu.
+    Email ne utiče na status posla - fajl je dostupan za preuzimanje.
+
+    Returns:
+        Broj obrađenih primalaca
+    """
+    from app import db
+    from app.models import ReportJob, ReportJobStatus, ReportRecipient
+    from app.utils.report_generator import send_report_email
+
+    now = datetime.now()
+    rows = db.session.query(ReportRecipient, ReportJob).join(
+        ReportJob, ReportJob.id == ReportRecipient.job_id
+    ).filter(
+        ReportRecipient.poslat.is_(None),
+        ReportRecipient.pokusaja < MAX_ATTEMPTS,
+        ReportRecipient.sledeci_pokusaj <= now,
+        ReportJob.status == ReportJobStatus.ZAVRSEN
+    ).order_by(ReportRecipient.id).limit(EMAIL_BATCH_SIZE) \
+        .with_for_update(skip_locked=True, of=ReportRecipient).all()
+    if not rows:
+        db.session.commit()
+        return 0
+
+    claimed = []
+    for recipient, job in rows:
+        recipient.pokusaja += 1
+        recipient.sledeci_pokusaj = now + timedelta(seconds=EMAIL_LEASE_SECONDS)
+        claimed.append((recipient.id, recipient.pokusaja, recipient.email, recipient.ime,
+                        job.id, job.report_type, job.putanja, job.velicina))
+    db.session.commit()
+
+    # Isti fajl se čita jednom za sve primaoce iz serije
+    contents = {}
+    for recipient_id, pokusaja, email, name, job_id, report_type, path, size in claimed:
+        if job_id not in contents:
+            contents[job_id] = None
+            if size is not None and size <= EMAIL_MAX_BYTES and path and os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    contents[job_id] = f.read()
+
+        if send_report_email(email, name, report_type, contents[job_id], job_id):
+            values = {ReportRecipient.poslat: datetime.now(), ReportRecipient.greska: None}
+            print(f'[REPORT] Izvještaj {job_id} poslat na {email}')
+        else:
+            values = {
+                ReportRecipient.sledeci_pokusaj: datetime.now() + timedelta(
+                    seconds=EMAIL_RETRY_SECONDS * 2 ** (pokusaja - 1)),
+                ReportRecipient.greska: 'Slanje emaila nije uspelo',
+            }
+        try:
+            ReportRecipient.query.filter(
+                ReportRecipient.id == recipient_id,
+                ReportRecipient.pokusaja == pokusaja
+            ).update(values, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'[REPORT] Greška pri upisu statusa emaila za {email}: {str(e)}')
+    return len(claimed)
+
+
+def _recover_stale_jobs() -> None:
+    """Vraća u red poslove čiji je radnik pao usred generisanja."""
+    from app import db
+    from app.models import ReportJob, ReportJobStatus
+
+    cutoff = datetime.now() - timedelta(seconds=STALE_SECONDS)
+    stale = ReportJob.query.filter(
+        ReportJob.status == ReportJobStatus.U_TOKU,
+        ReportJob.zapocet < cutoff
+    ).with_for_update(skip_locked=True).all()
+    for job in stale:
+        job.status = ReportJobStatus.NEUSPESAN if job.pokusaja >= MAX_ATTEMPTS \
+            else ReportJobStatus.NA_CEKANJU
+        job.greska = 'Radnik je prekinut tokom generisanja'
+    db.session.commit()
+
+
+def _purge_old_reports(retention_hours: int = RETENTION_HOURS) -> None:
+    """Briše fajlove i poslove starije od retention_hours."""
+    from app import db
+    from app.models import ReportJob, ReportJobStatus, ReportRecipient
+
+    cutoff = datetime.now() - timedelta(hours=retention_hours)
+    old = ReportJob.query.filter(
+        ReportJob.status.in_([ReportJobStatus.ZAVRSEN, ReportJobStatus.NEUSPESAN]),
+        ReportJob.kreiran < cutoff
+    ).with_for_update(skip_locked=True).all()
+    if old:
+        ReportRecipient.query.filter(
+            ReportRecipient.job_id.in_([job.id for job in old])
+        ).delete(synchronize_session=False)
+    for job in old:
+        if job.putanja:
+            try:
+                os.remove(job.putanja)
+            except FileNotFoundError:
+                pass
+        db.session.delete(job)
+    db.session.commit()
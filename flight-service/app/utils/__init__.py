@@ -1,7 +1,7 @@
 # flight-service/app/utils/__init__.py
 
-from app.utils.report_generator import generate_flights_report_async
+from app.utils.report_generator import build_report_file, send_report_email
 from app.utils.email_sender import send_flight_cancelled_emails
 from app.utils.scheduler import start_flight_scheduler
 
-__all__ = ['generate_flights_report_async', 'send_flight_cancelled_emails', 'start_flight_scheduler']
+__all__ = ['build_report_file', 'send_report_email', 'send_flight_cancelled_emails', 'start_flight_scheduler']
@@ -0,0 +1,205 @@
+# flight-service/app/utils/airline_catalog.py
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.utils.redis_client import get_redis
+from app.utils.etag import current_version, AIRLINES_SCOPE
+
+CHANNEL = 'airline_catalog'
+# Ako pub/sub nije dostupan, katalog se osvežava najviše ovoliko često
+FALLBACK_REFRESH_SECONDS = int(os.getenv('AIRLINE_CATALOG_REFRESH_SECONDS', '60'))
+
+
+class CatalogAirline:
+    """Nepromenljiv snimak avio kompanije iz kataloga (nije vezan za sesiju)."""
+
+    __slots__ = ('id', 'naziv', 'kod', 'logo', 'drzava', 'aktivna')
+
+    def __init__(self, airline):
+        self.id = airline.id
+        self.naziv = airline.naziv
+        self.kod = airline.kod
+        self.logo = airline.logo
+        self.drzava = airline.drzava
+        self.aktivna = airline.aktivna
+
+    def to_dict(self):
+        """Isti oblik kao Airline.to_dict."""
+        from app.models.flight import airline_logo_url
+
+        return {
+            'id': self.id,
+            'naziv': self.naziv,
+            'kod': self.kod,
+            'logo': airline_logo_url(self.id, self.logo),
+            'drzava': self.drzava,
+            'aktivna': self.aktivna
+        }
+
+
+class AirlineCatalog:
+    """
+    Katalog avio kompanija u memoriji procesa.
+
+    Web proces ga učitava pri pokretanju (run.py) i posle svake izmene:
+    servis objavi poruku na Redis kanal, a listener u svakom web procesu/
+    replici ponovo učita katalog. Procesi nastali fork-om (kupovina,
+    izveštaji) posle fork-a odbacuju stanje roditelja i katalog učitavaju
+    lenjo, bez listenera, uz povremeno osvežavanje. Čitanje (serijalizacija
+    letova, validacija) ne ide u bazu. Snimak se menja zamenom cele mape,
+    pa čitaoci nikad ne vide polu-učitan katalog.
+    """
+
+    def __init__(self):
+        self._airlines: Dict[int, CatalogAirline] = {}
+        self._loaded_at = 0.0
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._listener_ready = False
+        # Verzija AIRLINES_SCOPE (etag) za koju je katalog učitan
+        self._version = None
+
+    def load(self, app=None) -> int:
+        """
+        (Ponovo) učitava sve kompanije iz baze.
+        Prvi poziv u procesu pokreće i listener za invalidaciju.
+        """
+        from app.models import Airline
+
+        if app is not None:
+            self._app = app
+        # Verzija se čita pre baze: izmena tokom učitavanja izaziva novo učitavanje
+        version = current_version(AIRLINES_SCOPE)
+        airlines = {a.id: CatalogAirline(a) for a in Airline.query.order_by(Airline.id).all()}
+        self._airlines = airlines
+        self._loaded_at = time.monotonic()
+        self._version = version
+        self._ensure_listener()
+        return len(airlines)
+
+    def _after_fork_in_child(self) -> None:
+        """
+        Poziva se u detetu odmah posle fork-a. Listener nit roditelja ne
+        postoji u detetu, pa se stanje vraća na "neučitano, bez listenera",
+        a konekcije ka bazi nasleđene od roditelja se odbacuju.
+        """
+        parent_app = self._app
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._listener_ready = False
+        self._loaded_at = 0.0
+        self._version = None
+        if parent_app is None:
+            return
+
+        from app import db
+        try:
+            with parent_app.app_context():
+                # close=False: socket-i su deljeni sa roditeljem i ne smeju se zatvoriti
+                db.engine.dispose(close=False)
+        except Exception as e:
+            print(f'[AIRLINES] Pool konekcija nije odbačen posle fork-a: {str(e)}')
+
+    def _ensure_listener(self) -> None:
+        # Niti ne preživljavaju fork, pa se listener pokreće po procesu
+        if self._app is None or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        thread = threading.Thread(target=self._listen_forever, daemon=True)
+        thread.start()
+
+    def _reload(self) -> None:
+        from app import db
+
+        with self._app.app_context():
+            try:
+                self.load()
+            except Exception as e:
+                print(f'[AIRLINES] Greška pri osvežavanju kataloga: {str(e)}')
+            finally:
+                db.session.remove()
+
+    def _listen_forever(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                # Izmene tokom prekida konekcije su mogle da promaknu
+                self._reload()
+                self._listener_ready = True
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self._reload()
+            except Exception as e:
+                print(f'[AIRLINES] Listener kataloga prekinut: {str(e)}')
+            finally:
+                self._listener_ready = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(2)
+
+    def _fresh(self) -> Dict[int, CatalogAirline]:
+        # Bez pub/sub-a (Redis pao) katalog se povremeno osvežava iz baze
+        if not self._loaded_at or (not self._listener_ready
+                                   and time.monotonic() - self._loaded_at > FALLBACK_REFRESH_SECONDS):
+            try:
+                self.load()
+            except Exception as e:
+                print(f'[AIRLINES] Katalog nije učitan: {str(e)}')
+        return self._airlines
+
+    def ensure_current(self) -> None:
+        """
+        Ponovo učitava katalog ako je verzija kompanija u Redis-u novija od
+        učitane (izmena u drugom procesu čiju poruku listener još nije obradio).
+        Jedan Redis GET; koristi se za listu kompanija, ne za serijalizaciju letova.
+        """
+        version = current_version(AIRLINES_SCOPE)
+        if version is not None and version != self._version:
+            try:
+                self.load()
+            except Exception as e:
+                print(f'[AIRLINES] Greška pri osvežavanju kataloga: {str(e)}')
+
+    def get(self, airline_id: Optional[int]) -> Optional[CatalogAirline]:
+        """Vraća kompaniju po ID-u (i neaktivnu) ili None."""
+        if airline_id is None:
+            return None
+        return self._fresh().get(airline_id)
+
+    def all_active(self) -> List[CatalogAirline]:
+        """Sve aktivne kompanije, po ID-u."""
+        return [a for a in self._fresh().values() if a.aktivna]
+
+    def invalidate(self) -> None:
+        """
+        Poziva se posle commit-a izmene kompanije: odmah osvežava lokalni
+        katalog i javlja ostalim procesima/replikama da urade isto.
+        """
+        try:
+            self.load()
+        except Exception as e:
+            print(f'[AIRLINES] Greška pri osvežavanju kataloga: {str(e)}')
+        try:
+            get_redis().publish(CHANNEL, '1')
+        except Exception as e:
+            print(f'[AIRLINES] Invalidacija kataloga nije objavljena: {str(e)}')
+
+
+# Jedan katalog po procesu
+airline_catalog = AirlineCatalog()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=airline_catalog._after_fork_in_child)
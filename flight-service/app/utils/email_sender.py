@@ -1,16 +1,20 @@
 # flight-service/app/utils/email_sender.py
 
-import smtplib
 import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from multiprocessing import Process
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import os
-import requests
+
+from app.utils.server_client import get_user, lookup_users
+from app.utils.smtp_pool import get_smtp_pool
+from app.utils.email_templates import render
 
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # sekundi izmedju pokusaja
+# Polja korisnika potrebna za obavjestenje
+USER_FIELDS = 'id,ime,email'
 
 
 def send_flight_cancelled_emails(refunds: List[Tuple[int, float]], flight_data: dict):
@@ -33,83 +37,68 @@ def send_flight_cancelled_emails(refunds: List[Tuple[int, float]], flight_data:
 
 def _send_cancellation_emails(refunds: List[Tuple[int, float]], flight_data: dict):
     """Interna funkcija za slanje emailova u zasebnom procesu."""
-    server_url = os.getenv('SERVER_URL', 'http://server:5001')
-    internal_key = os.getenv('INTERNAL_API_KEY', 'internal-secret')
-    smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-    smtp_port = int(os.getenv('SMTP_PORT', 587))
+    # Svi primaoci jednim zahtevom ka serveru
+    users = lookup_users((user_id for user_id, _ in refunds), USER_FIELDS) or {}
+    for user_id, amount in refunds:
+        for attempt in range(1, MAX_RETRIES + 1):
+            if send_cancellation_email(user_id, amount, flight_data, users.get(user_id)):
+                break
+            print(f'[EMAIL] Pokusaj {attempt}/{MAX_RETRIES} neuspesan za korisnika {user_id}')
+            if attempt < MAX_RETRIES:
+                time.sleep(RETRY_DELAY * attempt)
+    get_smtp_pool().close_all()
+
+
+def send_cancellation_email(user_id: int, amount: float, flight_data: dict,
+                            user_data: Optional[dict] = None) -> bool:
+    """
+    Salje obavjestenje o otkazanom letu jednom korisniku (jedan pokusaj).
+    Ako pozivalac vec ima podatke o korisniku (bulk lookup), prosledjuje ih
+    kroz user_data i server se ne poziva.
+
+    Returns:
+        False ako slanje treba ponoviti, True ako je poslato ili nema sta da se salje
+    """
     smtp_user = os.getenv('SMTP_USER', 'avioletovi5@gmail.com')
     smtp_password = os.getenv('SMTP_PASSWORD', 'hsrq jvfz fpfl jibq')
 
-    naziv_leta = flight_data.get('naziv', 'Nepoznat let')
-    aerodrom_polaska = flight_data.get('aerodrom_polaska', '-')
-    aerodrom_dolaska = flight_data.get('aerodrom_dolaska', '-')
-
-    for user_id, amount in refunds:
-        try:
-            # Dohvati podatke o korisniku sa servera
-            response = requests.get(
-                f'{server_url}/api/internal/user/{user_id}',
-                headers={'X-Internal-Key': internal_key}
-            )
-            if response.status_code != 200:
-                print(f'[EMAIL] Ne mogu dohvatiti korisnika {user_id}')
-                continue
-
-            user_data = response.json().get('data', {})
-            user_email = user_data.get('email')
-            user_name = user_data.get('ime', 'Korisnik')
-
-            if not user_email:
-                continue
-
-            subject = f'Let {naziv_leta} je otkazan'
-            body = f"""
-            <html>
-            <body>
-                <h2>Postovani/a {user_name},</h2>
-                <p>Sa zaljenjem Vas obavestavamo da je let koji ste rezervisali otkazan.</p>
-                <p><strong>Detalji leta:</strong></p>
-                <ul>
-                    <li>Naziv leta: {naziv_leta}</li>
-                    <li>Ruta: {aerodrom_polaska} &rarr; {aerodrom_dolaska}</li>
-                </ul>
-                <p>Iznos od <strong>{amount:.2f} EUR</strong> ce Vam biti vracen na racun u aplikaciji.</p>
-                <p>Izvinjavamo se zbog eventualnih neugodnosti.</p>
-                <br>
-                <p>Srdacan pozdrav,</p>
-                <p>Tim Avio Letovi</p>
-            </body>
-            </html>
-            """
-
-            if not smtp_user or not smtp_password:
-                print(f'[EMAIL] SMTP nije konfigurisan. Email za {user_email} nije poslat.')
-                print(f'[EMAIL] Naslov: {subject}')
-                continue
-
-            msg = MIMEMultipart()
-            msg['From'] = smtp_user
-            msg['To'] = user_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'html'))
-
-            sent = False
-            for attempt in range(1, MAX_RETRIES + 1):
-                try:
-                    with smtplib.SMTP(smtp_host, smtp_port) as server:
-                        server.starttls()
-                        server.login(smtp_user, smtp_password)
-                        server.send_message(msg)
-                    print(f'[EMAIL] Obavjestenje o otkazivanju poslato korisniku {user_email}')
-                    sent = True
-                    break
-                except Exception as smtp_err:
-                    print(f'[EMAIL] Pokusaj {attempt}/{MAX_RETRIES} neuspesan za {user_email}: {str(smtp_err)}')
-                    if attempt < MAX_RETRIES:
-                        time.sleep(RETRY_DELAY * attempt)
-
-            if not sent:
-                print(f'[EMAIL] Svi pokusaji neuspesni za {user_email}')
-
-        except Exception as e:
-            print(f'[EMAIL] Greska pri slanju emaila korisniku {user_id}: {str(e)}')
\ No newline at end of file
+    # Dohvati podatke o korisniku sa servera (ako nisu vec prosledjeni)
+    if user_data is None:
+        user_data = get_user(user_id, USER_FIELDS)
+    if user_data is None:
+        print(f'[EMAIL] Ne mogu dohvatiti korisnika {user_id}')
+        return False
+
+    user_email = user_data.get('email')
+
+    if not user_email:
+        return True
+
+    context = {
+        'ime': user_data.get('ime', 'Korisnik'),
+        'naziv_leta': flight_data.get('naziv', 'Nepoznat let'),
+        'aerodrom_polaska': flight_data.get('aerodrom_polaska', '-'),
+        'aerodrom_dolaska': flight_data.get('aerodrom_dolaska', '-'),
+        'iznos': amount,
+    }
+    subject = render('flight_cancelled.subject', **context)
+
+    if not smtp_user or not smtp_password:
+        print(f'[EMAIL] SMTP nije konfigurisan. Email za {user_email} nije poslat.')
+        print(f'[EMAIL] Naslov: {subject}')
+        return True
+
+    msg = MIMEMultipart()
+    msg['From'] = smtp_user
+    msg['To'] = user_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(render('flight_cancelled.html', **context), 'html'))
+
+    try:
+        # Pooled konekcija - bez novog TLS handshake-a i login-a za svaku poruku
+        get_smtp_pool().send(msg)
+        print(f'[EMAIL] Obavjestenje o otkazivanju poslato korisniku {user_email}')
+        return True
+    except Exception as e:
+        print(f'[EMAIL] Greska pri slanju emaila korisniku {user_email}: {str(e)}')
+        return False
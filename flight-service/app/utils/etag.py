@@ -0,0 +1,163 @@
+# flight-service/app/utils/etag.py
+
+import hashlib
+import uuid
+from functools import wraps
+from typing import Iterable, List, Optional
+
+from flask import current_app, make_response, request
+
+from app.utils.redis_client import get_redis
+
+# Globalni opsezi verzija. Svaka izmena koja menja serijalizovani oblik
+# nekog resursa povećava odgovarajući brojač u Redis-u.
+FLIGHTS_SCOPE = 'flights'
+AIRLINES_SCOPE = 'airlines'
+RATINGS_SCOPE = 'ratings'
+
+_VERSION_PREFIX = 'etag_version:'
+_EPOCH_KEY = 'etag_version:epoch'
+
+
+def flight_scope(flight_id: int) -> str:
+    """Opseg verzije pojedinačnog leta."""
+    return f'flight:{flight_id}'
+
+
+def user_tickets_scope(user_id: int) -> str:
+    """Opseg verzije karata jednog korisnika."""
+    return f'tickets:user:{user_id}'
+
+
+def bump_versions(*scopes: str) -> None:
+    """
+    Povećava verzije datih opsega (jedan round trip kroz pipeline).
+    Greške se samo loguju - u najgorem slučaju klijent dobije pun odgovor.
+    """
+    if not scopes:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for scope in scopes:
+            pipe.incr(f'{_VERSION_PREFIX}{scope}')
+        pipe.execute()
+    except Exception as e:
+        print(f'[ETAG] Greška pri povećanju verzije: {str(e)}')
+
+
+def bump_flight(flight_id: Optional[int] = None) -> None:
+    """Invalidira katalog letova i, ako je zadat, konkretan let."""
+    scopes = [FLIGHTS_SCOPE]
+    if flight_id:
+        scopes.append(flight_scope(flight_id))
+    bump_versions(*scopes)
+
+
+def current_version(scope: str) -> Optional[str]:
+    """Trenutna verzija jednog opsega ('0' ako nije menjan), None ako Redis nije dostupan."""
+    try:
+        return get_redis().get(f'{_VERSION_PREFIX}{scope}') or '0'
+    except Exception as e:
+        print(f'[ETAG] Redis nije dostupan: {str(e)}')
+        return None
+
+
+def _current_versions(scopes: List[str]) -> Optional[List[str]]:
+    """Vraća [epoch, verzija1, verzija2, ...] ili None ako Redis nije dostupan."""
+    try:
+        client = get_redis()
+        epoch = client.get(_EPOCH_KEY)
+        if epoch is None:
+            # Epoch se menja ako se Redis isprazni, pa stari ETag-ovi ne mogu
+            # slučajno da se poklope sa novim brojačima koji kreću od nule.
+            client.set(_EPOCH_KEY, uuid.uuid4().hex, nx=True)
+            epoch = client.get(_EPOCH_KEY)
+        values = client.mget([f'{_VERSION_PREFIX}{s}' for s in scopes]) if scopes else []
+        return [epoch or ''] + [v or '0' for v in values]
+    except Exception as e:
+        print(f'[ETAG] Redis nije dostupan: {str(e)}')
+        return None
+
+
+def versioned_key(prefix: str, scopes: List[str], *parts: str) -> Optional[str]:
+    """
+    Ključ za Redis keš koji sadrži trenutne verzije opsega.
+    Posle bump_versions ključ se menja, pa stari unosi jednostavno
+    isteknu (TTL) - brisanje nije potrebno. None ako Redis nije dostupan.
+    """
+    versions = _current_versions(scopes)
+    if versions is None:
+        return None
+    raw = '|'.join(versions + list(parts))
+    return f'{prefix}:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]
+
+
+def _build_etag(versions: List[str], vary: str) -> str:
+    raw = '|'.join([request.full_path, vary] + versions)
+    return '"' + hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24] + '"'
+
+
+def _matches(etag: str) -> bool:
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # '*' se za GET nikad ne poklapa - važi samo za uslovne izmene
+    candidates = [c.strip() for c in header.split(',')]
+    return etag in candidates
+
+
+def conditional_get(scopes, private: bool = False, precheck=None):
+    """
+    Dekorator koji podržava If-None-Match za GET rute.
+
+    ETag se izračunava iz verzija opsega u Redis-u (ne iz tela odgovora),
+    pa se 304 vraća bez serijalizacije. Rute čiji odgovor zavisi od
+    vremena (ili koje menjaju status letova) ne treba da ga koriste.
+
+    Args:
+        scopes: Lista opsega ili funkcija (**view_kwargs) -> lista opsega
+        private: Da li odgovor zavisi od korisnika (token) - tada se
+                 identitet uključuje u ETag i keš je privatan
+        precheck: Opciona funkcija (**view_kwargs) -> odgovor ili None.
+                  Izvršava se pre provere ETag-a (uloga, postojanje
+                  resursa), pa 304 nikad ne zamenjuje 403/404
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if precheck is not None:
+                rejected = precheck(**kwargs)
+                if rejected is not None:
+                    return rejected
+
+            resolved: Iterable[str] = scopes(**kwargs) if callable(scopes) else scopes
+            versions = _current_versions(list(resolved))
+            if versions is None:
+                return fn(*args, **kwargs)
+
+            vary = ''
+            if private:
+                from flask_jwt_extended import get_jwt_identity
+                identity = get_jwt_identity() or {}
+                vary = f"{identity.get('id')}:{identity.get('uloga')}"
+
+            etag = _build_etag(versions, vary)
+            cache_control = 'private, no-cache' if private else 'no-cache'
+
+            if _matches(etag):
+                response = current_app.response_class(status=304)
+                response.headers['ETag'] = etag
+                response.headers['Cache-Control'] = cache_control
+                return response
+
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                response.headers['ETag'] = etag
+                response.headers['Cache-Control'] = cache_control
+                if private:
+                    response.headers['Vary'] = 'Authorization'
+            return response
+
+        return wrapper
+
+    return decorator
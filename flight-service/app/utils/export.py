@@ -0,0 +1,62 @@
+# flight-service/app/utils/export.py
+
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+
+# Bajtovi se šalju klijentu u delovima ove veličine
+CHUNK_SIZE = 64 * 1024
+
+
+def _plain(value):
+    """Konvertuje vrednost iz baze u JSON/CSV prijatan oblik."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def stream_csv(columns, rows):
+    """
+    Generator CSV izvoza. Zaglavlje se šalje odmah, a redovi se
+    skupljaju u bafer i šalju u delovima od CHUNK_SIZE.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for row in rows:
+        writer.writerow([_plain(v) for v in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(columns, rows):
+    """Generator NDJSON izvoza - jedan JSON objekat po liniji."""
+    chunk = []
+    size = 0
+    for row in rows:
+        line = json.dumps({c: _plain(v) for c, v in zip(columns, row)}, ensure_ascii=False) + '\n'
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+
+    if chunk:
+        yield ''.join(chunk)
@@ -0,0 +1,16 @@
+# flight-service/app/utils/fields.py
+
+from typing import Optional, Set
+
+
+def parse_fields(raw: Optional[str]) -> Optional[Set[str]]:
+    """
+    Parsira ?fields=a,b,c parametar.
+
+    Returns:
+        Skup traženih polja ili None ako parametar nije zadat (sva polja)
+    """
+    if not raw:
+        return None
+    fields = {f.strip() for f in raw.split(',') if f.strip()}
+    return fields or None
@@ -0,0 +1,46 @@
+# flight-service/app/utils/flight_batch.py
+
+from typing import Iterable, Optional
+
+from app.models import FlightStats
+from app.models.flight import FLIGHT_FIELD_NAMES
+
+# Polja leta koja bi pojedinačno okinula COUNT/AVG upit po letu
+AGGREGATE_FIELDS = {'slobodna_mesta', 'prosecna_ocena'}
+
+
+def serialize_flights(flights: Iterable, fields: Optional[set] = None) -> dict:
+    """
+    Serijalizuje više letova odjednom: {flight_id: dict}.
+
+    Svaki let se serijalizuje jednom, a slobodna mesta i prosečne ocene
+    se čitaju jednim IN upitom nad flight_stats umesto po letu.
+    Avio kompanije se čitaju iz kataloga u memoriji (airline_catalog).
+
+    Args:
+        flights: Letovi (mogu se ponavljati)
+        fields: Opcioni skup polja leta (kao kod Flight.to_dict)
+    """
+    unique = {}
+    for flight in flights:
+        if flight is not None:
+            unique.setdefault(flight.id, flight)
+    if not unique:
+        return {}
+
+    wanted = set(fields) if fields else (set(FLIGHT_FIELD_NAMES) | {'avio_kompanija'})
+    aggregates = wanted & AGGREGATE_FIELDS
+    stats = {}
+    if aggregates:
+        stats = {s.flight_id: s for s in FlightStats.query.filter(FlightStats.flight_id.in_(list(unique)))}
+
+    result = {}
+    for flight_id, flight in unique.items():
+        data = flight.to_dict(include_airline=True, fields=wanted - aggregates)
+        flight_stats = stats.get(flight_id)
+        if 'slobodna_mesta' in aggregates:
+            data['slobodna_mesta'] = flight.ukupno_mesta - (flight_stats.prodato if flight_stats else 0)
+        if 'prosecna_ocena' in aggregates:
+            data['prosecna_ocena'] = flight_stats.prosecna_ocena if flight_stats else None
+        result[flight_id] = data
+    return result
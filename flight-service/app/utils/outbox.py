@@ -0,0 +1,300 @@
+# flight-service/app/utils/outbox.py
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from app import db
+from app.models import (
+    OutboxEvent, OutboxEventType, OutboxStatus,
+    CancellationJob, CancellationJobStatus
+)
+from app.utils.redis_client import get_redis
+
+BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))
+MAX_BACKOFF_SECONDS = 600
+# Rok zakupa preuzetog događaja; posle isteka ga preuzima drugi prolaz
+LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', '300'))
+# Oznake izvršenih neidempotentnih događaja (email, socket) u Redis-u
+SENT_MARKER_PREFIX = 'outbox:sent:'
+SENT_MARKER_TTL = 24 * 3600
+_GUARDED_TYPES = (OutboxEventType.EMAIL, OutboxEventType.SOCKET)
+# Koliko dugo se čuvaju obrađeni događaji
+RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+
+
+def enqueue(tip: OutboxEventType, payload: dict, dedup_key: Optional[str] = None) -> OutboxEvent:
+    """
+    Dodaje sporedni efekat u tekuću sesiju - NE radi commit.
+    Događaj se upisuje zajedno sa promenom stanja u istoj transakciji.
+    """
+    event = OutboxEvent(tip=tip, payload=json.dumps(payload), dedup_key=dedup_key)
+    db.session.add(event)
+    return event
+
+
+def enqueue_many(events: list) -> None:
+    """
+    Bulk upis više događaja jednim INSERT-om (bez ORM objekata).
+    NE radi commit - upis je deo tekuće transakcije.
+
+    Args:
+        events: Lista (tip, payload, dedup_key)
+    """
+    if not events:
+        return
+    now = datetime.now()
+    db.session.execute(OutboxEvent.__table__.insert(), [{
+        'tip': tip,
+        'payload': json.dumps(payload),
+        'dedup_key': dedup_key,
+        'status': OutboxStatus.PENDING,
+        'pokusaja': 0,
+        'sledeci_pokusaj': now,
+        'kreiran': now,
+    } for tip, payload, dedup_key in events])
+
+
+def enqueue_refund(user_id: int, amount: float, idempotency_key: str) -> OutboxEvent:
+    """Refund preko Server servisa; idempotency_key štiti od duplog refunda."""
+    return enqueue(OutboxEventType.REFUND, refund_payload(user_id, amount, idempotency_key),
+                   dedup_key=idempotency_key)
+
+
+def refund_payload(user_id: int, amount: float, idempotency_key: str, job_id: Optional[int] = None) -> dict:
+    payload = {'user_id': user_id, 'amount': amount, 'idempotency_key': idempotency_key}
+    if job_id:
+        payload['job_id'] = job_id
+    return payload
+
+
+def enqueue_socket(event: str, data: dict, namespace: str) -> OutboxEvent:
+    """Socket.IO događaj koji se emituje tek posle commit-a."""
+    return enqueue(OutboxEventType.SOCKET, {'event': event, 'data': data, 'namespace': namespace})
+
+
+# Preuzet događaj, odvojen od ORM objekta (posle commit-a preuzimanja
+# ne treba ponovo čitati red). pokusaja služi i kao oznaka zakupa.
+_Claimed = namedtuple('_Claimed', 'id tip data pokusaja')
+
+
+def _prefetch_users(events: list) -> dict:
+    """Jednim zahtevom dohvata sve primaoce emailova iz serije."""
+    from app.utils.server_client import lookup_users
+    from app.utils.email_sender import USER_FIELDS
+
+    user_ids = {e.data['user_id'] for e in events if e.tip == OutboxEventType.EMAIL}
+    if not user_ids:
+        return {}
+    return lookup_users(user_ids, USER_FIELDS) or {}
+
+
+def _handle(event: _Claimed, socketio, users: dict) -> bool:
+    """Izvršava jedan događaj. Vraća True ako je uspešno."""
+    from app.utils.server_client import refund_balance
+    from app.utils.email_sender import send_cancellation_email
+
+    data = event.data
+    if event.tip == OutboxEventType.REFUND:
+        return refund_balance(data['user_id'], data['amount'], data.get('idempotency_key'))
+    if event.tip == OutboxEventType.EMAIL:
+        if data.get('kind') == 'flight_cancelled':
+            return send_cancellation_email(data['user_id'], data['amount'], data['flight'],
+                                           users.get(data['user_id']))
+        print(f'[OUTBOX] Nepoznata vrsta emaila: {data.get("kind")}')
+        return True
+    if event.tip == OutboxEventType.SOCKET:
+        if socketio:
+            socketio.emit(data['event'], data['data'], namespace=data['namespace'])
+        return True
+    return True
+
+
+def _already_sent(event_id: int) -> bool:
+    """Da li je neidempotentan efekat već izvršen (oznaka u Redis-u)."""
+    try:
+        return bool(get_redis().exists(f'{SENT_MARKER_PREFIX}{event_id}'))
+    except Exception as e:
+        print(f'[OUTBOX] Redis nije dostupan za proveru događaja {event_id}: {str(e)}')
+        return False
+
+
+def _mark_sent(event_id: int) -> None:
+    try:
+        get_redis().set(f'{SENT_MARKER_PREFIX}{event_id}', 1, ex=SENT_MARKER_TTL)
+    except Exception as e:
+        print(f'[OUTBOX] Redis nije dostupan za oznaku događaja {event_id}: {str(e)}')
+
+
+def _execute(event: _Claimed, socketio, users: dict) -> Tuple[bool, Optional[str]]:
+    """
+    Izvršava događaj i vraća (uspeh, greška).
+
+    Email i socket događaji nisu idempotentni kod primaoca: posle uspeha
+    se beleži oznaka u Redis-u, pa ponovljen događaj (pao commit DONE
+    statusa ili istekao zakup) ne šalje isti efekat drugi put.
+    """
+    guarded = event.tip in _GUARDED_TYPES
+    if guarded and _already_sent(event.id):
+        return True, None
+    try:
+        success = _handle(event, socketio, users)
+    except Exception as e:
+        return False, str(e)
+    if not success:
+        return False, 'Neuspešno izvršavanje'
+    if guarded:
+        _mark_sent(event.id)
+    return True, None
+
+
+def _claim_batch() -> List[_Claimed]:
+    """
+    Preuzima seriju dospelih događaja i odmah commit-uje preuzimanje.
+
+    Redovi su zaključani (FOR UPDATE SKIP LOCKED) samo dok se prebacuju
+    u IN_PROGRESS, ne tokom mrežnih poziva. sledeci_pokusaj postaje rok
+    zakupa: ako dispečer padne, događaj se posle LEASE_SECONDS ponovo
+    preuzima.
+    """
+    now = datetime.now()
+    events = OutboxEvent.query.filter(
+        OutboxEvent.status.in_([OutboxStatus.PENDING, OutboxStatus.IN_PROGRESS]),
+        OutboxEvent.sledeci_pokusaj <= now
+    ).order_by(OutboxEvent.id).limit(BATCH_SIZE).with_for_update(skip_locked=True).all()
+
+    lease_until = now + timedelta(seconds=LEASE_SECONDS)
+    claimed = []
+    for event in events:
+        event.status = OutboxStatus.IN_PROGRESS
+        event.pokusaja += 1
+        event.sledeci_pokusaj = lease_until
+        claimed.append(_Claimed(event.id, event.tip, event.data, event.pokusaja))
+    db.session.commit()
+    return claimed
+
+
+def _finish(event: _Claimed, success: bool, error: Optional[str]) -> None:
+    """
+    Upisuje ishod jednog događaja u sopstvenoj transakciji.
+
+    UPDATE važi samo dok je zakup naš (isti pokusaja); ako je zakup
+    istekao i događaj preuzeo drugi dispečer, ishod se ne upisuje dvaput.
+    """
+    if success:
+        values = {
+            OutboxEvent.status: OutboxStatus.DONE,
+            OutboxEvent.obradjen: datetime.now(),
+            OutboxEvent.poslednja_greska: None,
+        }
+    elif event.pokusaja >= MAX_ATTEMPTS:
+        values = {OutboxEvent.status: OutboxStatus.FAILED, OutboxEvent.poslednja_greska: error}
+        print(f'[OUTBOX] Događaj {event.id} ({event.tip.value}) trajno neuspešan: {error}')
+    else:
+        delay = min(MAX_BACKOFF_SECONDS, 5 * 2 ** (event.pokusaja - 1))
+        values = {
+            OutboxEvent.status: OutboxStatus.PENDING,
+            OutboxEvent.sledeci_pokusaj: datetime.now() + timedelta(seconds=delay),
+            OutboxEvent.poslednja_greska: error,
+        }
+
+    try:
+        updated = OutboxEvent.query.filter(
+            OutboxEvent.id == event.id,
+            OutboxEvent.status == OutboxStatus.IN_PROGRESS,
+            OutboxEvent.pokusaja == event.pokusaja
+        ).update(values, synchronize_session=False)
+
+        job_id = event.data.get('job_id') if event.tip == OutboxEventType.REFUND else None
+        if updated and job_id and (success or event.pokusaja >= MAX_ATTEMPTS):
+            _advance_job(job_id, 1 if success else 0, 0 if success else 1)
+        db.session.commit()
+    except Exception as e:
+        # Događaj ostaje IN_PROGRESS i ponovo se preuzima po isteku zakupa
+        db.session.rollback()
+        print(f'[OUTBOX] Greška pri upisu ishoda događaja {event.id}: {str(e)}')
+
+
+def dispatch_batch(socketio) -> int:
+    """
+    Preuzima seriju dospelih događaja i izvršava ih.
+
+    Preuzimanje se commit-uje pre bilo kakvog mrežnog poziva, a ishod
+    svakog događaja se commit-uje zasebno, pa neuspeh jednog upisa utiče
+    samo na taj događaj. Više instanci dispečera može da radi paralelno
+    (SKIP LOCKED + zakup). Neuspeli događaji dobijaju eksponencijalni
+    backoff; posle MAX_ATTEMPTS prelaze u FAILED.
+
+    Returns:
+        Broj obrađenih događaja
+    """
+    events = _claim_batch()
+    if not events:
+        return 0
+
+    users = _prefetch_users(events)
+    for event in events:
+        success, error = _execute(event, socketio, users)
+        _finish(event, success, error)
+    return len(events)
+
+
+def _advance_job(job_id: int, done: int, failed: int) -> None:
+    """Ažurira progres posla otkazivanja jednim UPDATE-om i zatvara ga kada je gotov."""
+    CancellationJob.query.filter_by(id=job_id).update({
+        CancellationJob.refundirano: CancellationJob.refundirano + done,
+        CancellationJob.neuspesno: CancellationJob.neuspesno + failed,
+    }, synchronize_session=False)
+
+    job = CancellationJob.query.get(job_id)
+    if job and job.status == CancellationJobStatus.U_TOKU \
+            and job.refundirano + job.neuspesno >= job.ukupno:
+        job.status = CancellationJobStatus.ZAVRSEN_SA_GRESKAMA if job.neuspesno \
+            else CancellationJobStatus.ZAVRSEN
+        job.zavrsen = datetime.now()
+
+
+def purge_processed(retention_days: int = RETENTION_DAYS) -> int:
+    """Briše obrađene događaje starije od retention_days."""
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    deleted = OutboxEvent.query.filter(
+        OutboxEvent.status == OutboxStatus.DONE,
+        OutboxEvent.obradjen < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def start_outbox_dispatcher(app, socketio, interval: float = 2):
+    """
+    Pokreće pozadinski dispečer outbox-a.
+    Dok ima posla, serije se obrađuju jedna za drugom; kada je red prazan,
+    dispečer čeka interval sekundi.
+    """
+    def run():
+        print(f'[OUTBOX] Dispečer pokrenut - interval {interval}s')
+        last_purge = 0.0
+        while True:
+            processed = 0
+            with app.app_context():
+                try:
+                    processed = dispatch_batch(socketio)
+                    if time.time() - last_purge > 3600:
+                        last_purge = time.time()
+                        purge_processed()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f'[OUTBOX] Greška u dispečeru: {str(e)}')
+                finally:
+                    db.session.remove()
+            if processed < BATCH_SIZE:
+                time.sleep(interval)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
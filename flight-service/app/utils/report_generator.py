@@ -1,183 +1,249 @@
 # flight-service/app/utils/report_generator.py
 
 from datetime import datetime
-from typing import List
-from io import BytesIO
-from multiprocessing import Process
+from itertools import islice
+from typing import Optional, Tuple
 import os
+import tempfile
 
 # Napomena: Za generisanje PDF-a koristimo reportlab
 # pip install reportlab
 
+# Broj redova tabele po strani PDF-a (A4, font 8)
+ROWS_PER_PAGE = 32
+# Broj redova koje baza šalje odjednom (server-side kursor)
+STREAM_BATCH = 500
 
-def generate_flights_report_async(flights_data: List[dict], report_type: str, 
-                                   admin_email: str, admin_name: str):
+REPORT_TITLES = {
+    'upcoming': 'Predstojeci letovi',
+    'in_progress': 'Letovi u toku',
+    'finished': 'Završeni i otkazani letovi'
+}
+
+
+def _report_filter(report_type: str):
     """
-    Asinhrono generiše PDF izvještaj i šalje ga na email.
-    
+    Vraća SQL uslov za tip izvještaja. Vreme dolaska se računa u bazi
+    (vreme_polaska + trajanje_minuta), bez učitavanja letova u Python.
+    """
+    from sqlalchemy import and_, func, literal_column
+    from app.models import Flight, FlightStatus
+
+    now = datetime.now()
+    vreme_dolaska = func.timestampadd(literal_column('MINUTE'), Flight.trajanje_minuta, Flight.vreme_polaska)
+    if report_type == 'upcoming':
+        return and_(Flight.status == FlightStatus.ODOBREN, Flight.vreme_polaska > now)
+    if report_type == 'in_progress':
+        return and_(
+            Flight.status.in_([FlightStatus.ODOBREN, FlightStatus.U_TOKU]),
+            Flight.vreme_polaska <= now,
+            vreme_dolaska > now
+        )
+    return Flight.status.in_([FlightStatus.ZAVRSEN, FlightStatus.OTKAZAN])
+
+
+def _sync_finished_statuses() -> None:
+    """Jednim UPDATE-om označava letove koji su sleteli kao završene (kao i scheduler)."""
+    from sqlalchemy import func, literal_column
+    from app import db
+    from app.models import Flight, FlightStatus
+    from app.utils.etag import bump_flight
+
+    vreme_dolaska = func.timestampadd(literal_column('MINUTE'), Flight.trajanje_minuta, Flight.vreme_polaska)
+    updated = Flight.query.filter(
+        Flight.status.in_([FlightStatus.ODOBREN, FlightStatus.U_TOKU]),
+        vreme_dolaska <= datetime.now()
+    ).update({Flight.status: FlightStatus.ZAVRSEN}, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        bump_flight()
+
+
+def report_totals(report_type: str):
+    """Broj letova i ukupna vrednost karata - računa se u SQL-u."""
+    from sqlalchemy import func
+    from app import db
+    from app.models import Flight
+
+    count, total = db.session.query(
+        func.count(Flight.id), func.coalesce(func.sum(Flight.cena_karte), 0)
+    ).filter(_report_filter(report_type)).one()
+    return int(count), float(total)
+
+
+def iter_report_rows(report_type: str):
+    """
+    Strimuje redove izvještaja sa server-side kursorom (yield_per).
+    Čitaju se samo kolone koje idu u tabelu; avio kompanija je u istom upitu.
+    """
+    from app import db
+    from app.models import Flight, Airline
+
+    order = Flight.vreme_polaska.desc() if report_type == 'finished' else Flight.vreme_polaska
+    query = db.session.query(
+        Flight.naziv, Airline.naziv, Flight.aerodrom_polaska, Flight.aerodrom_dolaska,
+        Flight.vreme_polaska, Flight.cena_karte, Flight.status
+    ).outerjoin(Airline, Flight.airline_id == Airline.id).filter(
+        _report_filter(report_type)
+    ).order_by(order, Flight.id).execution_options(stream_results=True).yield_per(STREAM_BATCH)
+
+    for naziv, airline, polazak, dolazak, vreme, cena, status in query:
+        yield [
+            (naziv or '-')[:20],
+            (airline or '-')[:15],
+            (polazak or '-')[:15],
+            (dolazak or '-')[:15],
+            vreme.isoformat()[:16] if vreme else '-',
+            f"{float(cena or 0):.2f} EUR",
+            status.value if status else '-',
+        ]
+
+
+def render_report_pdf(target, report_type: str, rows, totals) -> None:
+    """
+    Crta PDF stranu po stranu: za svaku stranu se pravi mala tabela od
+    ROWS_PER_PAGE redova, nacrta se i odmah odbaci. Memorija ne zavisi
+    od broja letova.
+
     Args:
-        flights_data: Lista letova kao rečnici
-        report_type: Tip izvještaja (upcoming, in_progress, finished)
-        admin_email: Email administratora
-        admin_name: Ime administratora
+        target: Putanja ili fajl objekat u koji se upisuje PDF
+        report_type: Tip izvještaja
+        rows: Iterator redova tabele
+        totals: Tuple (broj_letova, ukupna_vrednost)
     """
-    process = Process(
-        target=_generate_and_send_report,
-        args=(flights_data, report_type, admin_email, admin_name)
-    )
-    process.start()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Table, TableStyle
 
+    width, height = A4
+    margin = 0.75 * inch
+    header = ['Naziv', 'Avio kompanija', 'Polazak', 'Dolazak', 'Vreme', 'Cena', 'Status']
+    col_widths = [1.2*inch, 1*inch, 1*inch, 1*inch, 1.2*inch, 0.8*inch, 0.8*inch]
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
 
-def _generate_and_send_report(flights_data: List[dict], report_type: str,
-                               admin_email: str, admin_name: str):
+    pdf = canvas.Canvas(target, pagesize=A4)
+    page = 1
+
+    def draw_header():
+        pdf.setFont('Helvetica-Bold', 16 if page == 1 else 11)
+        pdf.drawString(margin, height - margin, f"Izvještaj: {REPORT_TITLES.get(report_type, report_type)}")
+        pdf.setFont('Helvetica', 9)
+        pdf.drawString(margin, height - margin - 18, f"Generisano: {datetime.now().strftime('%d.%m.%Y %H:%M')}")
+        pdf.drawRightString(width - margin, margin / 2, f"Strana {page}")
+        return height - margin - 36
+
+    y = draw_header()
+    rows = iter(rows)
+    drawn = False
+    while True:
+        chunk = list(islice(rows, ROWS_PER_PAGE))
+        if not chunk:
+            break
+        if drawn:
+            pdf.showPage()
+            page += 1
+            y = draw_header()
+        table = Table([header] + chunk, colWidths=col_widths)
+        table.setStyle(style)
+        _, table_height = table.wrapOn(pdf, width - 2 * margin, y - margin)
+        table.drawOn(pdf, margin, y - table_height)
+        y -= table_height + 24
+        drawn = True
+
+    count, total = totals
+    if not drawn:
+        pdf.setFont('Helvetica', 10)
+        pdf.drawString(margin, y, "Nema letova za prikaz.")
+    else:
+        if y < margin + 40:
+            pdf.showPage()
+            page += 1
+            y = draw_header()
+        pdf.setFont('Helvetica', 10)
+        pdf.drawString(margin, y, f"Ukupno letova: {count}")
+        pdf.drawString(margin, y - 16, f"Ukupna vrednost karata: {total:.2f} EUR")
+    pdf.save()
+
+
+def build_report_file(report_type: str, path: str) -> Tuple[int, float]:
     """
-    Interna funkcija za generisanje PDF-a i slanje emaila.
-    Izvršava se u zasebnom procesu.
+    Generiše PDF izvještaj u fajl na putanji path.
+    PDF se prvo piše u privremeni fajl u istom direktorijumu, pa se
+    atomski preimenuje - nedovršen fajl nikad nije vidljiv za preuzimanje.
+
+    Returns:
+        Tuple (broj_letova, ukupna_vrednost)
     """
+    if report_type == 'finished':
+        _sync_finished_statuses()
+
+    totals = report_totals(report_type)
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf.tmp', dir=directory)
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.units import inch
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30
-        )
-        
-        # Mapiranje tipova na naslove
-        type_titles = {
-            'upcoming': 'Predstojeci letovi',
-            'in_progress': 'Letovi u toku',
-            'finished': 'Završeni i otkazani letovi'
-        }
-        
-        # Naslov
-        title = Paragraph(f"Izvještaj: {type_titles.get(report_type, report_type)}", title_style)
-        elements.append(title)
-        
-        # Datum generisanja
-        date_para = Paragraph(f"Generisano: {datetime.now().strftime('%d.%m.%Y %H:%M')}", styles['Normal'])
-        elements.append(date_para)
-        elements.append(Spacer(1, 20))
-        
-        if not flights_data:
-            elements.append(Paragraph("Nema letova za prikaz.", styles['Normal']))
-        else:
-            # Tabela sa podacima
-            table_data = [['Naziv', 'Avio kompanija', 'Polazak', 'Dolazak', 'Vreme', 'Cena', 'Status']]
-            
-            for flight in flights_data:
-                airline = flight.get('avio_kompanija', {})
-                table_data.append([
-                    flight.get('naziv', '-')[:20],
-                    airline.get('naziv', '-')[:15] if airline else '-',
-                    flight.get('aerodrom_polaska', '-')[:15],
-                    flight.get('aerodrom_dolaska', '-')[:15],
-                    flight.get('vreme_polaska', '-')[:16] if flight.get('vreme_polaska') else '-',
-                    f"{flight.get('cena_karte', 0):.2f} EUR",
-                    flight.get('status', '-')
-                ])
-            
-            table = Table(table_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1.2*inch, 0.8*inch, 0.8*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-            
-            # Statistika
-            elements.append(Spacer(1, 30))
-            elements.append(Paragraph(f"Ukupno letova: {len(flights_data)}", styles['Normal']))
-            
-            total_price = sum(float(f.get('cena_karte', 0)) for f in flights_data)
-            elements.append(Paragraph(f"Ukupna vrednost karata: {total_price:.2f} EUR", styles['Normal']))
-        
-        doc.build(elements)
-        pdf_content = buffer.getvalue()
-        buffer.close()
-        
-        # Slanje emaila sa PDF-om
-        # Napomena: Ovo koristi email funkcije koje treba implementirati
-        _send_report_email(admin_email, admin_name, report_type, pdf_content)
-        
-        print(f'[REPORT] Izvještaj {report_type} uspešno generisan i poslat na {admin_email}')
-        
-    except ImportError:
-        print('[REPORT] reportlab nije instaliran. PDF izvještaj nije generisan.')
-    except Exception as e:
-        print(f'[REPORT] Greška pri generisanju izvještaja: {str(e)}')
+        with os.fdopen(fd, 'wb') as pdf_file:
+            render_report_pdf(pdf_file, report_type, iter_report_rows(report_type), totals)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return totals
 
 
-def _send_report_email(to_email: str, name: str, report_type: str, pdf_content: bytes):
+def send_report_email(to_email: str, name: str, report_type: str,
+                      pdf_content: Optional[bytes], job_id: int) -> bool:
     """
     Šalje email sa PDF izvještajem.
+    Ako je pdf_content None (fajl je prevelik za prilog), email sadrži
+    samo obaveštenje da je izvještaj spreman za preuzimanje.
     """
-    import smtplib
     from email.mime.text import MIMEText
     from email.mime.multipart import MIMEMultipart
-    from email.mime.application import MIMEApplication
+    from app.utils.email_templates import render, attachment_part
+    from app.utils.smtp_pool import get_smtp_pool
     
     try:
-        smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-        smtp_port = int(os.getenv('SMTP_PORT', 587))
         smtp_user = os.getenv('SMTP_USER', 'avioletovi5@gmail.com')
         smtp_password = os.getenv('SMTP_PASSWORD', 'hsrq jvfz fpfl jibq')
         
         if not smtp_user or not smtp_password:
             print(f'[REPORT] SMTP nije konfigurisan. Email nije poslat.')
-            return
+            return False
         
-        type_titles = {
-            'upcoming': 'Predstojeci letovi',
-            'in_progress': 'Letovi u toku',
-            'finished': 'Završeni i otkazani letovi'
+        context = {
+            'ime': name,
+            'tip': REPORT_TITLES.get(report_type, report_type),
+            'prilog': pdf_content is not None,
+            'job_id': job_id,
         }
         
         msg = MIMEMultipart()
         msg['From'] = smtp_user
         msg['To'] = to_email
-        msg['Subject'] = f'Izvještaj: {type_titles.get(report_type, report_type)}'
-        
-        body = f"""
-        <html>
-        <body>
-            <h2>Poštovani/a {name},</h2>
-            <p>U prilogu se nalazi izvještaj koji ste zatražili.</p>
-            <p><strong>Tip izvještaja:</strong> {type_titles.get(report_type, report_type)}</p>
-            <br>
-            <p>Srdačan pozdrav,</p>
-            <p>Tim Avio Letovi</p>
-        </body>
-        </html>
-        """
-        msg.attach(MIMEText(body, 'html'))
+        msg['Subject'] = render('report.subject', **context)
+        msg.attach(MIMEText(render('report.html', **context), 'html'))
         
-        # Dodavanje PDF-a
-        attachment_name = f"izvjestaj_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-        part = MIMEApplication(pdf_content, Name=attachment_name)
-        part['Content-Disposition'] = f'attachment; filename="{attachment_name}"'
-        msg.attach(part)
+        # Dodavanje PDF-a (MIME deo se deli između primalaca istog izvještaja)
+        if pdf_content is not None:
+            attachment_name = f"izvjestaj_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+            msg.attach(attachment_part(pdf_content, attachment_name))
         
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
+        get_smtp_pool().send(msg)
+        return True
         
     except Exception as e:
-        print(f'[REPORT] Greška pri slanju emaila: {str(e)}')
\ No newline at end of file
+        print(f'[REPORT] Greška pri slanju emaila: {str(e)}')
+        return False
@@ -5,6 +5,7 @@ from datetime import datetime
 def _check_flight_statuses(app, socketio):
     from app import db
     from app.models import Flight, FlightStatus
+    from app.utils.etag import bump_flight, bump_versions, flight_scope
     
     # Kreiramo potpuno novu izolovanu sesiju samo za ovaj krug provere
     session = db.create_scoped_session()
@@ -37,7 +38,14 @@ def _check_flight_statuses(app, socketio):
                 if socketio:
                     socketio.emit('flight_status_changed', {'flight': flight.to_dict()}, namespace='/flights')
 
+        changed_ids = [f.id for f in started_flights] + [
+            f.id for f in in_progress if f.status == FlightStatus.ZAVRSEN
+        ]
         session.commit()
+
+        if changed_ids:
+            bump_versions(*[flight_scope(fid) for fid in changed_ids])
+            bump_flight()
         print(f"[SCHEDULER] Statusi ažurirani u {now}")
 
     except Exception as e:
@@ -0,0 +1,101 @@
+# flight-service/app/utils/server_client.py
+
+import os
+from typing import Dict, Iterable, Optional
+
+import requests
+
+# Timeout za interne pozive ka Server servisu (sekunde)
+REQUEST_TIMEOUT = float(os.getenv('SERVER_REQUEST_TIMEOUT', '10'))
+# Broj korisnika po jednom lookup zahtevu (server prihvata najviše 1000)
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _server_url() -> str:
+    return os.getenv('SERVER_URL', 'http://server:5001')
+
+
+def _headers() -> dict:
+    return {'X-Internal-Key': os.getenv('INTERNAL_API_KEY', 'internal-secret')}
+
+
+def refund_balance(user_id: int, amount: float, idempotency_key: Optional[str] = None) -> bool:
+    """
+    Vraća sredstva korisniku preko internog API-ja Server servisa.
+    Server isti idempotency_key primenjuje samo jednom, pa je poziv
+    bezbedno ponavljati.
+
+    Returns:
+        True ako je refund primenjen (ili je već ranije bio primenjen)
+    """
+    try:
+        response = requests.post(
+            f'{_server_url()}/api/internal/refund-balance',
+            json={'user_id': user_id, 'amount': amount, 'idempotency_key': idempotency_key},
+            headers=_headers(),
+            timeout=REQUEST_TIMEOUT,
+        )
+        return response.status_code == 200
+    except Exception as e:
+        print(f'[SERVER CLIENT] Greška pri refundu za korisnika {user_id}: {str(e)}')
+        return False
+
+
+def get_user(user_id: int, fields: Optional[str] = None) -> Optional[dict]:
+    """
+    Dohvata podatke o korisniku sa Server servisa.
+
+    Args:
+        user_id: ID korisnika
+        fields: Opciona lista polja (npr. "id,ime,email")
+
+    Returns:
+        Rečnik sa podacima ili None
+    """
+    try:
+        response = requests.get(
+            f'{_server_url()}/api/internal/user/{user_id}',
+            params={'fields': fields} if fields else None,
+            headers=_headers(),
+            timeout=REQUEST_TIMEOUT,
+        )
+        if response.status_code == 200:
+            return response.json().get('data')
+    except Exception as e:
+        print(f'[SERVER CLIENT] Greška pri dohvatanju korisnika {user_id}: {str(e)}')
+    return None
+
+
+def lookup_users(user_ids: Iterable[int], fields: Optional[str] = None) -> Optional[Dict[int, dict]]:
+    """
+    Dohvata više korisnika odjednom (POST /api/internal/users/lookup).
+    Umesto jednog zahteva po korisniku, šalje jedan zahtev na
+    LOOKUP_CHUNK_SIZE korisnika.
+
+    Args:
+        user_ids: ID-jevi korisnika
+        fields: Opciona lista polja (npr. "id,ime,email")
+
+    Returns:
+        Rečnik user_id -> podaci ili None ako server nije dostupan
+    """
+    ids = sorted(set(user_ids))
+    users = {}
+    for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        chunk = ids[start:start + LOOKUP_CHUNK_SIZE]
+        try:
+            response = requests.post(
+                f'{_server_url()}/api/internal/users/lookup',
+                json={'ids': chunk, 'fields': fields},
+                headers=_headers(),
+                timeout=REQUEST_TIMEOUT,
+            )
+            if response.status_code != 200:
+                print(f'[SERVER CLIENT] Lookup korisnika neuspešan: {response.status_code}')
+                return None
+            for user in response.json().get('data', []):
+                users[user['id']] = user
+        except Exception as e:
+            print(f'[SERVER CLIENT] Greška pri lookup-u korisnika: {str(e)}')
+            return None
+    return users
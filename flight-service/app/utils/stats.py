@@ -0,0 +1,59 @@
+# flight-service/app/utils/stats.py
+
+from datetime import datetime
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app import db
+from app.models import FlightStats, FlightSalesHourly
+
+_table = FlightStats.__table__
+_hourly = FlightSalesHourly.__table__
+
+
+def _upsert(flight_id: int, **deltas) -> None:
+    """
+    Dodaje deltas na red statistike leta (INSERT ... ON DUPLICATE KEY UPDATE).
+    NE radi commit - izmena je deo tekuće transakcije, pa statistika
+    prati commit/rollback same kupovine, otkazivanja ili ocene.
+    """
+    stmt = mysql_insert(_table).values(flight_id=flight_id, **deltas)
+    stmt = stmt.on_duplicate_key_update(
+        azurirano=datetime.now(),
+        **{name: _table.c[name] + stmt.inserted[name] for name in deltas}
+    )
+    db.session.execute(stmt)
+
+
+def _upsert_hourly(flight, **deltas) -> None:
+    """Dodaje deltas na bucket tekućeg sata za let (bez commit-a)."""
+    sat = datetime.now().replace(minute=0, second=0, microsecond=0)
+    stmt = mysql_insert(_hourly).values(flight_id=flight.id, sat=sat, airline_id=flight.airline_id, **deltas)
+    stmt = stmt.on_duplicate_key_update(**{
+        name: _hourly.c[name] + stmt.inserted[name] for name in deltas
+    })
+    db.session.execute(stmt)
+
+
+def record_ticket_sold(flight, cena) -> None:
+    """Nova karta za let."""
+    _upsert(flight.id, prodato=1, prihod=cena)
+    _upsert_hourly(flight, prodato=1, prihod=cena)
+
+
+def record_tickets_cancelled(flight, count: int = 1, amount=0) -> None:
+    """Otkazane karte leta (pojedinačno ili sve karte otkazanog leta)."""
+    if count:
+        _upsert(flight.id, prodato=-count, otkazano=count, prihod=-amount)
+        _upsert_hourly(flight, otkazano=count, prihod=-amount)
+
+
+def record_rating(flight_id: int, ocena: int) -> None:
+    """Nova ocena leta."""
+    _upsert(flight_id, broj_ocena=1, zbir_ocena=ocena, **{f'ocena_{ocena}': 1})
+
+
+def delete_flight_stats(flight_id: int) -> None:
+    """Uklanja statistiku obrisanog leta."""
+    FlightStats.query.filter_by(flight_id=flight_id).delete(synchronize_session=False)
+    FlightSalesHourly.query.filter_by(flight_id=flight_id).delete(synchronize_session=False)
@@ -0,0 +1,75 @@
+# flight-service/benchmarks/_common.py
+"""
+Zajedničke pomoćne funkcije za benchmark skripte.
+
+Skripte se pokreću ručno protiv servisa koji radi (docker-compose ili
+run.py), npr. `python benchmarks/etag_benchmark.py --requests 2000`.
+"""
+
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+import requests
+
+_local = threading.local()
+
+
+def session() -> requests.Session:
+    """HTTP sesija po niti (requests.Session nije bezbedna za deljenje)."""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def percentile(values: List[float], p: float) -> float:
+    """p-ti percentil (0-100) sortirane kopije liste, 0 za praznu listu."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_concurrent(call: Callable[[int], bool], total: int,
+                   concurrency: int) -> Tuple[List[float], int, float]:
+    """
+    Izvršava call(i) za i u [0, total) iz `concurrency` niti.
+
+    Returns:
+        Tuple (latencije u ms za uspešne pozive, broj grešaka, ukupno trajanje u s)
+    """
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = call(i)
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(label: str, latencies: List[float], errors: int, elapsed: float) -> None:
+    """Ispisuje protok i raspodelu latencija jedne serije."""
+    count = len(latencies)
+    rate = count / elapsed if elapsed else 0.0
+    mean = statistics.mean(latencies) if latencies else 0.0
+    print(f'[BENCH] {label}: {count} ok, {errors} grešaka, {rate:.0f} req/s, '
+          f'mean {mean:.2f} ms, p50 {percentile(latencies, 50):.2f} ms, '
+          f'p99 {percentile(latencies, 99):.2f} ms')
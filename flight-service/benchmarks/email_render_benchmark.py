@@ -0,0 +1,99 @@
+# flight-service/benchmarks/email_render_benchmark.py
+"""
+Mikrobenchmark renderovanja personalizovanih emailova.
+
+Pravi --messages poruka za izvještaj sa PDF prilogom (--pdf-kb) na dva
+načina i meri vreme do gotovih bajtova poruke:
+  - stari način: f-string telo i novi MIME prilog za svakog primaoca
+    (base64 PDF-a se ponavlja za svaku poruku)
+  - email_templates: kompajliran šablon (render) i deljeni MIME prilog
+    (attachment_part)
+Posebno se meri i samo renderovanje tela, bez MIME-a.
+
+Upotreba:
+    python benchmarks/email_render_benchmark.py --messages 10000 --pdf-kb 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.email_templates import render, attachment_part  # noqa: E402
+
+
+def _fstring_body(ime: str, tip: str) -> str:
+    return f"""
+        <html>
+        <body>
+            <h2>Poštovani/a {ime},</h2>
+            <p>U prilogu se nalazi izvještaj koji ste zatražili.</p>
+            <p><strong>Tip izvještaja:</strong> {tip}</p>
+            <br>
+            <p>Srdačan pozdrav,</p>
+            <p>Tim Avio Letovi</p>
+        </body>
+        </html>
+        """
+
+
+def _timed(label: str, count: int, build) -> None:
+    started = time.perf_counter()
+    size = 0
+    for i in range(count):
+        size += len(build(i))
+    elapsed = time.perf_counter() - started
+    print(f'[BENCH] {label}: {count} poruka za {elapsed:.2f} s '
+          f'({count / elapsed:.0f} poruka/s, {elapsed / count * 1e6:.1f} µs/poruka, '
+          f'{size / count / 1024:.0f} KB/poruka)')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Renderovanje personalizovanih emailova')
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--pdf-kb', type=int, default=200)
+    args = parser.parse_args()
+
+    pdf = os.urandom(args.pdf_kb * 1024)
+    tip = 'Letovi koji nisu poceli'
+    filename = 'izvestaj.pdf'
+
+    def recipient(i: int) -> dict:
+        return {'ime': f'Korisnik {i} <&>', 'tip': tip, 'prilog': True, 'job_id': 1}
+
+    _timed('telo, f-string', args.messages,
+           lambda i: _fstring_body(recipient(i)['ime'], tip))
+    _timed('telo, email_templates.render', args.messages,
+           lambda i: render('report.html', **recipient(i)))
+
+    def legacy(i: int) -> bytes:
+        context = recipient(i)
+        msg = MIMEMultipart()
+        msg['To'] = f'admin{i}@example.com'
+        msg['Subject'] = f'Izvještaj: {tip}'
+        msg.attach(MIMEText(_fstring_body(context['ime'], tip), 'html'))
+        part = MIMEApplication(pdf, Name=filename)
+        part['Content-Disposition'] = f'attachment; filename="{filename}"'
+        msg.attach(part)
+        return msg.as_bytes()
+
+    def templated(i: int) -> bytes:
+        context = recipient(i)
+        msg = MIMEMultipart()
+        msg['To'] = f'admin{i}@example.com'
+        msg['Subject'] = render('report.subject', **context)
+        msg.attach(MIMEText(render('report.html', **context), 'html'))
+        msg.attach(attachment_part(pdf, filename))
+        return msg.as_bytes()
+
+    _timed('poruka, f-string + novi prilog', args.messages, legacy)
+    _timed('poruka, šablon + deljeni prilog', args.messages, templated)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# flight-service/benchmarks/etag_benchmark.py
+"""
+Benchmark uslovnog GET-a: latencija 304 odgovora naspram punih odgovora.
+
+Za svaku rutu se prvo uzme ETag, a zatim se ista ruta gađa bez
+If-None-Match (pun odgovor, upit u bazu + serijalizacija) i sa njim
+(304, samo čitanje verzija iz Redis-a).
+
+Upotreba:
+    python benchmarks/etag_benchmark.py --url http://localhost:5002/api \
+        --flight-id 1 --requests 2000 --concurrency 16
+"""
+
+import argparse
+
+from _common import report, run_concurrent, session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark 304 naspram punih odgovora')
+    parser.add_argument('--url', default='http://localhost:5002/api')
+    parser.add_argument('--flight-id', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    paths = ['/flights/', '/flights/upcoming', '/airlines/', f'/flights/{args.flight_id}']
+    for path in paths:
+        url = args.url.rstrip('/') + path
+        first = session().get(url)
+        etag = first.headers.get('ETag')
+        if first.status_code != 200 or not etag:
+            print(f'[BENCH] {path}: preskočeno (status {first.status_code}, ETag {etag!r})')
+            continue
+        print(f'[BENCH] {path}: telo {len(first.content)} B, ETag {etag}')
+
+        full = run_concurrent(lambda i: session().get(url).status_code == 200,
+                              args.requests, args.concurrency)
+        report(f'{path} 200', *full)
+
+        headers = {'If-None-Match': etag}
+        cached = run_concurrent(lambda i: session().get(url, headers=headers).status_code == 304,
+                                args.requests, args.concurrency)
+        report(f'{path} 304', *cached)
+
+
+if __name__ == '__main__':
+    main()
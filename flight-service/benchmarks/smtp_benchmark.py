@@ -0,0 +1,187 @@
+# flight-service/benchmarks/smtp_benchmark.py
+"""
+Benchmark slanja emailova preko SMTPPool naspram konekcije po poruci.
+
+Pokreće lokalni SMTP server (zamena za provajdera) sa STARTTLS-om i
+AUTH PLAIN-om, pa šalje --messages poruka na dva načina:
+  - nova konekcija po poruci (connect + STARTTLS + login + QUIT),
+    kao pre uvođenja pool-a
+  - SMTPPool (--pool-size konekcija, --senders niti)
+i ispisuje poruke u sekundi. --latency dodaje kašnjenje po SMTP odgovoru
+da bi se simulirao mrežni RTT do pravog provajdera.
+
+Sertifikat za STARTTLS se pravi u letu (cryptography), ili se zadaje
+preko --certfile/--keyfile.
+
+Upotreba:
+    python benchmarks/smtp_benchmark.py --messages 300 --latency 20
+"""
+
+import argparse
+import os
+import smtplib
+import socketserver
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.smtp_pool import SMTPPool  # noqa: E402
+
+from _common import report, run_concurrent  # noqa: E402
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimalan SMTP dijalog: EHLO, STARTTLS, AUTH PLAIN, MAIL/RCPT/DATA, QUIT."""
+
+    def _reply(self, line: str) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        tls = False
+        self._reply('220 localhost ESMTP benchmark')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                extensions = ['AUTH PLAIN'] if tls else ['STARTTLS', 'AUTH PLAIN']
+                self._reply('\r\n'.join(
+                    ['250-localhost'] + [f'250-{e}' for e in extensions[:-1]] + [f'250 {extensions[-1]}']
+                ))
+            elif verb == 'STARTTLS' and not tls:
+                self._reply('220 Ready to start TLS')
+                self.request = self.server.tls_context.wrap_socket(self.request, server_side=True)
+                self.rfile = self.request.makefile('rb')
+                self.wfile = self.request.makefile('wb')
+                tls = True
+            elif verb == 'AUTH':
+                self._reply('235 Authentication successful')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with self.server.lock:
+                    self.server.received += 1
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self._reply('250 OK')
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, tls_context: ssl.SSLContext, latency: float):
+        super().__init__(address, _SMTPHandler)
+        self.tls_context = tls_context
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.received = 0
+
+
+def _self_signed_cert(directory: str):
+    """Pravi self-signed sertifikat za localhost i vraća (certfile, keyfile)."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'localhost')])
+    now = datetime.utcnow()
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    with open(certfile, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(keyfile, 'wb') as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        ))
+    return certfile, keyfile
+
+
+def _message(i: int) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['From'] = 'benchmark@localhost'
+    msg['To'] = f'putnik{i}@example.com'
+    msg['Subject'] = f'Let BENCH-{i} je otkazan'
+    msg.attach(MIMEText('<html><body>' + 'Obavestenje o otkazivanju. ' * 40 + '</body></html>', 'html'))
+    return msg
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='SMTPPool naspram konekcije po poruci')
+    parser.add_argument('--messages', type=int, default=300)
+    parser.add_argument('--pool-size', type=int, default=2)
+    parser.add_argument('--senders', type=int, default=2, help='niti koje šalju preko pool-a')
+    parser.add_argument('--latency', type=float, default=0, help='ms kašnjenja po SMTP odgovoru')
+    parser.add_argument('--certfile')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = args.certfile, args.keyfile
+        if not certfile:
+            certfile, keyfile = _self_signed_cert(directory)
+        tls_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        tls_context.load_cert_chain(certfile, keyfile)
+
+        server = _SMTPServer(('127.0.0.1', 0), tls_context, args.latency / 1000.0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+        print(f'[BENCH] lokalni SMTP server na {host}:{port}, kašnjenje {args.latency} ms')
+
+        def per_message(i: int) -> bool:
+            conn = smtplib.SMTP(host, port, timeout=30)
+            conn.starttls()
+            conn.login('benchmark', 'benchmark')
+            conn.send_message(_message(i))
+            conn.quit()
+            return True
+
+        latencies, errors, elapsed = run_concurrent(per_message, args.messages, 1)
+        report('konekcija po poruci (poruka/s)', latencies, errors, elapsed)
+
+        pool = SMTPPool(host, port, 'benchmark', 'benchmark', size=args.pool_size)
+
+        def pooled(i: int) -> bool:
+            pool.send(_message(i))
+            return True
+
+        latencies, errors, elapsed = run_concurrent(pooled, args.messages, args.senders)
+        pool.close_all()
+        report(f'SMTPPool, poruka/s ({args.pool_size} konekcije, {args.senders} niti)', latencies, errors, elapsed)
+        print(f'[BENCH] server je primio {server.received} poruka')
+
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
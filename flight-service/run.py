@@ -6,6 +6,10 @@ eventlet.monkey_patch()
 import os
 from app import create_app, socketio
 from app.utils.scheduler import start_flight_scheduler
+from app.utils.outbox import start_outbox_dispatcher
+from app.tasks.report_worker import start_report_workers
+from app.services.stats_service import StatsService
+from app.utils.airline_catalog import airline_catalog
 
 app = create_app()
 
@@ -13,9 +17,24 @@ if __name__ == '__main__':
     port = int(os.getenv('FLIGHT_PORT', 5002))
     debug = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
 
+    with app.app_context():
+        # Katalog avio kompanija u memoriji (+ listener za invalidaciju)
+        airline_catalog.load(app)
+
+        # Inicijalno punjenje sažete statistike (samo ako je tabela prazna)
+        filled = StatsService().backfill_if_empty()
+        if filled:
+            print(f'[FLIGHT-SERVICE] Statistika popunjena za {filled} letova')
+
     # Pokretanje scheduler-a za automatsku promenu statusa letova
     start_flight_scheduler(app, socketio, interval=30)
 
+    # Dispečer za refunde, emailove i socket događaje iz outbox-a
+    start_outbox_dispatcher(app, socketio)
+
+    # Ograničen pool procesa za generisanje PDF izvještaja
+    start_report_workers()
+
     print(f'[FLIGHT-SERVICE] Starting on port {port}...')
     # Koristi eventlet za WebSocket podršku
     socketio.run(app, host='0.0.0.0', port=port, debug=debug)
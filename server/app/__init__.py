@@ -55,15 +55,19 @@ def create_app():
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     socketio.init_app(app, message_queue=app.config['REDIS_URL'])
     
+    # Push invalidacija blacklist keša preko Redis pub/sub
+    from app.services.auth_service import TokenBlacklistService
+    TokenBlacklistService.start_listener()
+
     # JWT Token Blacklist callback
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
         """
         Callback koji se poziva za svaki zahtev sa JWT tokenom.
         Proverava da li je token na blacklisti (revociran).
+        Servis koristi deljeni Redis pool i lokalni keš, pa u uobičajenom
+        slučaju nema Redis poziva.
         """
-        from app.services.auth_service import TokenBlacklistService
-        
         jti = jwt_payload.get("jti")
         if not jti:
             return False
@@ -120,5 +124,15 @@ def create_app():
             db.session.add(admin)
             db.session.commit()
             print('[SERVER] Admin korisnik kreiran: admin@admin.com / admin123')
+
+        # Migracija starih base64 profilnih slika u profile_images
+        from app.services.profile_image_service import ProfileImageService
+        migrated = ProfileImageService().migrate_inline_images()
+        if migrated:
+            print(f'[SERVER] Migrirano {migrated} profilnih slika u profile_images')
+    
+    # Dispečer email outbox-a (slanje emailova u pozadini)
+    from app.tasks.email_dispatcher import email_dispatcher
+    email_dispatcher.start(app)
     
     return app
\ No newline at end of file
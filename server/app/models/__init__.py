@@ -1,6 +1,8 @@
 # server/app/models/__init__.py
 
-from app.models.user import User, UserRole, LoginAttempt, AccountLock
+from app.models.user import User, UserRole, ProfileImage, BalanceLedger, LoginAttempt, LoginAttemptDaily, AccountLock
+from app.models.email_outbox import EmailOutbox, EmailStatus
 
-__all__ = ['User', 'UserRole', 'LoginAttempt', 'AccountLock']
+__all__ = ['User', 'UserRole', 'ProfileImage', 'BalanceLedger', 'LoginAttempt', 'LoginAttemptDaily', 'AccountLock',
+           'EmailOutbox', 'EmailStatus']
 
@@ -0,0 +1,43 @@
+# server/app/models/email_outbox.py
+
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy.orm import deferred
+
+from app import db
+
+
+class EmailStatus(str, Enum):
+    """Statusi emaila u outbox-u."""
+    PENDING = "PENDING"
+    SENDING = "SENDING"  # Preuzet od dispečera; sledeci_pokusaj je rok zakupa
+    SENT = "SENT"
+    DEAD = "DEAD"  # Trajno neuspešan posle maksimalnog broja pokušaja
+
+
+class EmailOutbox(db.Model):
+    """
+    Email koji čeka slanje.
+    Rute samo upisuju red; pozadinski dispečer šalje emailove u serijama.
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_sledeci', 'status', 'sledeci_pokusaj'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    primalac = db.Column(db.String(255), nullable=False)
+    naslov = db.Column(db.String(255), nullable=False)
+    telo = db.Column(db.Text, nullable=False)
+    prilog = deferred(db.Column(db.LargeBinary(length=16 * 1024 * 1024), nullable=True))
+    prilog_ime = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.Enum(EmailStatus), default=EmailStatus.PENDING, nullable=False)
+    pokusaja = db.Column(db.Integer, default=0, nullable=False)
+    sledeci_pokusaj = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    poslednja_greska = db.Column(db.Text, nullable=True)
+    kreiran = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    poslat = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.primalac} {self.status.value}>'
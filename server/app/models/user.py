@@ -3,8 +3,13 @@
 from datetime import datetime
 from enum import Enum
 #from sqlalchemy.dialects.mysql import LONGTEXT
+from flask import has_request_context, request
+from sqlalchemy.orm import deferred, load_only
 from app import db
 
+# Prefiks kojim User.profilna_slika referencira ProfileImage
+IMAGE_HASH_PREFIX = 'sha256:'
+
 
 class UserRole(str, Enum):
     """Enum za korisničke uloge u sistemu."""
@@ -20,6 +25,18 @@ class User(db.Model):
     kredencijale i stanje računa.
     """
     __tablename__ = 'users'
+    # Indeksi za admin imenik: prefiks pretraga po imenu/prezimenu (email
+    # već ima jedinstveni indeks) i filter po ulozi/statusu. InnoDB dodaje
+    # id na kraj svakog sekundarnog indeksa, pa je strana po id-u opseg.
+    # Samo filter po ulozi koristi (uloga) -> (uloga, id); u složenom
+    # indeksu id dolazi posle aktivan, pa bi MySQL sortirao sve redove uloge.
+    __table_args__ = (
+        db.Index('ix_users_ime', 'ime'),
+        db.Index('ix_users_prezime', 'prezime'),
+        db.Index('ix_users_uloga', 'uloga'),
+        db.Index('ix_users_uloga_aktivan', 'uloga', 'aktivan'),
+        db.Index('ix_users_aktivan', 'aktivan'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     
@@ -44,7 +61,8 @@ class User(db.Model):
     # Finansije - stanje na računu za kupovinu karata
     stanje_racuna = db.Column(db.Numeric(12, 2), default=0.00, nullable=False)
     
-    # Profilna slika (base64) - db.Text može držati do 4GB
+    # Profilna slika - 'sha256:<hash>' referenca na ProfileImage
+    # (stari redovi mogu imati base64, migriraju se pri pokretanju)
     profilna_slika = db.Column(db.Text, nullable=True)
     
     # Vremenski podaci
@@ -57,26 +75,127 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.email} ({self.uloga.value})>'
 
-    def to_dict(self, include_sensitive=False):
-        """Konvertuje korisnika u rečnik za JSON odgovor."""
-        data = {
-            'id': self.id,
-            'ime': self.ime,
-            'prezime': self.prezime,
-            'email': self.email,
-            'datum_rodjenja': self.datum_rodjenja.isoformat() if self.datum_rodjenja else None,
-            'pol': self.pol,
-            'drzava': self.drzava,
-            'ulica': self.ulica,
-            'broj': self.broj,
-            'uloga': self.uloga.value,
-            'stanje_racuna': float(self.stanje_racuna),
-            'profilna_slika': self.profilna_slika,
-            'kreiran': self.kreiran.isoformat() if self.kreiran else None,
-            'azuriran': self.azuriran.isoformat() if self.azuriran else None,
-            'aktivan': self.aktivan
+    @property
+    def profilna_slika_hash(self):
+        """Vraća hash profilne slike ili None."""
+        if self.profilna_slika and self.profilna_slika.startswith(IMAGE_HASH_PREFIX):
+            return self.profilna_slika[len(IMAGE_HASH_PREFIX):]
+        return None
+
+    def profilna_slika_url(self, size='thumb'):
+        """URL profilne slike (thumb ili original) sa hash-om kao verzijom."""
+        image_hash = self.profilna_slika_hash
+        if not image_hash:
+            return None
+        path = f'/api/users/{self.id}/avatar?v={image_hash[:16]}&size={size}'
+        if has_request_context():
+            return request.host_url.rstrip('/') + path
+        return path
+
+    # Kolone potrebne za svako polje iz to_dict (za load_only projekciju)
+    FIELD_COLUMNS = {
+        'id': ('id',),
+        'ime': ('ime',),
+        'prezime': ('prezime',),
+        'email': ('email',),
+        'datum_rodjenja': ('datum_rodjenja',),
+        'pol': ('pol',),
+        'drzava': ('drzava',),
+        'ulica': ('ulica',),
+        'broj': ('broj',),
+        'uloga': ('uloga',),
+        'stanje_racuna': ('stanje_racuna',),
+        'profilna_slika': ('profilna_slika',),
+        'profilna_slika_original': ('profilna_slika',),
+        'kreiran': ('kreiran',),
+        'azuriran': ('azuriran',),
+        'aktivan': ('aktivan',),
+    }
+
+    @classmethod
+    def load_only_for(cls, fields):
+        """Vraća load_only opciju koja učitava samo kolone za tražena polja."""
+        columns = {'id'}
+        for field in fields:
+            columns.update(cls.FIELD_COLUMNS.get(field, ()))
+        return load_only(*[getattr(cls, c) for c in sorted(columns)])
+
+    def to_dict(self, include_sensitive=False, fields=None):
+        """
+        Konvertuje korisnika u rečnik za JSON odgovor.
+
+        Args:
+            fields: Opcioni skup polja - serijalizuju se samo tražena polja
+        """
+        return {
+            name: getter(self)
+            for name, getter in _USER_FIELDS.items()
+            if fields is None or name in fields
         }
-        return data
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+_USER_FIELDS = {
+    'id': lambda u: u.id,
+    'ime': lambda u: u.ime,
+    'prezime': lambda u: u.prezime,
+    'email': lambda u: u.email,
+    'datum_rodjenja': lambda u: _isoformat(u.datum_rodjenja),
+    'pol': lambda u: u.pol,
+    'drzava': lambda u: u.drzava,
+    'ulica': lambda u: u.ulica,
+    'broj': lambda u: u.broj,
+    'uloga': lambda u: u.uloga.value,
+    'stanje_racuna': lambda u: float(u.stanje_racuna),
+    'profilna_slika': lambda u: u.profilna_slika_url('thumb'),
+    'profilna_slika_original': lambda u: u.profilna_slika_url('original'),
+    'kreiran': lambda u: _isoformat(u.kreiran),
+    'azuriran': lambda u: _isoformat(u.azuriran),
+    'aktivan': lambda u: u.aktivan,
+}
+
+
+class ProfileImage(db.Model):
+    """
+    Profilna slika korisnika, adresirana sha256 hash-om originala.
+    Original i thumbnail su odloženi (deferred) i učitavaju se samo
+    kada se slika zaista servira.
+    """
+    __tablename__ = 'profile_images'
+
+    hash = db.Column(db.String(64), primary_key=True)
+    content_type = db.Column(db.String(100), nullable=False)
+    original = deferred(db.Column(db.LargeBinary(length=16 * 1024 * 1024), nullable=False))
+    thumbnail = deferred(db.Column(db.LargeBinary(length=16 * 1024 * 1024), nullable=True))
+    thumbnail_content_type = db.Column(db.String(100), nullable=True)
+    velicina = db.Column(db.Integer, nullable=False)
+    kreirana = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ProfileImage {self.hash[:12]} ({self.velicina} B)>'
+
+
+class BalanceLedger(db.Model):
+    """
+    Append-only evidencija promena stanja računa.
+    Svaka promena stanja upisuje jedan red; idempotency_key je jedinstven,
+    pa se ponovljeni interni poziv primenjuje tačno jednom.
+    """
+    __tablename__ = 'balance_ledger'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Bez FK - evidencija ostaje i kada se korisnik obriše
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    iznos = db.Column(db.Numeric(12, 2), nullable=False)  # pozitivno = uplata, negativno = isplata
+    tip = db.Column(db.String(20), nullable=False)
+    idempotency_key = db.Column(db.String(128), nullable=True, unique=True)
+    kreirano = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<BalanceLedger user={self.user_id} {self.tip} {self.iznos}>'
 
 
 class LoginAttempt(db.Model):
@@ -89,13 +208,33 @@ class LoginAttempt(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     email = db.Column(db.String(255), nullable=False, index=True)
     ip_adresa = db.Column(db.String(45), nullable=True)  # Podržava IPv6
-    vreme_pokusaja = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    vreme_pokusaja = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     uspesno = db.Column(db.Boolean, default=False, nullable=False)
 
     def __repr__(self):
         return f'<LoginAttempt {self.email} at {self.vreme_pokusaja}>'
 
 
+class LoginAttemptDaily(db.Model):
+    """
+    Dnevni zbir pokušaja prijave po email-u.
+    Stari redovi iz login_attempts se sabiraju ovde pre brisanja.
+    """
+    __tablename__ = 'login_attempts_daily'
+    __table_args__ = (
+        db.UniqueConstraint('dan', 'email', name='uq_login_attempts_daily_dan_email'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    dan = db.Column(db.Date, nullable=False)
+    email = db.Column(db.String(255), nullable=False, index=True)
+    uspesnih = db.Column(db.Integer, default=0, nullable=False)
+    neuspesnih = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<LoginAttemptDaily {self.email} {self.dan}>'
+
+
 class AccountLock(db.Model):
     """
     Model za praćenje zaključanih naloga.
@@ -4,11 +4,16 @@ import os
 from flask import Blueprint, request, jsonify
 
 from app.services import UserService
+from app.utils.fields import parse_fields
+from app.utils import user_cache
 
 internal_bp = Blueprint('internal', __name__)
 
 INTERNAL_API_KEY = os.getenv('INTERNAL_API_KEY', 'internal-secret')
 
+# Maksimalan broj korisnika u jednom lookup zahtevu
+MAX_LOOKUP_IDS = 1000
+
 
 def verify_internal_key():
     """Verifikuje interni API ključ."""
@@ -25,6 +30,7 @@ def deduct_balance():
     Request body:
         - user_id: int
         - amount: float
+        - idempotency_key: str (opciono, može i kao Idempotency-Key header)
     
     Headers:
         - X-Internal-Key: str
@@ -52,8 +58,10 @@ def deduct_balance():
                 'message': 'Nedostaju user_id ili amount'
             }), 400
         
+        idempotency_key = data.get('idempotency_key') or request.headers.get('Idempotency-Key')
+        
         user_service = UserService()
-        success, message = user_service.deduct_balance(user_id, float(amount))
+        success, message = user_service.deduct_balance(user_id, float(amount), idempotency_key)
         
         if success:
             return jsonify({
@@ -82,6 +90,7 @@ def refund_balance():
     Request body:
         - user_id: int
         - amount: float
+        - idempotency_key: str (opciono, može i kao Idempotency-Key header)
     
     Headers:
         - X-Internal-Key: str
@@ -109,8 +118,10 @@ def refund_balance():
                 'message': 'Nedostaju user_id ili amount'
             }), 400
         
+        idempotency_key = data.get('idempotency_key') or request.headers.get('Idempotency-Key')
+        
         user_service = UserService()
-        success, message = user_service.refund_balance(user_id, float(amount))
+        success, message = user_service.refund_balance(user_id, float(amount), idempotency_key)
         
         if success:
             return jsonify({
@@ -138,6 +149,9 @@ def get_user_internal(user_id):
     Args:
         user_id: ID korisnika
     
+    Query params:
+        - fields: str (opciono, npr. "id,email,stanje_racuna")
+    
     Headers:
         - X-Internal-Key: str
     
@@ -152,12 +166,27 @@ def get_user_internal(user_id):
     
     try:
         user_service = UserService()
-        user = user_service.get_user_by_id(user_id)
+        fields = parse_fields(request.args.get('fields'))
+        
+        # Polja iz sažetka (najčešći slučaj) se služe iz Redis keša
+        if fields and fields <= set(user_cache.SUMMARY_FIELDS):
+            summary = user_service.get_user_summary(user_id)
+            if summary is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Korisnik nije pronađen'
+                }), 404
+            return jsonify({
+                'success': True,
+                'data': {name: summary[name] for name in summary if name in fields}
+            }), 200
+        
+        user = user_service.get_user_by_id(user_id, fields)
         
         if user:
             return jsonify({
                 'success': True,
-                'data': user.to_dict()
+                'data': user.to_dict(fields=fields)
             }), 200
         else:
             return jsonify({
@@ -169,4 +198,93 @@ def get_user_internal(user_id):
         return jsonify({
             'success': False,
             'message': f'Greška: {str(e)}'
-        }), 500
\ No newline at end of file
+        }), 500
+
+@internal_bp.route('/users/lookup', methods=['POST'])
+def lookup_users_internal():
+    """
+    Interna ruta za dohvatanje više korisnika odjednom.
+    Koristi se za slanje obaveštenja većem broju korisnika
+    (umesto jednog zahteva po korisniku).
+    
+    Request body:
+        - ids: list[int] (najviše MAX_LOOKUP_IDS)
+        - fields: str ili list[str] (opciono, npr. "id,ime,email")
+    
+    Headers:
+        - X-Internal-Key: str
+    
+    Returns:
+        JSON sa listom korisnika (samo tražena polja)
+    """
+    if not verify_internal_key():
+        return jsonify({
+            'success': False,
+            'message': 'Nevalidan API ključ'
+        }), 401
+    
+    try:
+        data = request.get_json() or {}
+        ids = data.get('ids')
+        if not isinstance(ids, list):
+            return jsonify({'success': False, 'message': 'Nedostaje lista ids'}), 400
+        if len(ids) > MAX_LOOKUP_IDS:
+            return jsonify({
+                'success': False,
+                'message': f'Najviše {MAX_LOOKUP_IDS} korisnika po zahtevu'
+            }), 400
+        
+        raw_fields = data.get('fields')
+        if isinstance(raw_fields, list):
+            raw_fields = ','.join(raw_fields)
+        fields = parse_fields(raw_fields)
+        if fields:
+            # id je uvek potreban da bi pozivalac mogao da upari rezultate
+            fields.add('id')
+        
+        user_service = UserService()
+        users = user_service.get_users_by_ids(ids, fields)
+        
+        return jsonify({
+            'success': True,
+            'data': [u.to_dict(fields=fields) for u in users]
+        }), 200
+    
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Nevalidni ID-jevi'}), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Greška: {str(e)}'
+        }), 500
+
+
+@internal_bp.route('/email/metrics', methods=['GET'])
+def email_metrics():
+    """
+    Interna ruta sa metrikama slanja emailova (protok, zaostatak, dead-letter).
+    
+    Headers:
+        - X-Internal-Key: str
+    
+    Returns:
+        JSON sa metrikama email dispečera
+    """
+    if not verify_internal_key():
+        return jsonify({
+            'success': False,
+            'message': 'Nevalidan API ključ'
+        }), 401
+    
+    from app.tasks.email_dispatcher import email_dispatcher
+    
+    try:
+        return jsonify({
+            'success': True,
+            'data': email_dispatcher.metrics()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Greška: {str(e)}'
+        }), 500
@@ -1,10 +1,13 @@
 # server/app/routes/user_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from app.services import UserService
+from app.models import UserRole
+from app.services import UserService, ProfileImageService
+from app.services.user_service import DIRECTORY_FIELDS
 from app.dto import UpdateUserDTO, ChangeRoleDTO, DepositDTO
+from app.utils.fields import parse_fields
 
 user_bp = Blueprint("users", __name__)
 
@@ -17,12 +20,50 @@ def _role_check(*allowed_roles) -> bool:
 @user_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_users():
+    """
+    Admin imenik korisnika, stranu po stranu.
+
+    Query:
+        - q: prefiks imena, prezimena ili email-a (opciono)
+        - uloga: KORISNIK / MENADZER / ADMINISTRATOR (opciono)
+        - aktivan: true / false (opciono)
+        - cursor: next_cursor iz prethodne strane
+        - limit: veličina strane (podrazumevano 50, najviše 200)
+        - fields: polja u odgovoru (podrazumevano DIRECTORY_FIELDS)
+    """
     if not _role_check("ADMINISTRATOR"):
         return jsonify({"success": False, "message": "Pristup odbijen"}), 403
 
+    uloga = request.args.get("uloga")
+    if uloga:
+        try:
+            uloga = UserRole(uloga.upper())
+        except ValueError:
+            return jsonify({"success": False, "message": "Nevalidna uloga"}), 400
+
+    aktivan = request.args.get("aktivan")
+    if aktivan is not None and aktivan != "":
+        if aktivan.lower() not in ("true", "false", "1", "0"):
+            return jsonify({"success": False, "message": "Nevalidan status"}), 400
+        aktivan = aktivan.lower() in ("true", "1")
+    else:
+        aktivan = None
+
+    fields = parse_fields(request.args.get("fields")) or DIRECTORY_FIELDS
     user_service = UserService()
-    users = user_service.get_all_users()
-    return jsonify({"success": True, "data": [u.to_dict() for u in users]}), 200
+    users, next_cursor = user_service.search_users(
+        q=request.args.get("q"),
+        uloga=uloga or None,
+        aktivan=aktivan,
+        cursor=request.args.get("cursor", type=int),
+        limit=request.args.get("limit", type=int),
+        fields=fields,
+    )
+    return jsonify({
+        "success": True,
+        "data": [u.to_dict(fields=fields) for u in users],
+        "next_cursor": next_cursor,
+    }), 200
 
 
 @user_bp.route("/<int:user_id>", methods=["GET"])
@@ -40,6 +81,26 @@ def get_user(user_id: int):
     return jsonify({"success": True, "data": user.to_dict()}), 200
 
 
+@user_bp.route("/<int:user_id>/avatar", methods=["GET"])
+def get_avatar(user_id: int):
+    # Javna ruta (koristi se iz <img>); hash u "v" parametru služi kao
+    # verzija i kao zaštita od pogađanja tuđih slika po ID-u
+    size = "original" if request.args.get("size") == "original" else "thumb"
+    image = ProfileImageService().get_image(user_id, request.args.get("v", ""), size)
+    if not image:
+        return jsonify({"success": False, "message": "Slika nije pronadjena"}), 404
+
+    content, content_type, image_hash = image
+    etag = f'"{image_hash[:32]}-{size}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        return current_app.response_class(status=304, headers=headers)
+    return current_app.response_class(content, mimetype=content_type, headers=headers)
+
+
 @user_bp.route("/<int:user_id>", methods=["PUT"])
 @jwt_required()
 def update_user(user_id: int):
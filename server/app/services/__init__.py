@@ -2,5 +2,6 @@
 
 from app.services.auth_service import AuthService, TokenBlacklistService
 from app.services.user_service import UserService
+from app.services.profile_image_service import ProfileImageService
 
-__all__ = ['AuthService', 'TokenBlacklistService', 'UserService']
\ No newline at end of file
+__all__ = ['AuthService', 'TokenBlacklistService', 'UserService', 'ProfileImageService']
\ No newline at end of file
@@ -1,16 +1,69 @@
 # server/app/services/auth_service.py
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Tuple, Optional
-import redis
 import os
+import threading
+import time
+import uuid
 
 from flask import current_app
 
 from app import db
-from app.models import User, UserRole, LoginAttempt, AccountLock
+from app.models import User, UserRole, AccountLock
 from app.dto import RegisterUserDTO, LoginDTO
 from app.utils import hash_password, verify_password
+from app.services.profile_image_service import ProfileImageService
+from app.utils.redis_client import get_redis
+from app.utils.bloom import BloomFilter
+from app.utils import user_cache
+from app.tasks.login_audit import login_audit_writer
+
+
+# Provera zaključavanja i opcioni klizni prozor po IP adresi u jednom
+# atomskom koraku. Brojač pokušaja se ovde ne dira: uspešne prijave
+# (i paralelne) ne smeju da zaključaju nalog.
+# Vraća {0, 0}, {1, ttl_zakljucavanja} ili {2, sekundi_do_slobodnog_mesta}.
+_BEGIN_ATTEMPT_LUA = """
+local lock_ttl = redis.call('TTL', KEYS[1])
+if lock_ttl > 0 then
+    return {1, lock_ttl}
+end
+
+local ip_limit = tonumber(ARGV[1])
+if ip_limit > 0 then
+    local now = tonumber(ARGV[3])
+    local window_ms = tonumber(ARGV[2]) * 1000
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], 0, now - window_ms)
+    if redis.call('ZCARD', KEYS[2]) >= ip_limit then
+        local oldest = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+        return {2, math.max(1, math.ceil((tonumber(oldest[2]) + window_ms - now) / 1000))}
+    end
+    redis.call('ZADD', KEYS[2], now, ARGV[4])
+    redis.call('PEXPIRE', KEYS[2], window_ms)
+end
+return {0, 0}
+"""
+
+# Neuspešan pokušaj: atomski uvećava brojač i zaključava nalog kada je
+# dostignut maksimum. Vraća broj preostalih pokušaja.
+_RECORD_FAILURE_LUA = """
+if redis.call('TTL', KEYS[1]) > 0 then
+    return 0
+end
+local attempts = redis.call('INCR', KEYS[2])
+if attempts == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+local max_attempts = tonumber(ARGV[1])
+if attempts >= max_attempts then
+    redis.call('SETEX', KEYS[1], ARGV[2], '1')
+    redis.call('DEL', KEYS[2])
+    return 0
+end
+return max_attempts - attempts
+"""
 
 
 class AuthService:
@@ -19,11 +72,18 @@ class AuthService:
     # Konstante za lockout
     MAX_FAILED_ATTEMPTS = 3
     LOCKOUT_SECONDS = int(os.getenv('LOCK_SECONDS', '60'))
+    # Brojač pokušaja se resetuje nakon 5 minuta neaktivnosti
+    ATTEMPTS_WINDOW_SECONDS = 300
+    # Opcioni limit po IP adresi (0 = isključeno)
+    IP_LIMIT = int(os.getenv('LOGIN_IP_LIMIT', '0'))
+    IP_WINDOW_SECONDS = int(os.getenv('LOGIN_IP_WINDOW_SECONDS', '60'))
+
+    _begin_script = None
+    _fail_script = None
 
     def __init__(self):
-        """Inicijalizacija servisa sa Redis konekcijom."""
-        redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        """Inicijalizacija servisa sa deljenim Redis klijentom."""
+        self.redis_client = get_redis()
 
     def _get_lockout_key(self, email: str) -> str:
         """Vraća Redis ključ za lockout."""
@@ -33,52 +93,58 @@ class AuthService:
         """Vraća Redis ključ za broj pokušaja."""
         return f"login_attempts:{email}"
 
-    def _is_locked_out(self, email: str) -> Tuple[bool, int]:
+    def _get_ip_window_key(self, ip_address: Optional[str]) -> str:
+        """Vraća Redis ključ za klizni prozor pokušaja sa jedne IP adrese."""
+        return f"login_ip_window:{ip_address or 'unknown'}"
+
+    def _scripts(self):
+        """Registruje Lua skripte jednom po procesu (redis-py koristi EVALSHA)."""
+        cls = AuthService
+        if cls._begin_script is None:
+            cls._begin_script = self.redis_client.register_script(_BEGIN_ATTEMPT_LUA)
+            cls._fail_script = self.redis_client.register_script(_RECORD_FAILURE_LUA)
+        return cls._begin_script, cls._fail_script
+
+    def _begin_attempt(self, email: str, ip_address: Optional[str]) -> Tuple[Optional[str], int]:
         """
-        Proverava da li je korisnik zaključan.
+        Atomski proverava zaključavanje i limit po IP adresi.
+        Jedan round trip ka Redis-u; neuspesi se broje tek u _record_failed_attempt.
         
         Returns:
-            Tuple (is_locked, remaining_seconds)
+            Tuple (razlog_odbijanja, remaining_seconds) - razlog je None,
+            'lockout' ili 'ip_limit'
         """
-        lockout_key = self._get_lockout_key(email)
-        ttl = self.redis_client.ttl(lockout_key)
-        
-        if ttl > 0:
-            return True, ttl
-        return False, 0
+        begin_script, _ = self._scripts()
+        now_ms = int(time.time() * 1000)
+        status, value = begin_script(
+            keys=[self._get_lockout_key(email),
+                  self._get_ip_window_key(ip_address)],
+            args=[self.IP_LIMIT, self.IP_WINDOW_SECONDS,
+                  now_ms, f"{now_ms}:{uuid.uuid4().hex[:8]}"]
+        )
+        if status == 1:
+            return 'lockout', int(value)
+        if status == 2:
+            return 'ip_limit', int(value)
+        return None, 0
 
     def _record_failed_attempt(self, email: str) -> int:
         """
-        Beleži neuspešan pokušaj prijave.
+        Atomski beleži neuspešan pokušaj prijave i zaključava nalog
+        kada se dostigne maksimum.
         
         Returns:
             Broj preostalih pokušaja pre zaključavanja
         """
-        attempts_key = self._get_attempts_key(email)
-        
-        # Inkrementiraj broj pokušaja
-        attempts = self.redis_client.incr(attempts_key)
-        
-        # Postavi TTL na ključ ako je prvi pokušaj (resetuje se nakon 5 minuta neaktivnosti)
-        if attempts == 1:
-            self.redis_client.expire(attempts_key, 300)  # 5 minuta
-        
-        # Ako je dostignut maksimum, zaključaj nalog
-        if attempts >= self.MAX_FAILED_ATTEMPTS:
-            lockout_key = self._get_lockout_key(email)
-            self.redis_client.setex(lockout_key, self.LOCKOUT_SECONDS, "1")
-            # Resetuj brojač pokušaja
-            self.redis_client.delete(attempts_key)
-            return 0
-        
-        return self.MAX_FAILED_ATTEMPTS - attempts
+        _, fail_script = self._scripts()
+        return int(fail_script(
+            keys=[self._get_lockout_key(email), self._get_attempts_key(email)],
+            args=[self.MAX_FAILED_ATTEMPTS, self.LOCKOUT_SECONDS, self.ATTEMPTS_WINDOW_SECONDS]
+        ))
 
     def _clear_failed_attempts(self, email: str) -> None:
         """Briše sve neuspešne pokušaje nakon uspešne prijave."""
-        attempts_key = self._get_attempts_key(email)
-        lockout_key = self._get_lockout_key(email)
-        self.redis_client.delete(attempts_key)
-        self.redis_client.delete(lockout_key)
+        self.redis_client.delete(self._get_attempts_key(email), self._get_lockout_key(email))
 
     def register(self, dto: RegisterUserDTO) -> Tuple[bool, str, Optional[dict]]:
         errors = dto.validate()
@@ -89,6 +155,11 @@ class AuthService:
         if existing:
             return False, "Email vec postoji", None
 
+        try:
+            profilna_slika = ProfileImageService().resolve(dto.profilna_slika)
+        except ValueError as e:
+            return False, str(e), None
+
         user = User(
             ime=dto.ime,
             prezime=dto.prezime,
@@ -100,7 +171,7 @@ class AuthService:
             ulica=dto.ulica,
             broj=dto.broj,
             stanje_racuna=dto.stanje_racuna,
-            profilna_slika=dto.profilna_slika,
+            profilna_slika=profilna_slika,
             uloga=UserRole.KORISNIK,
             aktivan=True,
         )
@@ -108,6 +179,8 @@ class AuthService:
         try:
             db.session.add(user)
             db.session.commit()
+            # Briše i eventualno keširan "ne postoji" za ovaj ID
+            user_cache.invalidate(user.id)
             return True, "Registracija uspesna", user.to_dict()
         except Exception as e:
             db.session.rollback()
@@ -118,9 +191,11 @@ class AuthService:
         if errors:
             return False, ", ".join(errors), None
 
-        # Proveri da li je nalog zaključan
-        is_locked, remaining_seconds = self._is_locked_out(dto.email)
-        if is_locked:
+        # Proveri da li je nalog zaključan i limit po IP adresi
+        rejected, remaining_seconds = self._begin_attempt(dto.email, ip_address)
+        if rejected == 'ip_limit':
+            return False, f"Previše pokušaja prijave sa ove adrese. Pokušajte ponovo za {remaining_seconds} sekundi.", None
+        if rejected:
             return False, f"Nalog je zaključan. Pokušajte ponovo za {remaining_seconds} sekundi.", None
 
         user = User.query.filter_by(email=dto.email).first()
@@ -144,6 +219,8 @@ class AuthService:
             return False, f"Pogrešna lozinka. Preostalo pokušaja: {attempts_left}", None
 
         if not user.aktivan:
+            # Lozinka je ispravna - prethodni neuspesi se brišu
+            self._clear_failed_attempts(dto.email)
             return False, "Nalog je deaktiviran. Kontaktirajte administratora.", None
 
         # Uspešna prijava - očisti sve neuspešne pokušaje
@@ -153,26 +230,84 @@ class AuthService:
         return True, "Prijava uspesna", user
 
     def _record_login_attempt(self, email: str, ip_address: Optional[str], success: bool) -> None:
-        """Beleži pokušaj prijave u bazu za audit."""
-        try:
-            attempt = LoginAttempt(
-                email=email,
-                ip_adresa=ip_address,
-                uspesno=success,
-            )
-            db.session.add(attempt)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        """
+        Beleži pokušaj prijave za audit.
+        Upis ide u pozadinski red i u bazu se upisuje u serijama.
+        """
+        login_audit_writer.record(current_app._get_current_object(), email, ip_address, success)
+
+
+class _RevocationCache:
+    """
+    Mali in-process keš rezultata provere blacklist-e (jti -> revociran).
+    Ograničen je brojem unosa; najstariji unosi se izbacuju prvi.
+    """
+
+    def __init__(self, max_entries: int = 50000):
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def get(self, jti: str) -> Optional[bool]:
+        entry = self._entries.get(jti)
+        if entry is None:
+            return None
+        revoked, expires_at = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._entries.pop(jti, None)
+            return None
+        return revoked
+
+    def put(self, jti: str, revoked: bool, ttl: float) -> None:
+        """
+        Upisuje rezultat. Negativan rezultat ne zamenjuje važeću revokaciju:
+        provera je mogla da pročita Redis pre nego što je listener upisao
+        odjavu, pa bi je inače pregazila.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not revoked:
+                entry = self._entries.get(jti)
+                if entry is not None and entry[0] and entry[1] >= now:
+                    return
+            self._entries[jti] = (revoked, now + ttl)
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
 
 
 class TokenBlacklistService:
-    """Servis za upravljanje blacklist-om JWT tokena."""
-    
+    """
+    Servis za upravljanje blacklist-om JWT tokena.
+
+    Provera se radi u tri sloja: lokalni keš, opcioni Bloom filter
+    revociranih jti-jeva i tek onda Redis. Odjava se objavljuje preko
+    Redis pub/sub kanala, pa svi procesi odmah upisuju revokaciju u svoj
+    keš i negativni rezultati mogu bezbedno da se keširaju duže.
+    """
+
+    CHANNEL = 'token_blacklist'
+    # Koliko dugo važi keširan "nije revociran" odgovor
+    NEGATIVE_TTL = float(os.getenv('TOKEN_BLACKLIST_CACHE_SECONDS', '30'))
+    # Kraći TTL dok pub/sub listener nije povezan (nema push invalidacije)
+    FALLBACK_NEGATIVE_TTL = 2.0
+    BLOOM_ENABLED = os.getenv('TOKEN_BLACKLIST_BLOOM', 'false').lower() == 'true'
+    BLOOM_CAPACITY = int(os.getenv('TOKEN_BLACKLIST_BLOOM_CAPACITY', '100000'))
+
+    _cache = _RevocationCache()
+    _bloom = None
+    _listener_ready = False
+    _listener_started = False
+    _listener_lock = threading.Lock()
+
     def __init__(self):
-        """Inicijalizacija servisa sa Redis konekcijom."""
-        redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        """Inicijalizacija servisa sa deljenim Redis klijentom."""
+        self.redis_client = get_redis()
 
     def _get_blacklist_key(self, jti: str) -> str:
         """Vraća Redis ključ za blacklistani token."""
@@ -180,7 +315,7 @@ class TokenBlacklistService:
 
     def blacklist_token(self, jti: str, expires_in: int = 86400) -> bool:
         """
-        Dodaje token na blacklist.
+        Dodaje token na blacklist i obaveštava ostale procese.
         
         Args:
             jti: Jedinstveni identifikator tokena
@@ -191,7 +326,11 @@ class TokenBlacklistService:
         """
         try:
             key = self._get_blacklist_key(jti)
-            self.redis_client.setex(key, expires_in, "1")
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(key, expires_in, "1")
+            pipe.publish(self.CHANNEL, f"{jti}:{expires_in}")
+            pipe.execute()
+            self._remember_revoked(jti, expires_in)
             return True
         except Exception as e:
             print(f"[TOKEN BLACKLIST] Greška pri blacklistanju tokena: {str(e)}")
@@ -207,11 +346,85 @@ class TokenBlacklistService:
         Returns:
             True ako je token blacklistovan
         """
+        cls = TokenBlacklistService
+        cached = cls._cache.get(jti)
+        if cached is not None:
+            return cached
+
+        # Bloom filter je pouzdan samo dok je listener povezan i filter napunjen
+        if cls._listener_ready and cls._bloom is not None and jti not in cls._bloom:
+            cls._cache.put(jti, False, cls.NEGATIVE_TTL)
+            return False
+
         try:
             key = self._get_blacklist_key(jti)
-            return self.redis_client.exists(key) > 0
+            revoked = self.redis_client.exists(key) > 0
         except Exception as e:
             print(f"[TOKEN BLACKLIST] Greška pri proveri tokena: {str(e)}")
             # U slučaju greške, pretpostavi da token nije blacklistovan
             # da ne bi blokirali legitimne korisnike
-            return False
\ No newline at end of file
+            return False
+
+        if revoked:
+            cls._cache.put(jti, True, 86400)
+        else:
+            ttl = cls.NEGATIVE_TTL if cls._listener_ready else cls.FALLBACK_NEGATIVE_TTL
+            cls._cache.put(jti, False, ttl)
+        return revoked
+
+    @classmethod
+    def _remember_revoked(cls, jti: str, expires_in: int) -> None:
+        cls._cache.put(jti, True, expires_in)
+        if cls._bloom is not None:
+            cls._bloom.add(jti)
+
+    @classmethod
+    def start_listener(cls) -> None:
+        """
+        Pokreće pozadinski listener za pub/sub invalidaciju (jednom po procesu).
+        """
+        with cls._listener_lock:
+            if cls._listener_started:
+                return
+            cls._listener_started = True
+
+        thread = threading.Thread(target=cls._listen_forever, daemon=True)
+        thread.start()
+        print('[TOKEN BLACKLIST] Listener za invalidaciju pokrenut')
+
+    @classmethod
+    def _listen_forever(cls) -> None:
+        while True:
+            pubsub = None
+            try:
+                client = get_redis()
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.CHANNEL)
+
+                # Posle (re)konekcije keš može da sadrži zastarele negativne
+                # odgovore, a Bloom filter se puni iznova iz Redis-a. Pretplata
+                # ide pre skeniranja, pa nijedna odjava ne može da promakne.
+                cls._cache.clear()
+                if cls.BLOOM_ENABLED:
+                    bloom = BloomFilter(cls.BLOOM_CAPACITY)
+                    for key in client.scan_iter(match='token_blacklist:*', count=1000):
+                        bloom.add(key.split(':', 1)[1])
+                    cls._bloom = bloom
+                cls._listener_ready = True
+
+                for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    jti, _, expires_in = str(message['data']).rpartition(':')
+                    if jti:
+                        cls._remember_revoked(jti, int(expires_in or 86400))
+            except Exception as e:
+                print(f'[TOKEN BLACKLIST] Listener prekinut: {str(e)}')
+            finally:
+                cls._listener_ready = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(5)
@@ -0,0 +1,179 @@
+# server/app/services/profile_image_service.py
+
+import base64
+import binascii
+import hashlib
+import os
+from io import BytesIO
+from typing import Tuple, Optional
+
+from sqlalchemy.orm import load_only, undefer
+
+from app import db
+from app.models import User, ProfileImage
+from app.models.user import IMAGE_HASH_PREFIX
+
+THUMBNAIL_SIZE = int(os.getenv('PROFILE_THUMBNAIL_SIZE', '128'))
+
+
+def _decode_image(value: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Dekodira base64 sliku (sa ili bez data: prefiksa).
+
+    Returns:
+        Tuple (sadrzaj, content_type) ili None ako vrednost nije validna
+    """
+    content_type = 'image/jpeg'
+    payload = value.strip()
+    if payload.startswith('data:'):
+        header, _, payload = payload.partition(',')
+        content_type = header[5:].split(';')[0] or content_type
+    # Strogo dekodiranje: putanja ili oštećen data URI nisu slika
+    payload = ''.join(payload.split())
+    try:
+        content = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if not content:
+        return None
+    return content, content_type
+
+
+def _make_thumbnail(content: bytes) -> Optional[Tuple[bytes, str]]:
+    """
+    Pravi mali thumbnail slike.
+    Ako Pillow nije instaliran ili slika nije čitljiva, vraća None
+    i servira se original.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        print('[PROFILE IMAGE] Pillow nije instaliran. Thumbnail nije generisan.')
+        return None
+
+    try:
+        with Image.open(BytesIO(content)) as image:
+            image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            buffer = BytesIO()
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image.save(buffer, format='PNG', optimize=True)
+                return buffer.getvalue(), 'image/png'
+            image.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True)
+            return buffer.getvalue(), 'image/jpeg'
+    except Exception as e:
+        print(f'[PROFILE IMAGE] Greška pri pravljenju thumbnail-a: {str(e)}')
+        return None
+
+
+class ProfileImageService:
+    """Servis za čuvanje i serviranje profilnih slika."""
+
+    def resolve(self, value: Optional[str], current: Optional[str] = None) -> Optional[str]:
+        """
+        Pretvara sliku poslatu od klijenta u vrednost za User.profilna_slika.
+
+        Base64 slika se čuva jednom u profile_images (sa thumbnail-om),
+        a korisnik dobija samo 'sha256:<hash>' referencu. Ako klijent
+        vrati URL koji je dobio od nas, slika ostaje nepromenjena.
+
+        Args:
+            value: base64 slika, prazan string (brisanje) ili naš URL
+            current: trenutna vrednost User.profilna_slika
+
+        Returns:
+            Nova vrednost za User.profilna_slika
+
+        Raises:
+            ValueError: ako vrednost nije validna base64 slika
+        """
+        if value is None:
+            return current
+        value = value.strip()
+        if not value:
+            return None
+        if '/avatar?v=' in value:
+            return current
+
+        decoded = _decode_image(value)
+        if decoded is None:
+            raise ValueError('Profilna slika mora biti base64 slika')
+        content, content_type = decoded
+        digest = hashlib.sha256(content).hexdigest()
+
+        exists = ProfileImage.query.options(load_only(ProfileImage.hash)).get(digest)
+        if not exists:
+            thumbnail = _make_thumbnail(content)
+            db.session.add(ProfileImage(
+                hash=digest,
+                content_type=content_type,
+                original=content,
+                thumbnail=thumbnail[0] if thumbnail else None,
+                thumbnail_content_type=thumbnail[1] if thumbnail else None,
+                velicina=len(content),
+            ))
+        return f'{IMAGE_HASH_PREFIX}{digest}'
+
+    def get_image(self, user_id: int, version: str, size: str = 'thumb') -> Optional[Tuple[bytes, str, str]]:
+        """
+        Vraća sadržaj profilne slike korisnika.
+
+        Args:
+            user_id: ID korisnika
+            version: prefiks hash-a iz URL-a (mora da se poklapa)
+            size: 'thumb' ili 'original'
+
+        Returns:
+            Tuple (sadrzaj, content_type, hash) ili None
+        """
+        user = User.query.options(load_only(User.id, User.profilna_slika)).get(user_id)
+        image_hash = user.profilna_slika_hash if user else None
+        if not image_hash or not version or not image_hash.startswith(version):
+            return None
+
+        column = ProfileImage.thumbnail if size == 'thumb' else ProfileImage.original
+        image = ProfileImage.query.options(undefer(column)).get(image_hash)
+        if not image:
+            return None
+
+        if size == 'thumb' and image.thumbnail:
+            return image.thumbnail, image.thumbnail_content_type, image.hash
+        if size == 'thumb':
+            # Nema thumbnail-a (npr. bez Pillow-a) - serviraj original
+            image = ProfileImage.query.options(undefer(ProfileImage.original)).get(image_hash)
+        return image.original, image.content_type, image.hash
+
+    def migrate_inline_images(self, batch_size: int = 20) -> int:
+        """
+        Prebacuje stare base64 slike iz users.profilna_slika u profile_images.
+        Poziva se pri pokretanju servera; obrađuje korisnike u malim serijama
+        da se ne bi odjednom učitale sve slike. Vrednosti koje nisu base64
+        slika ostaju netaknute.
+
+        Returns:
+            Broj migriranih korisnika
+        """
+        migrated = 0
+        last_id = 0
+        while True:
+            ids = [row.id for row in db.session.query(User.id).filter(
+                User.id > last_id,
+                User.profilna_slika.isnot(None),
+                ~User.profilna_slika.like(f'{IMAGE_HASH_PREFIX}%')
+            ).order_by(User.id).limit(batch_size)]
+            if not ids:
+                break
+
+            for user in User.query.filter(User.id.in_(ids)).all():
+                try:
+                    resolved = self.resolve(user.profilna_slika, current=user.profilna_slika)
+                except ValueError:
+                    resolved = user.profilna_slika
+                if resolved == user.profilna_slika:
+                    print(f'[PROFILE IMAGE] Slika korisnika {user.id} nije base64, ostaje nepromenjena.')
+                    continue
+                user.profilna_slika = resolved
+                migrated += 1
+            db.session.commit()
+            db.session.expunge_all()
+            last_id = ids[-1]
+        return migrated
@@ -3,25 +3,62 @@
 from typing import Tuple, Optional, List
 from decimal import Decimal
 
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
 from app import db
-from app.models import User, UserRole
+from app.models import User, UserRole, BalanceLedger
 from app.dto import UpdateUserDTO, ChangeRoleDTO, DepositDTO
 from app.utils import send_role_change_email, hash_password
+from app.services.profile_image_service import ProfileImageService
+from app.utils import user_cache
+
+# Admin imenik korisnika: veličina strane i podrazumevana projekcija
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DIRECTORY_FIELDS = {
+    'id', 'ime', 'prezime', 'email', 'uloga', 'aktivan',
+    'stanje_racuna', 'profilna_slika', 'drzava', 'kreiran',
+}
+
 
 class UserService:
     """Servis za upravljanje korisnicima."""
     
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
+    def get_user_by_id(self, user_id: int, fields: Optional[set] = None) -> Optional[User]:
         """
         Vraća korisnika po ID-u.
         
         Args:
             user_id: ID korisnika
+            fields: Opcioni skup polja za projekciju kolona
             
         Returns:
             User objekat ili None
         """
-        return User.query.get(user_id)
+        query = User.query
+        if fields:
+            query = query.options(User.load_only_for(fields))
+        return query.get(user_id)
+    
+    def get_user_summary(self, user_id: int) -> Optional[dict]:
+        """
+        Vraća sažetak korisnika (user_cache.SUMMARY_FIELDS) preko
+        read-through Redis keša. Pri promašaju se čitaju samo kolone
+        sažetka, bez slike i ostatka reda.
+        
+        Args:
+            user_id: ID korisnika
+            
+        Returns:
+            Rečnik sažetka ili None ako korisnik ne postoji
+        """
+        return user_cache.get_summary(user_id, self._load_summary)
+    
+    @staticmethod
+    def _load_summary(user_id: int) -> Optional[dict]:
+        user = User.query.options(User.load_only_for(set(user_cache.SUMMARY_FIELDS))).get(user_id)
+        return user.to_dict(fields=set(user_cache.SUMMARY_FIELDS)) if user else None
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """
@@ -35,14 +72,74 @@ class UserService:
         """
         return User.query.filter_by(email=email).first()
     
-    def get_all_users(self) -> List[User]:
+    def search_users(self, q: Optional[str] = None, uloga: Optional[UserRole] = None,
+                     aktivan: Optional[bool] = None, cursor: Optional[int] = None,
+                     limit: int = DEFAULT_PAGE_SIZE,
+                     fields: Optional[set] = None) -> Tuple[List[User], Optional[int]]:
         """
-        Vraća sve korisnike.
+        Strana korisnika za admin imenik (od najnovijeg).
         
+        Pretraga je po prefiksu imena, prezimena ili email-a, pa svaka
+        grana koristi svoj indeks (bez LIKE '%...%' skeniranja tabele).
+        Paginacija je po kursoru (id < cursor), bez OFFSET-a, pa je cena
+        strane ista bez obzira na broj korisnika i dubinu listanja.
+        
+        Args:
+            q: Prefiks za pretragu (opciono)
+            uloga: Filter po ulozi (opciono)
+            aktivan: Filter po statusu naloga (opciono)
+            cursor: next_cursor iz prethodne strane
+            limit: Veličina strane (najviše MAX_PAGE_SIZE)
+            fields: Skup polja za projekciju (podrazumevano DIRECTORY_FIELDS)
+            
         Returns:
-            Lista User objekata
+            Tuple (korisnici, sledeci_kursor)
         """
-        return User.query.all()
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        query = User.query.options(User.load_only_for(fields or DIRECTORY_FIELDS))
+        
+        q = (q or '').strip()
+        if q:
+            # Džoker znaci iz unosa se traže doslovno
+            prefix = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            query = query.filter(or_(
+                User.ime.like(prefix, escape='\\'),
+                User.prezime.like(prefix, escape='\\'),
+                User.email.like(prefix, escape='\\'),
+            ))
+        if uloga is not None:
+            query = query.filter(User.uloga == uloga)
+        if aktivan is not None:
+            query = query.filter(User.aktivan == aktivan)
+        if cursor is not None:
+            query = query.filter(User.id < cursor)
+        
+        # Jedan red više od limita govori da postoji sledeća strana
+        users = query.order_by(User.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = users[-1].id
+        return users, next_cursor
+    
+    def get_users_by_ids(self, user_ids: List[int], fields: Optional[set] = None) -> List[User]:
+        """
+        Vraća više korisnika jednim upitom (IN po primarnom ključu).
+        
+        Args:
+            user_ids: Lista ID-jeva korisnika
+            fields: Opcioni skup polja za projekciju kolona
+            
+        Returns:
+            Lista pronađenih User objekata
+        """
+        ids = sorted({int(uid) for uid in user_ids})
+        if not ids:
+            return []
+        query = User.query.filter(User.id.in_(ids))
+        if fields:
+            query = query.options(User.load_only_for(fields))
+        return query.all()
     
     def update_user(self, user_id: int, dto: UpdateUserDTO) -> Tuple[bool, str, Optional[dict]]:
         """
@@ -86,10 +183,15 @@ class UserService:
         if dto.broj is not None:
             user.broj = dto.broj
         if dto.profilna_slika is not None:
-            user.profilna_slika = dto.profilna_slika
+            try:
+                user.profilna_slika = ProfileImageService().resolve(dto.profilna_slika, user.profilna_slika)
+            except ValueError as e:
+                db.session.rollback()
+                return False, str(e), None
         
         try:
             db.session.commit()
+            user_cache.invalidate(user_id)
             return True, 'Profil uspešno ažuriran', user.to_dict()
         except Exception as e:
             db.session.rollback()
@@ -129,6 +231,7 @@ class UserService:
             return False, 'Ne možete promeniti ulogu u vec postojecu ', None
         try:
             db.session.commit()
+            user_cache.invalidate(user.id)
             
             # Slanje email obaveštenja o promeni uloge
             if user.uloga == UserRole.MENADZER:
@@ -164,6 +267,7 @@ class UserService:
         try:
             db.session.delete(user)
             db.session.commit()
+            user_cache.invalidate(user_id)
             return True, 'Korisnik uspešno obrisan'
         except Exception as e:
             db.session.rollback()
@@ -184,66 +288,100 @@ class UserService:
         if errors:
             return False, ', '.join(errors), None
         
-        user = User.query.get(user_id)
-        if not user:
-            return False, 'Korisnik nije pronađen', None
-        
-        user.stanje_racuna = Decimal(str(user.stanje_racuna)) + Decimal(str(dto.iznos))
+        success, message = self._apply_balance_change(user_id, Decimal(str(dto.iznos)), 'UPLATA')
+        if not success:
+            return False, message, None
         
-        try:
-            db.session.commit()
-            return True, f'Uspešno uplaćeno {dto.iznos}', float(user.stanje_racuna)
-        except Exception as e:
-            db.session.rollback()
-            return False, f'Greška pri uplati: {str(e)}', None
+        stanje = db.session.query(User.stanje_racuna).filter(User.id == user_id).scalar()
+        return True, f'Uspešno uplaćeno {dto.iznos}', float(stanje)
     
-    def deduct_balance(self, user_id: int, amount: float) -> Tuple[bool, str]:
+    def deduct_balance(self, user_id: int, amount: float,
+                       idempotency_key: Optional[str] = None) -> Tuple[bool, str]:
         """
         Oduzima sredstva sa računa korisnika.
         
         Args:
             user_id: ID korisnika
             amount: Iznos za oduzimanje
+            idempotency_key: Ključ ponovljenog poziva (primenjuje se jednom)
             
         Returns:
             Tuple (success, message)
         """
-        user = User.query.get(user_id)
-        if not user:
-            return False, 'Korisnik nije pronađen'
-        
-        if float(user.stanje_racuna) < amount:
-            return False, 'Nedovoljno sredstava na računu'
-        
-        user.stanje_racuna = Decimal(str(user.stanje_racuna)) - Decimal(str(amount))
-        
-        try:
-            db.session.commit()
-            return True, 'Sredstva uspešno oduzeta'
-        except Exception as e:
-            db.session.rollback()
-            return False, f'Greška pri transakciji: {str(e)}'
+        success, message = self._apply_balance_change(
+            user_id, -Decimal(str(amount)), 'KUPOVINA', idempotency_key
+        )
+        return success, 'Sredstva uspešno oduzeta' if success else message
     
-    def refund_balance(self, user_id: int, amount: float) -> Tuple[bool, str]:
+    def refund_balance(self, user_id: int, amount: float,
+                       idempotency_key: Optional[str] = None) -> Tuple[bool, str]:
         """
         Vraća sredstva na račun korisnika (refund).
         
         Args:
             user_id: ID korisnika
             amount: Iznos za vraćanje
+            idempotency_key: Ključ ponovljenog poziva (primenjuje se jednom)
             
         Returns:
             Tuple (success, message)
         """
-        user = User.query.get(user_id)
-        if not user:
-            return False, 'Korisnik nije pronađen'
-        
-        user.stanje_racuna = Decimal(str(user.stanje_racuna)) + Decimal(str(amount))
-        
+        success, message = self._apply_balance_change(
+            user_id, Decimal(str(amount)), 'REFUND', idempotency_key
+        )
+        return success, 'Sredstva uspešno vraćena' if success else message
+
+    def _apply_balance_change(self, user_id: int, delta: Decimal, tip: str,
+                              idempotency_key: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Menja stanje računa jednim uslovnim UPDATE-om i upisuje red u ledger.
+
+        Ledger red se upisuje prvi: paralelni poziv sa istim ključem čeka na
+        jedinstveni indeks i zatim dobija IntegrityError, pa nikada ne stigne
+        do UPDATE-a. Za isplatu UPDATE ima uslov stanje_racuna >= iznos,
+        tako da stanje ne može da ode u minus ni pod konkurentnim kupovinama.
+
+        Returns:
+            Tuple (success, message)
+        """
+        if idempotency_key and self._ledger_entry_exists(idempotency_key):
+            return True, 'Transakcija je već izvršena'
+
         try:
+            db.session.add(BalanceLedger(
+                user_id=user_id,
+                iznos=delta,
+                tip=tip,
+                idempotency_key=idempotency_key,
+            ))
+            db.session.flush()
+
+            query = User.query.filter(User.id == user_id)
+            if delta < 0:
+                query = query.filter(User.stanje_racuna >= -delta)
+            updated = query.update(
+                {User.stanje_racuna: User.stanje_racuna + delta},
+                synchronize_session=False
+            )
+            if not updated:
+                db.session.rollback()
+                if not db.session.query(User.id).filter(User.id == user_id).first():
+                    return False, 'Korisnik nije pronađen'
+                return False, 'Nedovoljno sredstava na računu'
+
             db.session.commit()
-            return True, 'Sredstva uspešno vraćena'
+            user_cache.invalidate(user_id)
+            return True, 'Transakcija uspešna'
+        except IntegrityError as e:
+            db.session.rollback()
+            if idempotency_key and self._ledger_entry_exists(idempotency_key):
+                return True, 'Transakcija je već izvršena'
+            return False, f'Greška pri transakciji: {str(e)}'
         except Exception as e:
             db.session.rollback()
             return False, f'Greška pri transakciji: {str(e)}'
+
+    def _ledger_entry_exists(self, idempotency_key: str) -> bool:
+        return db.session.query(BalanceLedger.id).filter(
+            BalanceLedger.idempotency_key == idempotency_key
+        ).first() is not None
@@ -0,0 +1,236 @@
+# server/app/tasks/email_dispatcher.py
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import undefer
+
+from app import db
+from app.models import EmailOutbox, EmailStatus
+from app.utils.email import build_message
+from app.utils.redis_client import get_redis
+from app.utils.smtp_pool import get_smtp_pool
+
+BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '20'))
+MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '6'))
+BASE_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+POLL_INTERVAL = float(os.getenv('EMAIL_POLL_SECONDS', '2'))
+# Rok zakupa preuzetog emaila; posle isteka ga preuzima sledeći prolaz
+LEASE_SECONDS = int(os.getenv('EMAIL_LEASE_SECONDS', '300'))
+# Oznaka poslatog emaila u Redis-u (štiti od ponovnog slanja)
+SENT_MARKER_PREFIX = 'email_outbox:sent:'
+SENT_MARKER_TTL = 24 * 3600
+# Koliko dugo se čuvaju poslati emailovi
+RETENTION_DAYS = int(os.getenv('EMAIL_RETENTION_DAYS', '7'))
+
+
+class EmailDispatcher:
+    """
+    Jedan dugoživeći dispečer koji šalje emailove iz email_outbox tabele.
+
+    Serije se preuzimaju sa FOR UPDATE SKIP LOCKED (bezbedno i sa više
+    procesa) i zakupom koji se commit-uje pre slanja, šalju preko pooled
+    SMTP konekcija, a ishod svakog emaila se commit-uje zasebno. Neuspeli
+    emailovi dobijaju eksponencijalni backoff. Posle MAX_ATTEMPTS email prelazi u DEAD
+    (dead-letter) i više se ne pokušava.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._last_purge = 0.0
+        # Metrike procesa
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+        self.batches = 0
+        self.last_batch_seconds = 0.0
+
+    def start(self, app) -> None:
+        """Pokreće dispečer (jednom po procesu)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = app
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        print(f'[EMAIL] Dispečer pokrenut - serija {BATCH_SIZE}, interval {POLL_INTERVAL}s')
+
+    def _run(self) -> None:
+        while True:
+            processed = 0
+            with self._app.app_context():
+                try:
+                    processed = self.dispatch_batch()
+                    if time.time() - self._last_purge > 3600:
+                        self._last_purge = time.time()
+                        self.purge_sent()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f'[EMAIL] Greška u dispečeru: {str(e)}')
+                finally:
+                    db.session.remove()
+            if processed < BATCH_SIZE:
+                time.sleep(POLL_INTERVAL)
+
+    def dispatch_batch(self) -> int:
+        """
+        Šalje jednu seriju dospelih emailova.
+
+        Preuzimanje (SENDING + rok zakupa) se commit-uje pre slanja, pa se
+        redovi ne drže zaključani tokom SMTP razgovora. Posle svakog slanja
+        se zasebno commit-uje SENT; pad tog commit-a utiče samo na taj email,
+        a oznaka u Redis-u sprečava da se pri ponovnom preuzimanju pošalje
+        drugi put.
+
+        Returns:
+            Broj obrađenih emailova
+        """
+        started = time.monotonic()
+        emails = self._claim_batch()
+        if not emails:
+            return 0
+
+        smtp_configured = bool(os.getenv('SMTP_USER') and os.getenv('SMTP_PASSWORD'))
+        pool = get_smtp_pool() if smtp_configured else None
+
+        for email in emails:
+            try:
+                if self._already_sent(email.id):
+                    print(f"[EMAIL] Email {email.id} je već poslat, samo se beleži status")
+                elif pool is None:
+                    print(f"[EMAIL] SMTP nije konfigurisan. Email za {email.primalac} nije poslat.")
+                    print(f"[EMAIL] Naslov: {email.naslov}")
+                else:
+                    pool.send(build_message(email))
+                    self._mark_sent(email.id)
+                    print(f"[EMAIL] Uspešno poslat email na {email.primalac}")
+                values = {
+                    EmailOutbox.status: EmailStatus.SENT,
+                    EmailOutbox.poslat: datetime.utcnow(),
+                    EmailOutbox.poslednja_greska: None,
+                    EmailOutbox.prilog: None,  # Prilog više nije potreban
+                }
+                self.sent += 1
+            except Exception as e:
+                values = self._retry_values(email, str(e))
+            self._finish(email, values)
+
+        self.batches += 1
+        self.last_batch_seconds = round(time.monotonic() - started, 3)
+        return len(emails)
+
+    def _claim_batch(self) -> list:
+        """
+        Preuzima seriju dospelih emailova (PENDING ili SENDING sa isteklim
+        zakupom) i odmah commit-uje preuzimanje. Vraćeni objekti su odvojeni
+        od sesije i zadržavaju učitane podatke (i prilog) za slanje.
+        """
+        now = datetime.utcnow()
+        emails = EmailOutbox.query.options(undefer(EmailOutbox.prilog)).filter(
+            EmailOutbox.status.in_([EmailStatus.PENDING, EmailStatus.SENDING]),
+            EmailOutbox.sledeci_pokusaj <= now
+        ).order_by(EmailOutbox.id).limit(BATCH_SIZE).with_for_update(skip_locked=True).all()
+
+        lease_until = now + timedelta(seconds=LEASE_SECONDS)
+        for email in emails:
+            email.status = EmailStatus.SENDING
+            email.pokusaja += 1
+            email.sledeci_pokusaj = lease_until
+        db.session.flush()
+        for email in emails:
+            db.session.expunge(email)
+        db.session.commit()
+        return emails
+
+    def _finish(self, email: EmailOutbox, values: dict) -> None:
+        """
+        Upisuje ishod jednog emaila u sopstvenoj transakciji. UPDATE važi
+        samo dok je zakup naš (isti pokusaja).
+        """
+        try:
+            EmailOutbox.query.filter(
+                EmailOutbox.id == email.id,
+                EmailOutbox.status == EmailStatus.SENDING,
+                EmailOutbox.pokusaja == email.pokusaja
+            ).update(values, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            # Email ostaje SENDING i ponovo se preuzima po isteku zakupa
+            db.session.rollback()
+            print(f"[EMAIL] Greška pri upisu statusa emaila {email.id}: {str(e)}")
+
+    @staticmethod
+    def _already_sent(email_id: int) -> bool:
+        try:
+            return bool(get_redis().exists(f'{SENT_MARKER_PREFIX}{email_id}'))
+        except Exception as e:
+            print(f"[EMAIL] Redis nije dostupan za proveru emaila {email_id}: {str(e)}")
+            return False
+
+    @staticmethod
+    def _mark_sent(email_id: int) -> None:
+        try:
+            get_redis().set(f'{SENT_MARKER_PREFIX}{email_id}', 1, ex=SENT_MARKER_TTL)
+        except Exception as e:
+            print(f"[EMAIL] Redis nije dostupan za oznaku emaila {email_id}: {str(e)}")
+
+    def _retry_values(self, email: EmailOutbox, error: str) -> dict:
+        if email.pokusaja >= MAX_ATTEMPTS:
+            self.dead += 1
+            print(f"[EMAIL] Email {email.id} za {email.primalac} prebačen u dead-letter: {error}")
+            return {EmailOutbox.status: EmailStatus.DEAD, EmailOutbox.poslednja_greska: error}
+        delay = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (email.pokusaja - 1))
+        self.failed += 1
+        print(f"[EMAIL] Pokušaj {email.pokusaja}/{MAX_ATTEMPTS} neuspešan za {email.primalac}, "
+              f"sledeći za {delay}s: {error}")
+        return {
+            EmailOutbox.status: EmailStatus.PENDING,
+            EmailOutbox.sledeci_pokusaj: datetime.utcnow() + timedelta(seconds=delay),
+            EmailOutbox.poslednja_greska: error,
+        }
+
+    def purge_sent(self, retention_days: int = RETENTION_DAYS) -> int:
+        """Briše poslate emailove starije od retention_days."""
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = EmailOutbox.query.filter(
+            EmailOutbox.status == EmailStatus.SENT,
+            EmailOutbox.poslat < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def metrics(self) -> dict:
+        """Metrike protoka (ovaj proces) i zaostatka (iz baze)."""
+        counts = dict(db.session.query(EmailOutbox.status, func.count(EmailOutbox.id))
+                      .group_by(EmailOutbox.status).all())
+        oldest_pending = db.session.query(func.min(EmailOutbox.kreiran)).filter(
+            EmailOutbox.status == EmailStatus.PENDING
+        ).scalar()
+        uptime = time.time() - self._started_at if self._started_at else 0
+
+        return {
+            'pokrenut': self._thread is not None,
+            'poslato': self.sent,
+            'neuspesnih_pokusaja': self.failed,
+            'dead_letter': self.dead,
+            'serija': self.batches,
+            'poslednja_serija_sekundi': self.last_batch_seconds,
+            'poslato_po_minutu': round(self.sent / uptime * 60, 2) if uptime else 0.0,
+            'na_cekanju': counts.get(EmailStatus.PENDING, 0),
+            'u_slanju': counts.get(EmailStatus.SENDING, 0),
+            'ukupno_dead': counts.get(EmailStatus.DEAD, 0),
+            'najstariji_na_cekanju_sekundi': int((datetime.utcnow() - oldest_pending).total_seconds())
+            if oldest_pending else 0,
+        }
+
+
+# Jedan dispečer po procesu
+email_dispatcher = EmailDispatcher()
@@ -0,0 +1,194 @@
+# server/app/tasks/login_audit.py
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app import db
+from app.models import LoginAttempt, LoginAttemptDaily
+from app.utils.redis_client import get_redis
+
+# Podešavanja batch upisa
+BATCH_SIZE = int(os.getenv('LOGIN_AUDIT_BATCH_SIZE', '200'))
+FLUSH_INTERVAL = float(os.getenv('LOGIN_AUDIT_FLUSH_SECONDS', '2'))
+MAX_QUEUE = int(os.getenv('LOGIN_AUDIT_MAX_QUEUE', '10000'))
+
+# Podešavanja retencije
+RETENTION_DAYS = int(os.getenv('LOGIN_ATTEMPTS_RETENTION_DAYS', '30'))
+RETENTION_INTERVAL = int(os.getenv('LOGIN_ATTEMPTS_RETENTION_INTERVAL', '21600'))  # 6h
+RETENTION_BATCH = 5000
+_RETENTION_LOCK_KEY = 'login_attempts_rollup_lock'
+
+
+class LoginAuditWriter:
+    """
+    Pozadinski upis LoginAttempt redova u serijama.
+
+    Login putanja samo ubaci događaj u ograničen red u memoriji; pozadinska
+    nit ga upisuje jednim bulk INSERT-om kada se skupi BATCH_SIZE događaja
+    ili prođe FLUSH_INTERVAL sekundi. Ako je red pun, događaj se odbacuje
+    (audit ne sme da uspori ili obori prijavu). Pri gašenju procesa red
+    se isprazni u bazu.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=MAX_QUEUE)
+        self._app = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._last_retention = 0.0
+        self.dropped = 0
+
+    def record(self, app, email: str, ip_address, success: bool) -> None:
+        """Dodaje pokušaj prijave u red za upis."""
+        self._ensure_started(app)
+        try:
+            self._queue.put_nowait({
+                'email': email,
+                'ip_adresa': ip_address,
+                'uspesno': success,
+                'vreme_pokusaja': datetime.utcnow(),
+            })
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                print(f'[LOGIN AUDIT] Red je pun, odbačeno događaja: {self.dropped}')
+
+    def _ensure_started(self, app) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = app
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+            print('[LOGIN AUDIT] Pozadinski upis pokrenut')
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._flush(batch)
+            if time.time() - self._last_retention >= RETENTION_INTERVAL:
+                self._last_retention = time.time()
+                self._run_retention()
+
+    def _collect_batch(self) -> list:
+        """Čeka događaje dok se ne skupi BATCH_SIZE ili ne istekne FLUSH_INTERVAL."""
+        batch = []
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: list) -> None:
+        with self._app.app_context():
+            try:
+                db.session.execute(LoginAttempt.__table__.insert(), batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f'[LOGIN AUDIT] Greška pri upisu {len(batch)} pokušaja: {str(e)}')
+            finally:
+                db.session.remove()
+
+    def _run_retention(self) -> None:
+        # Samo jedan proces radi rollup u isto vreme
+        try:
+            if not get_redis().set(_RETENTION_LOCK_KEY, '1', nx=True, ex=RETENTION_INTERVAL):
+                return
+        except Exception as e:
+            print(f'[LOGIN AUDIT] Redis nije dostupan za retenciju: {str(e)}')
+            return
+
+        with self._app.app_context():
+            try:
+                removed = rollup_old_attempts()
+                if removed:
+                    print(f'[LOGIN AUDIT] Sabrano i obrisano {removed} starih pokušaja prijave')
+            except Exception as e:
+                db.session.rollback()
+                print(f'[LOGIN AUDIT] Greška pri retenciji: {str(e)}')
+            finally:
+                db.session.remove()
+
+    def shutdown(self) -> None:
+        """Zaustavlja nit i upisuje sve što je ostalo u redu."""
+        self._stopping.set()
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch and self._app is not None:
+            self._flush(batch)
+
+
+def rollup_old_attempts(retention_days: int = RETENTION_DAYS) -> int:
+    """
+    Sabira pokušaje starije od retention_days u login_attempts_daily
+    i briše ih iz login_attempts. Radi u serijama; svaka serija je jedna
+    transakcija (sabiranje + brisanje), pa prekid ne gubi podatke.
+
+    Returns:
+        Broj obrisanih redova
+    """
+    cutoff = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) \
+        - timedelta(days=retention_days)
+    removed = 0
+
+    while True:
+        ids = [row.id for row in db.session.query(LoginAttempt.id).filter(
+            LoginAttempt.vreme_pokusaja < cutoff
+        ).order_by(LoginAttempt.id).limit(RETENTION_BATCH)]
+        if not ids:
+            break
+
+        dan = func.date(LoginAttempt.vreme_pokusaja)
+        totals = db.session.query(
+            dan.label('dan'),
+            LoginAttempt.email,
+            func.sum(case((LoginAttempt.uspesno.is_(True), 1), else_=0)).label('uspesnih'),
+            func.sum(case((LoginAttempt.uspesno.is_(False), 1), else_=0)).label('neuspesnih'),
+        ).filter(LoginAttempt.id.in_(ids)).group_by(dan, LoginAttempt.email).all()
+
+        rows = [{
+            'dan': t.dan,
+            'email': t.email,
+            'uspesnih': int(t.uspesnih or 0),
+            'neuspesnih': int(t.neuspesnih or 0),
+        } for t in totals]
+
+        if rows:
+            stmt = mysql_insert(LoginAttemptDaily.__table__)
+            stmt = stmt.on_duplicate_key_update(
+                uspesnih=LoginAttemptDaily.__table__.c.uspesnih + stmt.inserted.uspesnih,
+                neuspesnih=LoginAttemptDaily.__table__.c.neuspesnih + stmt.inserted.neuspesnih,
+            )
+            db.session.execute(stmt, rows)
+
+        LoginAttempt.query.filter(LoginAttempt.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
+
+    return removed
+
+
+# Jedan writer po procesu
+login_audit_writer = LoginAuditWriter()
@@ -0,0 +1,35 @@
+# server/app/utils/bloom.py
+
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """
+    Jednostavan Bloom filter u memoriji procesa.
+
+    Može da vrati lažno pozitivan odgovor ("možda postoji"), ali nikada
+    lažno negativan - ako kaže da element ne postoji, sigurno ne postoji.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        # Double hashing: h1 + i*h2 daje k nezavisnih pozicija iz jednog digest-a
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        with self._lock:
+            for pos in self._positions(item):
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
@@ -0,0 +1,104 @@
+# server/app/utils/email_templates.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from email.mime.application import MIMEApplication
+from functools import lru_cache
+
+from jinja2 import Environment, BaseLoader
+
+# Izvorni kod email šablona. Kompajliraju se jednom po procesu (get_template).
+_TEMPLATES = {
+    'role_change.subject': 'Promena uloge na platformi Avio Letovi',
+    'role_change.html': """
+    <html>
+    <body>
+        <h2>Poštovani/a {{ ime }},</h2>
+        <p>Obaveštavamo Vas da je Vaša uloga na platformi Avio Letovi promenjena.</p>
+        <p><strong>Nova uloga:</strong> {{ nova_uloga }}</p>
+        <p>Sada imate pristup novim funkcionalnostima u skladu sa Vašom novom ulogom.</p>
+        <br>
+        <p>Srdačan pozdrav,</p>
+        <p>Tim Avio Letovi</p>
+    </body>
+    </html>
+    """,
+    'flight_cancelled.subject': 'Let {{ naziv_leta }} je otkazan',
+    'flight_cancelled.html': """
+    <html>
+    <body>
+        <h2>Poštovani/a {{ ime }},</h2>
+        <p>Sa žaljenjem Vas obaveštavamo da je let koji ste rezervisali otkazan.</p>
+        <p><strong>Detalji leta:</strong></p>
+        <ul>
+            <li>Naziv leta: {{ naziv_leta }}</li>
+            <li>Ruta: {{ aerodrom_polaska }} → {{ aerodrom_dolaska }}</li>
+        </ul>
+        <p>Iznos karte će Vam biti vraćen na račun u aplikaciji.</p>
+        <p>Izvinjavamo se zbog eventualnih neugodnosti.</p>
+        <br>
+        <p>Srdačan pozdrav,</p>
+        <p>Tim Avio Letovi</p>
+    </body>
+    </html>
+    """,
+    'report.subject': 'Izvještaj: {{ tip }}',
+    'report.html': """
+    <html>
+    <body>
+        <h2>Poštovani/a {{ ime }},</h2>
+        <p>U prilogu se nalazi izvještaj koji ste zatražili.</p>
+        <p><strong>Tip izvještaja:</strong> {{ tip }}</p>
+        <br>
+        <p>Srdačan pozdrav,</p>
+        <p>Tim Avio Letovi</p>
+    </body>
+    </html>
+    """,
+}
+
+# HTML tela se escape-uju, naslovi (plain text) ne
+_html_env = Environment(loader=BaseLoader(), autoescape=True)
+_text_env = Environment(loader=BaseLoader(), autoescape=False)
+
+
+@lru_cache(maxsize=None)
+def get_template(name: str):
+    """Vraća kompajliran šablon (kompajlira se samo pri prvom pozivu)."""
+    env = _html_env if name.endswith('.html') else _text_env
+    return env.from_string(_TEMPLATES[name])
+
+
+def render(name: str, **context) -> str:
+    """Renderuje šablon za jednog primaoca."""
+    return get_template(name).render(**context)
+
+
+# Keš gotovih MIME delova za priloge: isti PDF poslat više primalaca
+# se base64-enkodira samo jednom.
+_ATTACHMENT_CACHE_SIZE = 8
+_attachments = OrderedDict()
+_attachments_lock = threading.Lock()
+
+
+def attachment_part(content: bytes, filename: str) -> MIMEApplication:
+    """
+    Vraća MIME deo za prilog, deljen između poruka sa istim sadržajem.
+    Deo se ne menja posle kreiranja, pa ga je bezbedno dodati u više poruka.
+    """
+    key = (hashlib.sha256(content).hexdigest(), filename)
+    with _attachments_lock:
+        part = _attachments.get(key)
+        if part is not None:
+            _attachments.move_to_end(key)
+            return part
+
+    part = MIMEApplication(content, Name=filename)
+    part['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    with _attachments_lock:
+        _attachments[key] = part
+        while len(_attachments) > _ATTACHMENT_CACHE_SIZE:
+            _attachments.popitem(last=False)
+    return part
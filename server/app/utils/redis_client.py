@@ -0,0 +1,26 @@
+# server/app/utils/redis_client.py
+
+import os
+import threading
+
+import redis
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Vraća deljeni Redis klijent za ceo proces.
+
+    Klijent koristi jedan connection pool, pa se konekcije ponovo koriste
+    umesto da se otvaraju pri svakom pozivu. redis-py sam resetuje pool
+    posle fork-a, tako da je bezbedan i u procesima za slanje emailova.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+                _client = redis.from_url(redis_url, decode_responses=True)
+    return _client
@@ -1,5 +1,7 @@
 # server/app/utils/security.py
 
+import os
+import threading
 from functools import wraps
 
 from flask import jsonify
@@ -7,12 +9,43 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
+# Maksimalan broj istovremenih PBKDF2 izračunavanja. Kada je eventlet
+# aktivan, semafor je "zelen" pa višak zahteva čeka bez blokiranja hub-a.
+_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', '4'))
+_hash_slots = threading.BoundedSemaphore(_HASH_CONCURRENCY)
+
+
+def _eventlet_patched() -> bool:
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('thread')
+
+
+def _run_cpu_bound(fn, *args):
+    """
+    Izvršava CPU-zahtevnu funkciju van eventlet hub-a.
+
+    Pod eventlet-om poziv ide u nativni thread pool (eventlet.tpool), pa
+    ostali zahtevi i Socket.IO saobraćaj nastavljaju dok traje hash-ovanje
+    (hashlib.pbkdf2_hmac oslobađa GIL). Bez eventlet-a (npr. radni procesi)
+    funkcija se poziva direktno.
+    """
+    if not _eventlet_patched():
+        return fn(*args)
+
+    from eventlet import tpool
+    with _hash_slots:
+        return tpool.execute(fn, *args)
+
+
 def hash_password(password: str) -> str:
-    return generate_password_hash(password)
+    return _run_cpu_bound(generate_password_hash, password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return check_password_hash(password_hash, password)
+    return _run_cpu_bound(check_password_hash, password_hash, password)
 
 
 def role_required(*roles):
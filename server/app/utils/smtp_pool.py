@@ -0,0 +1,144 @@
+# server/app/utils/smtp_pool.py
+
+import os
+import queue
+import smtplib
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Greške posle kojih se konekcija odbacuje i otvara nova
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, socket.timeout)
+
+
+class SMTPPool:
+    """
+    Mali pool autentifikovanih SMTP konekcija.
+
+    Jedna konekcija šalje mnogo poruka (STARTTLS i login samo jednom).
+    Broj istovremenih konekcija je ograničen (size), a max_per_second
+    ograničava brzinu slanja prema limitima provajdera. Pukla konekcija
+    se odbacuje i poruka se šalje ponovo preko nove.
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str,
+                 size: int = 2, max_per_second: float = 0, idle_timeout: float = 60):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.idle_timeout = idle_timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._min_interval = 1.0 / max_per_second if max_per_second > 0 else 0
+        self._rate_lock = threading.Lock()
+        self._next_send = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=30)
+        conn.starttls()
+        conn.login(self.user, self.password)
+        return conn
+
+    def _take_idle(self) -> Optional[smtplib.SMTP]:
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - last_used < self.idle_timeout:
+                return conn
+            # Dugo neaktivna konekcija - proveri da li je server još drži
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except Exception:
+                pass
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self):
+        """Pozajmljuje konekciju iz pool-a (čeka ako su sve zauzete)."""
+        with self._slots:
+            conn = self._take_idle() or self._connect()
+            try:
+                yield conn
+            except Exception:
+                self._close(conn)
+                raise
+            else:
+                self._idle.put((conn, time.monotonic()))
+
+    def _throttle(self) -> None:
+        if not self._min_interval:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_send - now
+            self._next_send = max(now, self._next_send) + self._min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def send(self, msg) -> None:
+        """
+        Šalje poruku preko pooled konekcije.
+        Ako je konekcija pukla, pokušava jednom preko nove konekcije.
+        Ostale SMTP greške (npr. odbijen primalac) se prosleđuju pozivaocu.
+        """
+        self._throttle()
+        for attempt in range(2):
+            try:
+                with self.connection() as conn:
+                    conn.send_message(msg)
+                return
+            except _CONNECTION_ERRORS:
+                if attempt:
+                    raise
+
+    def close_all(self) -> None:
+        """Zatvara sve neaktivne konekcije."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPPool:
+    """
+    Vraća SMTP pool za tekući proces.
+    Posle fork-a pravi se novi pool, jer otvorene SMTP konekcije
+    ne smeju da se dele između procesa.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = SMTPPool(
+                    host=os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+                    port=int(os.getenv('SMTP_PORT', 587)),
+                    user=os.getenv('SMTP_USER', ''),
+                    password=os.getenv('SMTP_PASSWORD', ''),
+                    size=int(os.getenv('SMTP_POOL_SIZE', '2')),
+                    max_per_second=float(os.getenv('SMTP_MAX_PER_SECOND', '0')),
+                )
+                _pool_pid = os.getpid()
+    return _pool
@@ -0,0 +1,117 @@
+# server/app/utils/user_cache.py
+
+import json
+import os
+import time
+import uuid
+from typing import Callable, Optional
+
+from app.utils.redis_client import get_redis
+
+# Polja sažetka korisnika koja se keširaju (bez slike i ostalih kolona)
+SUMMARY_FIELDS = ('id', 'ime', 'prezime', 'email', 'uloga', 'stanje_racuna', 'aktivan')
+
+CACHE_TTL = int(os.getenv('USER_SUMMARY_CACHE_SECONDS', '300'))
+# Nepostojeći korisnik se kešira kraće (registracija ionako briše ključ)
+NEGATIVE_TTL = 30
+# Koliko dugo jedan proces drži pravo da puni keš posle promašaja
+LOCK_TTL_MS = 3000
+# Ostali čekaju da se keš popuni najviše ovoliko, pa čitaju iz baze
+WAIT_SECONDS = 0.5
+WAIT_STEP = 0.02
+
+_MISSING = 'null'
+
+# Upisuje vrednost samo ako se generacija nije promenila od čitanja - izmena
+# korisnika tokom punjenja keša poništava upis (nema zastarelog sažetka).
+_FILL_LUA = """
+local gen = redis.call('GET', KEYS[2]) or '0'
+if gen ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', tonumber(ARGV[3]))
+return 1
+"""
+
+_fill_script = None
+
+
+def _keys(user_id: int):
+    return f'user_summary:{user_id}', f'user_summary_gen:{user_id}', f'user_summary_lock:{user_id}'
+
+
+def _fill(client, user_id: int, gen: str, summary: Optional[dict]) -> None:
+    global _fill_script
+    if _fill_script is None:
+        _fill_script = client.register_script(_FILL_LUA)
+    key, gen_key, _ = _keys(user_id)
+    value = json.dumps(summary) if summary is not None else _MISSING
+    _fill_script(keys=[key, gen_key], args=[gen, value, CACHE_TTL if summary is not None else NEGATIVE_TTL])
+
+
+def get_summary(user_id: int, loader: Callable[[int], Optional[dict]]) -> Optional[dict]:
+    """
+    Read-through keš sažetka korisnika.
+
+    Pri promašaju samo jedan poziv (SET NX lock) čita bazu i puni keš;
+    ostali kratko čekaju na popunjen keš umesto da svi udare u bazu.
+    Ako Redis nije dostupan, sažetak se čita direktno iz baze.
+
+    Args:
+        user_id: ID korisnika
+        loader: Funkcija koja čita sažetak iz baze (None ako korisnik ne postoji)
+    """
+    key, gen_key, lock_key = _keys(user_id)
+    try:
+        client = get_redis()
+        cached, gen = client.mget([key, gen_key])
+    except Exception as e:
+        print(f'[USER CACHE] Redis nije dostupan: {str(e)}')
+        return loader(user_id)
+
+    if cached is not None:
+        return json.loads(cached)
+
+    gen = gen or '0'
+    token = uuid.uuid4().hex
+    try:
+        has_lock = client.set(lock_key, token, nx=True, px=LOCK_TTL_MS)
+        if not has_lock:
+            deadline = time.monotonic() + WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(WAIT_STEP)
+                cached = client.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+    except Exception as e:
+        print(f'[USER CACHE] Greška pri zaključavanju: {str(e)}')
+        has_lock = False
+
+    summary = loader(user_id)
+    try:
+        _fill(client, user_id, gen, summary)
+        if has_lock and client.get(lock_key) == token:
+            client.delete(lock_key)
+    except Exception as e:
+        print(f'[USER CACHE] Greška pri upisu keša: {str(e)}')
+    return summary
+
+
+def invalidate(*user_ids: int) -> None:
+    """
+    Briše keširane sažetke i povećava generaciju, pa upis koji je
+    počeo pre izmene neće vratiti stari sažetak u keš.
+    Poziva se posle commit-a svake izmene korisnika.
+    """
+    if not user_ids:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for user_id in user_ids:
+            key, gen_key, _ = _keys(user_id)
+            pipe.delete(key)
+            pipe.incr(gen_key)
+            pipe.expire(gen_key, CACHE_TTL * 2)
+        pipe.execute()
+    except Exception as e:
+        print(f'[USER CACHE] Greška pri invalidaciji: {str(e)}')
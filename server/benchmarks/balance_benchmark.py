@@ -0,0 +1,106 @@
+# server/benchmarks/balance_benchmark.py
+"""
+Konkurentni benchmark isplata/uplata preko internih ruta.
+
+Faza 1: --operations poziva deduct-balance/refund-balance (naizmenično,
+svaki sa svojim idempotency ključem) iz --concurrency niti za istog
+korisnika. Na kraju mora da važi:
+    konačno stanje = početno - uspešne isplate + uplate
+i stanje nikada ne sme da ode u minus.
+
+Faza 2: --keys isplata, svaka poslata --repeats puta istovremeno sa
+istim ključem. Stanje sme da se promeni tačno --keys puta.
+
+Korisnik treba da bude testni nalog - skripta menja njegovo stanje
+(faza 2 ga na kraju vraća uplatom).
+
+Upotreba:
+    python benchmarks/balance_benchmark.py --url http://localhost:5001/api \
+        --user-id 5 --operations 2000 --concurrency 32
+"""
+
+import argparse
+import os
+import threading
+import uuid
+from decimal import Decimal
+
+from _common import report, run_concurrent, session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Konkurentne isplate i uplate')
+    parser.add_argument('--url', default='http://localhost:5001/api')
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--amount', type=str, default='1.00')
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--keys', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--internal-key', default=os.getenv('INTERNAL_API_KEY', 'internal-secret'))
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/') + '/internal'
+    headers = {'X-Internal-Key': args.internal_key}
+    amount = Decimal(args.amount)
+    run_id = uuid.uuid4().hex[:8]
+
+    def balance() -> Decimal:
+        response = session().get(f'{base}/user/{args.user_id}',
+                                  params={'fields': 'id,stanje_racuna'}, headers=headers)
+        response.raise_for_status()
+        return Decimal(str(response.json()['data']['stanje_racuna']))
+
+    def change(kind: str, key: str) -> bool:
+        response = session().post(f'{base}/{kind}-balance', headers=headers, json={
+            'user_id': args.user_id, 'amount': float(amount), 'idempotency_key': key,
+        })
+        return response.status_code == 200
+
+    # Faza 1: mešovite isplate i uplate
+    start_balance = balance()
+    applied = {'deduct': 0, 'refund': 0}
+    lock = threading.Lock()
+
+    def mixed(i: int) -> bool:
+        kind = 'deduct' if i % 2 == 0 else 'refund'
+        ok = change(kind, f'bench-{run_id}-{i}')
+        if ok:
+            with lock:
+                applied[kind] += 1
+        # Odbijena isplata (nedovoljno sredstava) je očekivan ishod
+        return ok or kind == 'deduct'
+
+    report('isplate/uplate', *run_concurrent(mixed, args.operations, args.concurrency))
+    expected = start_balance - amount * applied['deduct'] + amount * applied['refund']
+    end_balance = balance()
+    print(f'[BENCH] isplata {applied["deduct"]}, uplata {applied["refund"]}; '
+          f'očekivano stanje {expected}, stvarno {end_balance} -> '
+          f'{"OK" if expected == end_balance and end_balance >= 0 else "NESLAGANJE"}')
+
+    # Faza 2: isti ključ poslat više puta istovremeno
+    start_balance = end_balance
+    if start_balance < amount * args.keys:
+        print(f'[BENCH] stanje {start_balance} je manje od {amount * args.keys}; '
+              f'faza 2 traži dovoljno sredstava za sve ključeve')
+        return
+    keys = [f'bench-{run_id}-dup-{k}' for k in range(args.keys)]
+    total = args.keys * args.repeats
+    report('ponovljeni ključevi',
+           *run_concurrent(lambda i: change('deduct', keys[i % args.keys]), total, args.concurrency))
+    end_balance = balance()
+    applied_once = (start_balance - end_balance) / amount
+    print(f'[BENCH] {total} poziva sa {args.keys} ključeva promenilo je stanje '
+          f'{applied_once} puta -> {"OK" if applied_once == args.keys else "NESLAGANJE"}')
+
+    # Vraćanje stanja posle faze 2
+    if applied_once:
+        session().post(f'{base}/refund-balance', headers=headers, json={
+            'user_id': args.user_id,
+            'amount': float(amount * applied_once),
+            'idempotency_key': f'bench-{run_id}-restore-dup',
+        })
+
+
+if __name__ == '__main__':
+    main()
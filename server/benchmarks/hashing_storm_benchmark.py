@@ -0,0 +1,71 @@
+# server/benchmarks/hashing_storm_benchmark.py
+"""
+Benchmark latencije nepovezanih zahteva tokom talasa prijava.
+
+Prijava troši PBKDF2 (verify_password). Ako heširanje blokira eventlet
+hub, svi ostali zahtevi čekaju. Skripta meri p50/p99 latenciju laganog
+zahteva (GET /auth/me sa tokenom, bez rada sa bazom) prvo bez
+opterećenja, a zatim dok --storm niti neprekidno šalju ispravne prijave
+za zadati nalog.
+
+Upotreba:
+    python benchmarks/hashing_storm_benchmark.py --url http://localhost:5001/api \
+        --email admin@example.com --password ... --probes 500 --storm 16
+"""
+
+import argparse
+import threading
+
+from _common import report, run_concurrent, session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Latencija zahteva tokom talasa prijava')
+    parser.add_argument('--url', default='http://localhost:5001/api')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--probes', type=int, default=500)
+    parser.add_argument('--probe-concurrency', type=int, default=4)
+    parser.add_argument('--storm', type=int, default=16, help='broj niti koje šalju prijave')
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/')
+    credentials = {'email': args.email, 'password': args.password}
+    login = session().post(f'{base}/auth/login', json=credentials)
+    token = (login.json() or {}).get('access_token')
+    if not token:
+        print(f'[BENCH] Prijava nije uspela: {login.status_code} {login.text[:200]}')
+        return
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def probe(i: int) -> bool:
+        return session().get(f'{base}/auth/me', headers=headers).status_code == 200
+
+    report('/auth/me bez opterećenja', *run_concurrent(probe, args.probes, args.probe_concurrency))
+
+    stop = threading.Event()
+    logins = [0]
+    lock = threading.Lock()
+
+    def storm() -> None:
+        while not stop.is_set():
+            if session().post(f'{base}/auth/login', json=credentials).status_code == 200:
+                with lock:
+                    logins[0] += 1
+
+    threads = [threading.Thread(target=storm, daemon=True) for _ in range(args.storm)]
+    for thread in threads:
+        thread.start()
+    try:
+        latencies, errors, elapsed = run_concurrent(probe, args.probes, args.probe_concurrency)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    report(f'/auth/me tokom {args.storm} niti prijava', latencies, errors, elapsed)
+    print(f'[BENCH] uspešnih prijava tokom merenja: {logins[0]} ({logins[0] / elapsed:.1f}/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# server/benchmarks/login_throttle_benchmark.py
+"""
+Benchmark prijave pod opterećenjem nalik napadu (credential stuffing).
+
+Za svaku od --targets email adresa šalje se --attempts pogrešnih prijava
+istovremeno iz --concurrency niti. Meri se protok, a proverava se i
+ispravnost ograničenja: po adresi sme da bude obrađeno najviše
+MAX_FAILED_ATTEMPTS pokušaja, svi ostali moraju biti odbijeni kao
+zaključani. Podrazumevano se koriste nepostojeće adrese, pa pravi
+nalozi ostaju netaknuti.
+
+Upotreba:
+    python benchmarks/login_throttle_benchmark.py --url http://localhost:5001/api \
+        --targets 50 --attempts 20 --concurrency 32
+"""
+
+import argparse
+import threading
+import uuid
+from collections import Counter, defaultdict
+
+from _common import report, run_concurrent, session
+
+# Početak poruke za pokušaj koji je stigao do provere lozinke
+_PROCESSED_PREFIXES = ('Korisnik sa ovim emailom ne postoji', 'Pogrešna lozinka')
+_LOCKED_PREFIX = 'Nalog je zaključan'
+_IP_LIMIT_PREFIX = 'Previše pokušaja'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark prijave pod napadom')
+    parser.add_argument('--url', default='http://localhost:5001/api')
+    parser.add_argument('--targets', type=int, default=50)
+    parser.add_argument('--attempts', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--max-failed', type=int, default=3,
+                        help='MAX_FAILED_ATTEMPTS na serveru')
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f'bench-{run_id}-{i}@example.com' for i in range(args.targets)]
+    url = args.url.rstrip('/') + '/auth/login'
+
+    outcomes = defaultdict(Counter)
+    lock = threading.Lock()
+
+    def attempt(i: int) -> bool:
+        email = emails[i % len(emails)]
+        response = session().post(url, json={'email': email, 'password': 'pogresna-lozinka'})
+        message = (response.json() or {}).get('message', '')
+        if message.startswith(_PROCESSED_PREFIXES):
+            kind = 'obradjen'
+        elif message.startswith(_LOCKED_PREFIX):
+            kind = 'zakljucan'
+        elif message.startswith(_IP_LIMIT_PREFIX):
+            kind = 'ip_limit'
+        else:
+            kind = 'ostalo'
+        with lock:
+            outcomes[email][kind] += 1
+        return response.status_code == 401
+
+    total = args.targets * args.attempts
+    report('login pod napadom', *run_concurrent(attempt, total, args.concurrency))
+
+    totals = Counter()
+    violations = 0
+    for email in emails:
+        totals.update(outcomes[email])
+        if outcomes[email]['obradjen'] > args.max_failed:
+            violations += 1
+    print(f'[BENCH] ishodi: {dict(totals)}')
+    print(f'[BENCH] adresa sa više od {args.max_failed} obrađena pokušaja: {violations}')
+    if totals['ip_limit']:
+        print('[BENCH] napomena: deo pokušaja je odbio IP limiter (LOGIN_IP_LIMIT)')
+
+
+if __name__ == '__main__':
+    main()
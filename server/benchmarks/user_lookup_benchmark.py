@@ -0,0 +1,56 @@
+# server/benchmarks/user_lookup_benchmark.py
+"""
+Benchmark QPS interne rute GET /internal/user/<id>.
+
+Ista raspodela ID-jeva se gađa tri puta:
+  - polja iz sažetka (id,ime,email,stanje_racuna) - Redis read-through keš
+  - polje van sažetka (id,drzava) - projekcija iz baze, bez keša
+  - bez fields parametra - ceo red
+Prvi prolaz kroz keš puni Redis; ispisuje se i drugi, "topli" prolaz.
+
+Upotreba:
+    python benchmarks/user_lookup_benchmark.py --url http://localhost:5001/api \
+        --first-id 1 --last-id 100 --requests 5000 --concurrency 32
+"""
+
+import argparse
+import os
+import random
+
+from _common import report, run_concurrent, session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='QPS interne rute za korisnika')
+    parser.add_argument('--url', default='http://localhost:5001/api')
+    parser.add_argument('--first-id', type=int, default=1)
+    parser.add_argument('--last-id', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--internal-key', default=os.getenv('INTERNAL_API_KEY', 'internal-secret'))
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/') + '/internal/user'
+    headers = {'X-Internal-Key': args.internal_key}
+    rng = random.Random(42)
+    ids = [rng.randint(args.first_id, args.last_id) for _ in range(args.requests)]
+
+    def lookup(fields):
+        params = {'fields': fields} if fields else None
+
+        def call(i: int) -> bool:
+            response = session().get(f'{base}/{ids[i]}', params=params, headers=headers)
+            # 404 za ID koji ne postoji je ispravan (i keširan) odgovor
+            return response.status_code in (200, 404)
+        return call
+
+    summary = lookup('id,ime,email,stanje_racuna')
+    report('sažetak, hladan keš', *run_concurrent(summary, args.requests, args.concurrency))
+    report('sažetak, topao keš', *run_concurrent(summary, args.requests, args.concurrency))
+    report('polje van sažetka (baza)',
+           *run_concurrent(lookup('id,drzava'), args.requests, args.concurrency))
+    report('ceo red (baza)', *run_concurrent(lookup(None), args.requests, args.concurrency))
+
+
+if __name__ == '__main__':
+    main()